@@ -1,3 +1,3 @@
-from pyhamtools.lookuplib import LookupLib
+from pyhamtools.lookuplib import LookupLib, AsyncLookupLib
 from pyhamtools.callinfo import Callinfo
 
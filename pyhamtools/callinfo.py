@@ -3,9 +3,13 @@ import logging
 from datetime import datetime, timezone
 
 from pyhamtools.consts import LookupConventions as const
+from pyhamtools.lookuplib import AsyncLookupLib
 
 from pyhamtools.callsign_exceptions import callsign_exceptions
 
+# callsigns without prefix or appendix
+REGULAR_CALLSIGN = '^[\\d]{0,1}[A-Z]{1,2}\\d{1,4}([A-Z]{1,4}|[A-Z]{1,2}\\d{0,3})[A-Z]{0,5}$'
+
 class Callinfo(object):
     """
     The purpose of this class is to return data (country, latitude, longitude, CQ Zone...etc) for an
@@ -17,6 +21,9 @@ class Callinfo(object):
         lookuplib (:py:class:`LookupLib`) : instance of :py:class:`LookupLib`
         logger (logging.getLogger(__name__), optional): Python logger
 
+    Raises:
+        TypeError: lookuplib is an :py:class:`AsyncLookupLib`, whose lookups are coroutines
+
     """
 
     def __init__(self, lookuplib, logger=None):
@@ -28,6 +35,9 @@ class Callinfo(object):
             self._logger = logging.getLogger(__name__)
             self._logger.addHandler(logging.NullHandler())
 
+        if isinstance(lookuplib, AsyncLookupLib):
+            raise TypeError("Callinfo requires a synchronous LookupLib")
+
         self._lookuplib = lookuplib
         self._callsign_info = None
 
@@ -65,21 +75,25 @@ class Callinfo(object):
 
     def _iterate_prefix(self, callsign, timestamp=None):
         """truncate call until it corresponds to a Prefix in the database"""
+        data = self._get_prefix_data(callsign, timestamp)
+        if data is None:
+            raise KeyError
+        return data
+
+    def _get_prefix_data(self, callsign, timestamp=None):
+        """same as _iterate_prefix, but returns None if no Prefix is found"""
+        return self._lookuplib.get_longest_prefix(self._get_prefix_candidate(callsign, timestamp), timestamp)
+
+    @staticmethod
+    def _get_prefix_candidate(callsign, timestamp=None):
+        """returns the string whose longest matching Prefix identifies the callsign"""
         prefix = callsign
-        if timestamp is None:
-            timestamp = datetime.now(timezone.utc)
 
         if re.search('(VK|AX|VI)9[A-Z]{3}', callsign): #special rule for VK9 calls
-            if timestamp > datetime(2006,1,1, tzinfo=timezone.utc):
+            if timestamp is None or timestamp > datetime(2006,1,1, tzinfo=timezone.utc):
                 prefix = callsign[0:3]+callsign[4:5]
 
-        while len(prefix) > 0:
-            try:
-                return self._lookuplib.lookup_prefix(prefix, timestamp)
-            except KeyError:
-                prefix = prefix.replace(' ', '')[:-1]
-                continue
-        raise KeyError
+        return prefix
 
     @staticmethod
     def check_if_mm(callsign):
@@ -108,9 +122,14 @@ class Callinfo(object):
 
 
         """
+        data = self._decode_callsign(callsign, timestamp)
+        if data is None:
+            raise KeyError("Callsign could not be decoded")
+        return data
+
+    def _decode_callsign(self, callsign, timestamp=None):
+        """same as _dismantle_callsign, but returns None if the callsign could not be identified"""
         entire_callsign = callsign.upper()
-        if timestamp is None:
-            timestamp = datetime.now(timezone.utc)
 
         if re.search('[/A-Z0-9\\-]{3,15}', entire_callsign):  # make sure the call has at least 3 characters
 
@@ -147,25 +166,27 @@ class Callinfo(object):
                     }
                 elif appendix == 'QRP':  # special case QRP
                     callsign = re.sub('/QRP', '', callsign)
-                    return self._iterate_prefix(callsign, timestamp)
+                    return self._get_prefix_data(callsign, timestamp)
                 elif appendix == 'QRPP':  # special case QRPP
                     callsign = re.sub('/QRPP', '', callsign)
-                    return self._iterate_prefix(callsign, timestamp)
+                    return self._get_prefix_data(callsign, timestamp)
                 elif appendix == 'BCN':  # filter all beacons
                     callsign = re.sub('/BCN', '', callsign)
-                    data = self._iterate_prefix(callsign, timestamp).copy()
-                    data[const.BEACON] = True
+                    data = self._get_prefix_data(callsign, timestamp)
+                    if data is not None:
+                        data = data.copy()
+                        data[const.BEACON] = True
                     return data
                 elif appendix == "LH":  # Filter all Lighthouses
                     callsign = re.sub('/LH', '', callsign)
-                    return self._iterate_prefix(callsign, timestamp)
+                    return self._get_prefix_data(callsign, timestamp)
                 elif re.search('[A-Z]{3}', appendix): #case of US county(?) contest N3HBX/UAL
                     callsign = re.sub('/[A-Z]{3}$', '', callsign)
-                    return self._iterate_prefix(callsign, timestamp)
+                    return self._get_prefix_data(callsign, timestamp)
 
                 else:
                     # check if the appendix is a valid country prefix
-                    return self._iterate_prefix(re.sub('/', '', appendix), timestamp)
+                    return self._get_prefix_data(re.sub('/', '', appendix), timestamp)
 
             # Single character appendix (callsign/x)
             elif re.search('/[A-Z0-9]$', callsign):  # case call/p or /b /m or /5 etc.
@@ -174,8 +195,10 @@ class Callinfo(object):
 
                 if appendix == 'B':  # special case Beacon
                     callsign = re.sub('/B', '', callsign)
-                    data = self._iterate_prefix(callsign, timestamp).copy()
-                    data[const.BEACON] = True
+                    data = self._get_prefix_data(callsign, timestamp)
+                    if data is not None:
+                        data = data.copy()
+                        data[const.BEACON] = True
                     return data
 
                 elif re.search('\\d$', appendix):
@@ -185,15 +208,15 @@ class Callinfo(object):
                         callsign = re.sub('[\\d]+', area_nr, callsign)
                     else: # call has several digits e.g. 7N4AAL
                         pass # no (two) digit prefix countries known where appendix would change entity
-                    return self._iterate_prefix(callsign, timestamp)
+                    return self._get_prefix_data(callsign, timestamp)
 
                 else:
-                    return self._iterate_prefix(callsign, timestamp)
+                    return self._get_prefix_data(callsign, timestamp)
 
             # regular callsigns, without prefix or appendix
             # elif re.match('^[\\d]{0,1}[A-Z]{1,2}\\d{1,2}[A-Z]{1,2}([A-Z]{1,4}|\\d{1,3})[A-Z]{0,5}$', callsign):
-            elif re.match('^[\\d]{0,1}[A-Z]{1,2}\\d{1,4}([A-Z]{1,4}|[A-Z]{1,2}\\d{0,3})[A-Z]{0,5}$', callsign):
-                return self._iterate_prefix(callsign, timestamp)
+            elif re.match(REGULAR_CALLSIGN, callsign):
+                return self._get_prefix_data(callsign, timestamp)
 
             # callsigns with prefixes (xxx/callsign)
             elif re.search('^[A-Z0-9]{1,4}/', entire_callsign):
@@ -203,30 +226,31 @@ class Callinfo(object):
                 rest = re.search('/[A-Z0-9]+', entire_callsign)
                 if rest is None:
                     self._logger.warning(u"non latin characters in callsign '{0}'".format(entire_callsign))
-                    raise KeyError
+                    return None
                 rest = re.sub('/', '', rest.group(0))  
                 if re.match('^[\\d]{0,1}[A-Z]{1,2}\\d([A-Z]{1,4}|\\d{3,3}|\\d{1,3}[A-Z])[A-Z]{0,5}$', rest):
-                    return self._iterate_prefix(pfx)
+                    return self._get_prefix_data(pfx)
 
         if entire_callsign in callsign_exceptions:
-            return self._iterate_prefix(callsign_exceptions[entire_callsign])
+            return self._get_prefix_data(callsign_exceptions[entire_callsign])
 
         self._logger.debug("Could not decode " + callsign)
-        raise KeyError("Callsign could not be decoded")
+        return None
 
     def _lookup_callsign(self, callsign, timestamp=None):
-        if timestamp is None:
-            timestamp = datetime.now(timezone.utc)
+        data = self._get_callsign_data(callsign, timestamp)
+        if data is None:
+            raise KeyError
+        return data
+
+    def _get_callsign_data(self, callsign, timestamp=None):
+        """same as _lookup_callsign, but returns None for invalid operations and unknown callsigns"""
+        # most callsigns are neither exceptions, nor invalid operations
+        has_records = self._lookuplib.has_callsign_records(callsign)
 
         # Check if operation is invalid
-        invalid = False
-        try:
-            invalid = self._lookuplib.is_invalid_operation(callsign, timestamp)
-            if invalid:
-                raise KeyError
-        except KeyError:
-            if invalid:
-                raise
+        if has_records and self._lookuplib.get_invalid_operation(callsign, timestamp):
+            return None
 
         if self.check_if_mm(callsign):
             return {
@@ -248,16 +272,16 @@ class Callinfo(object):
             }
 
         # Check if a dedicated entry/exception exists for the callsign
-        try:
-            data = self._lookuplib.lookup_callsign(callsign, timestamp).copy()
-            if self.check_if_beacon(callsign):
-                data[const.BEACON] = True
-            return data
-        except KeyError:
-            pass
+        if has_records:
+            data = self._lookuplib.get_callsign(callsign, timestamp)
+            if data is not None:
+                if self.check_if_beacon(callsign):
+                    data = dict(data)
+                    data[const.BEACON] = True
+                return data
 
         # Dismantel the callsign and check if the prefix is known
-        return self._dismantle_callsign(callsign, timestamp)
+        return self._decode_callsign(callsign, timestamp)
 
     def get_all(self, callsign, timestamp=None):
         """ Lookup a callsign and return all data available from the underlying database
@@ -300,16 +324,21 @@ class Callinfo(object):
 
         callsign = callsign.upper()
 
-        if timestamp is None:
-            timestamp = datetime.now(timezone.utc)
+        # callsigns without prefix or appendix are resolved by the lookup library in one step
+        if re.match(REGULAR_CALLSIGN, callsign):
+            return self._lookuplib.resolve_callsign(callsign, timestamp, self._get_prefix_candidate(callsign, timestamp))
+
+        callsign_data = self._get_callsign_data(callsign, timestamp)
+        if callsign_data is None:
+            raise KeyError
 
-        callsign_data = self._lookup_callsign(callsign, timestamp)
+        # the lookup data might be a read-only view; get_all returns a (modifiable) copy
+        callsign_data = dict(callsign_data)
 
-        try:
-            cqz = self._lookuplib.lookup_zone_exception(callsign, timestamp)
-            callsign_data[const.CQZ] = cqz
-        except KeyError:
-            pass
+        if self._lookuplib.has_callsign_records(callsign):
+            cqz = self._lookuplib.get_zone_exception(callsign, timestamp)
+            if cqz is not None:
+                callsign_data[const.CQZ] = cqz
 
         return callsign_data
 
@@ -333,14 +362,7 @@ class Callinfo(object):
             True
 
         """
-        if timestamp is None:
-            timestamp = datetime.now(timezone.utc)
-
-        try:
-            if self.get_all(callsign, timestamp):
-                return True
-        except KeyError:
-            return False
+        return self._get_callsign_data(callsign.upper(), timestamp) is not None
 
     def get_lat_long(self, callsign, timestamp=None):
         """ Returns Latitude and Longitude for a callsign
@@ -373,9 +395,6 @@ class Callinfo(object):
             dedicated entry in the database exists. Best results will be retrieved with QRZ.com Lookup.
 
         """
-        if timestamp is None:
-            timestamp = datetime.now(timezone.utc)
-
         callsign_data = self.get_all(callsign, timestamp=timestamp)
         return {
             const.LATITUDE: callsign_data[const.LATITUDE],
@@ -396,9 +415,6 @@ class Callinfo(object):
             KeyError: no CQ Zone found for callsign
 
         """
-        if timestamp is None:
-            timestamp = datetime.now(timezone.utc)
-
         return self.get_all(callsign, timestamp)[const.CQZ]
 
     def get_ituz(self, callsign, timestamp=None):
@@ -418,9 +434,6 @@ class Callinfo(object):
             Currently, only Country-files.com lookup database contains ITU Zones
 
         """
-        if timestamp is None:
-            timestamp = datetime.now(timezone.utc)
-
         return self.get_all(callsign, timestamp)[const.ITUZ]
 
     def get_country_name(self, callsign, timestamp=None):
@@ -445,9 +458,6 @@ class Callinfo(object):
             - Clublog: "FEDERAL REPUBLIC OF GERMANY"
 
         """
-        if timestamp is None:
-            timestamp = datetime.now(timezone.utc)
-
         return self.get_all(callsign, timestamp)[const.COUNTRY]
 
     def get_adif_id(self, callsign, timestamp=None):
@@ -464,9 +474,6 @@ class Callinfo(object):
             KeyError: No Country found for callsign
 
         """
-        if timestamp is None:
-            timestamp = datetime.now(timezone.utc)
-
         return self.get_all(callsign, timestamp)[const.ADIF]
 
     def get_continent(self, callsign, timestamp=None):
@@ -493,7 +500,4 @@ class Callinfo(object):
             - OC: Oceania
             - AN: Antarctica
         """
-        if timestamp is None:
-            timestamp = datetime.now(timezone.utc)
-
         return self.get_all(callsign, timestamp)[const.CONTINENT]
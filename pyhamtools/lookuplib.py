@@ -1,13 +1,27 @@
 import os
+import io
+import sys
 import logging
 import logging.config
 import re
 import random, string
 from datetime import datetime, timezone
+from collections import OrderedDict
+from collections.abc import Mapping, Sequence
+from concurrent.futures import ThreadPoolExecutor
 import xml.etree.ElementTree as ET
 import urllib
+from urllib.request import pathname2url
 import json
 import copy
+import struct
+import bisect
+import time
+import threading
+import pickle
+import mmap
+import sqlite3
+from types import MappingProxyType
 
 import requests
 from requests.exceptions import ConnectionError, HTTPError, Timeout
@@ -17,278 +31,784 @@ from . import version
 from .consts import LookupConventions as const
 from .exceptions import APIKeyMissingError
 
-REDIS_LUA_DEL_SCRIPT = "local keys = redis.call('keys', ARGV[1]) \n for i=1,#keys,20000 do \n redis.call('del', unpack(keys, i, math.min(i+19999, #keys))) \n end \n return keys"
-
-class LookupLib(object):
+SNAPSHOT_MAGIC = b"PYHAMTOOLS-SNAPSHOT"
+SNAPSHOT_VERSION = 2
+
+SHARED_DATA_MAGIC = b"PYHAMTOOLS-SHARED"
+SHARED_DATA_VERSION = 3
+
+# derived indexes (see LookupLib._build_derived_indexes) which are stored in a shared data file after the
+# data dicts, so that attaching processes don't have to build them
+SHARED_INDEX_NAMES = (
+    "prefixes_trie",
+    "call_exceptions_intervals",
+    "prefixes_intervals",
+    "invalid_operations_intervals",
+    "zone_exceptions_intervals",
+    "record_boundaries",
+    "boundary_items",
+)
+
+SQLITE_SCHEMA_VERSION = 1
+
+# typed columns of the record tables in a SQLite lookup data file (see LookupLib.copy_data_in_sqlite).
+# Dates are stored as epoch seconds and booleans as 0 / 1; missing fields are NULL.
+SQLITE_COLUMNS = (
+    (const.COUNTRY, "TEXT"),
+    (const.PREFIX, "TEXT"),
+    (const.ADIF, "INTEGER"),
+    (const.CQZ, "INTEGER"),
+    (const.ITUZ, "INTEGER"),
+    (const.CONTINENT, "TEXT"),
+    (const.LATITUDE, "REAL"),
+    (const.LONGITUDE, "REAL"),
+    (const.START, "INTEGER"),
+    (const.END, "INTEGER"),
+    (const.WHITELIST, "INTEGER"),
+    (const.WHITELIST_START, "INTEGER"),
+    (const.WHITELIST_END, "INTEGER"),
+    (const.DELETED, "INTEGER"),
+)
+
+# typed fields of the records in a shared data file (see LookupLib._encode_shared_record) with their
+# struct format; strings ("s") are stored with their length. Dates are stored as epoch seconds.
+SHARED_RECORD_FIELDS = (
+    (const.COUNTRY, "s"),
+    (const.PREFIX, "s"),
+    (const.ADIF, "q"),
+    (const.CQZ, "q"),
+    (const.ITUZ, "q"),
+    (const.CONTINENT, "s"),
+    (const.LATITUDE, "d"),
+    (const.LONGITUDE, "d"),
+    (const.START, "q"),
+    (const.END, "q"),
+    (const.WHITELIST, "?"),
+    (const.WHITELIST_START, "q"),
+    (const.WHITELIST_END, "q"),
+    (const.DELETED, "?"),
+)
+
+# names of the lookup data dicts (and their indexes) of a data set
+DATA_NAMES = (
+    "entities",
+    "call_exceptions",
+    "prefixes",
+    "invalid_operations",
+    "zone_exceptions",
+    "prefixes_index",
+    "call_exceptions_index",
+    "invalid_operations_index",
+    "zone_exceptions_index",
+)
+
+# names of the lookup data dicts in Redis
+REDIS_DATA_NAMES = {
+    "entities" : "_entity_",
+    "call_exceptions" : "_call_ex_",
+    "call_exceptions_index" : "_call_ex_index_",
+    "prefixes" : "_prefix_",
+    "prefixes_index" : "_prefix_index_",
+    "invalid_operations" : "_inv_op_",
+    "invalid_operations_index" : "_inv_op_index_",
+    "zone_exceptions" : "_zone_ex_",
+    "zone_exceptions_index" : "_zone_ex_index_",
+}
+
+# data dicts for which the records valid right now are precomputed (see LookupLib._get_current_records)
+CURRENT_RECORDS_NAMES = (
+    "call_exceptions",
+    "prefixes",
+    "invalid_operations",
+    "zone_exceptions",
+)
+
+# sets in Redis containing all callsigns of the exceptions, invalid operations and zone exceptions
+# (keyed by the name of the index in Redis). They are cached locally to answer misses without requests.
+REDIS_FILTER_NAMES = {
+    "_call_ex_index_" : "_call_ex_filter",
+    "_inv_op_index_" : "_inv_op_filter",
+    "_zone_ex_index_" : "_zone_ex_filter",
+}
+
+# set in each version of a data set in Redis listing the indexes whose filter set has been written.
+# Redis drops empty sets, so a listed filter without set is an empty filter.
+REDIS_FILTERS_KEY = "_filters"
+
+# seconds after which the locally cached filters are reloaded from Redis
+REDIS_FILTER_TTL = 60
+
+# The key <redis_prefix>_revision is incremented with every change of a data set in Redis. Readers poll it
+# at most every REDIS_REVISION_CHECK_INTERVAL seconds and drop their cached lookups when it has changed.
+REDIS_REVISION_KEY = "_revision"
+REDIS_REVISION_CHECK_INTERVAL = 5
+
+# default number of lookups cached locally by the lookuptype "redis"
+REDIS_CACHE_SIZE = 4096
+
+# version of the layout of the lookup data in Redis, stored in the key <redis_prefix>_schema.
+# Since version 2 the records are stored as hashes with typed fields (see LookupLib._encode_redis_record),
+# since version 3 the prefixes are indexed in REDIS_PREFIX_LEX_KEY as well.
+REDIS_SCHEMA_KEY = "_schema"
+REDIS_SCHEMA_VERSION = 3
+
+# keys probed when a data set in Redis has no schema key at all, to tell data stored by pyhamtools 0.11
+# (records flat under <redis_prefix>, without schema, pointer and revision) from a missing data set.
+# The entities and prefixes of Germany and the USA are present in the data of all lookuptypes.
+REDIS_LEGACY_KEYS = (
+    "_entity_230",
+    "_entity_291",
+    "_prefix_index_DL",
+    "_prefix_index_K",
+)
+
+# sorted set with the members "<prefix>:<record id>" (all with score 0) of a version of the data set. The record
+# ids of a prefix are the lexicographic range "[<prefix>:" to "(<prefix>;" (";" follows ":"), so the prefixes
+# of a callsign are found with plain ZRANGEBYLEX commands when server-side scripting is not available.
+REDIS_PREFIX_LEX_KEY = "_prefix_lex"
+
+# field of the hash of a record without any fields (Redis doesn't store empty hashes)
+REDIS_EMPTY_RECORD_FIELD = "_"
+
+# Each copy of a data set is written into the namespace <redis_prefix>:<version>. The key <redis_prefix>_current
+# points to the version used by the readers; it is switched atomically once a copy is complete.
+REDIS_POINTER_KEY = "_current"
+# counter of the versions and set of the versions of a data set which have not been garbage-collected yet
+REDIS_VERSION_COUNTER_KEY = "_version_counter"
+REDIS_VERSIONS_KEY = "_versions"
+
+# number of keys scanned and deleted per step when old versions of a data set are garbage-collected
+REDIS_GC_BATCH_SIZE = 1000
+
+# number of keys written per pipeline when the lookup data is copied into Redis
+REDIS_LOAD_CHUNK_SIZE = 1000
+
+# number of index keys retrieved per script call by the bulk lookups in Redis
+REDIS_BULK_BATCH_SIZE = 1000
+
+# number of concurrent requests of the bulk lookups against the online databases
+BULK_REQUEST_WORKERS = 8
+
+# Returns for each index set in KEYS the record ids and records it points to (ARGV[1] is the prefix of the
+# record keys), followed by the entities of these records (ARGV[2] is the prefix of the entity keys).
+# Empty index sets short-circuit; this way a lookup takes a single round trip.
+# The scripts build the keys of the records from the ids found in the indexes, so the keys can't be declared
+# in KEYS upfront. Therefore they require a single Redis node (see LookupLib._check_redis_scripting).
+REDIS_LUA_GET_SCRIPT = """
+local result = {}
+local entities = {}
+for k = 1, #KEYS do
+    local records = {}
+    local ids = redis.call('smembers', KEYS[k])
+    for i = 1, #ids do
+        local record = redis.call('hgetall', ARGV[1] .. ids[i])
+        if #record > 0 then
+            records[#records + 1] = ids[i]
+            records[#records + 1] = record
+            for j = 1, #record, 2 do
+                if record[j] == 'adif' and entities[record[j + 1]] == nil then
+                    entities[record[j + 1]] = redis.call('hgetall', ARGV[2] .. record[j + 1])
+                end
+            end
+        end
+    end
+    result[k] = records
+end
+local entity_records = {}
+for adif, entity in pairs(entities) do
+    if #entity > 0 then
+        entity_records[#entity_records + 1] = adif
+        entity_records[#entity_records + 1] = entity
+    end
+end
+result[#KEYS + 1] = entity_records
+return result
+"""
+
+# Resolves a callsign in one step (see LookupLib.resolve_callsign). ARGV: namespace of the data set, callsign,
+# callsign (or prefix) for the longest prefix match, timestamp in epoch seconds. Returns nothing for invalid
+# operations and unknown callsigns, otherwise the exception / prefix record, its entity and the CQ zone exception.
+# Like REDIS_LUA_GET_SCRIPT, it builds its keys from the namespace and requires a single Redis node.
+REDIS_LUA_RESOLVE_SCRIPT = """
+local namespace = ARGV[1]
+local timestamp = tonumber(ARGV[4])
+
+local function field(record, name)
+    for j = 1, #record, 2 do
+        if record[j] == name then
+            return record[j + 1]
+        end
+    end
+    return nil
+end
+
+local function find(name, item)
+    local ids = redis.call('smembers', namespace .. name .. 'index_' .. item)
+    for i = 1, #ids do
+        local record = redis.call('hgetall', namespace .. name .. ids[i])
+        local start = field(record, 'start')
+        local stop = field(record, 'end')
+        if #record > 0 and (not start or tonumber(start) < timestamp) and (not stop or tonumber(stop) > timestamp) then
+            return record
+        end
+    end
+    return nil
+end
+
+if find('_inv_op_', ARGV[2]) then
+    return {}
+end
+
+local record = find('_call_ex_', ARGV[2])
+local n = #ARGV[3]
+while not record and n > 0 do
+    record = find('_prefix_', string.sub(ARGV[3], 1, n))
+    n = n - 1
+end
+if not record then
+    return {}
+end
+
+local entity = {}
+local adif = field(record, 'adif')
+if adif then
+    entity = redis.call('hgetall', namespace .. '_entity_' .. adif)
+end
+local zone_exception = find('_zone_ex_', ARGV[2])
+local cqz = false
+if zone_exception then
+    cqz = field(zone_exception, 'cqz')
+end
+return {record, entity, cqz}
+"""
+
+class _IterStream(io.RawIOBase):
+    """
+    Read-only binary stream on top of an iterator of bytes chunks
+    (e.g. the body of a streamed HTTP response). on_close is called when the stream is closed,
+    e.g. to release the connection of the response.
     """
 
-    This class is a wrapper for the following three Amateur Radio databases:
-
-    1. Clublog.org (daily updated XML File)
-    2. Clublog.org (HTTPS lookup)
-    3. Country-files.com (infrequently updated PLIST File)
-    4. QRZ.com (HTTP / XML Lookup)
-
-    It's aim is to provide a homogeneous interface to different databases.
-
-    Typically an instance of this class is injected as a dependency in the :py:class:`Callinfo` class, but it can also
-    be used directly.
-
-    Even the interface is the same for all lookup sources, the returning data can be different.
-    The documentation of the various methods provide more detail.
-
-    By default, LookupLib requires an Internet connection to download the libraries or perform the
-    lookup against the Clublog API or QRZ.com.
-
-    The entire lookup data (where database files are downloaded) can also be copied into Redis, which an extremely
-    fast in-memory Key/Value store. A LookupLib object can be instantiated to perform then all lookups in Redis,
-    instead processing and loading the data from Internet / File. This saves some time and allows several instances
-    of :py:class:`LookupLib` to query the same data concurrently.
+    def __init__(self, iterator, on_close=None):
+        self._iterator = iterator
+        self._leftover = b""
+        self._on_close = on_close
 
-    Args:
-        lookuptype (str) : "clublogxml" or "clublogapi" or "countryfile" or "redis" or "qrz"
-        apikey (str): Clublog API Key
-        username (str): QRZ.com username
-        pwd (str): QRZ.com password
-        apiv (str, optional): QRZ.com API Version
-        filename (str, optional): Filename for Clublog XML or Country-files.com cty.plist file. When a local file is
-        used, no Internet connection not API Key is necessary.
-        logger (logging.getLogger(__name__), optional): Python logger
-        redis_instance (redis.Redis(), optional): Instance of Redis
-        redis_prefix (str, optional): Prefix to identify the lookup data set in Redis
+    def close(self):
+        if not self.closed and self._on_close is not None:
+            self._on_close()
+        super(_IterStream, self).close()
 
+    def readable(self):
+        return True
 
+    def readinto(self, buffer):
+        while not self._leftover:
+            try:
+                self._leftover = next(self._iterator)
+            except StopIteration:
+                return 0
+        length = min(len(buffer), len(self._leftover))
+        buffer[:length] = self._leftover[:length]
+        self._leftover = self._leftover[length:]
+        return length
+
+
+def _date_from_epoch(value):
+    return datetime.fromtimestamp(int(value), timezone.utc)
+
+
+def _bool_from_flag(value):
+    return int(value) == 1
+
+
+# decoders of the typed fields of the records in Redis (see LookupLib._decode_redis_record);
+# all other fields are strings
+REDIS_FIELD_DECODERS = {
+    const.ADIF : int,
+    const.CQZ : int,
+    const.ITUZ : int,
+    const.LATITUDE : float,
+    const.LONGITUDE : float,
+    const.START : _date_from_epoch,
+    const.END : _date_from_epoch,
+    const.WHITELIST_START : _date_from_epoch,
+    const.WHITELIST_END : _date_from_epoch,
+    const.WHITELIST : _bool_from_flag,
+    const.DELETED : _bool_from_flag,
+}
+
+# decoders of the fields in a shared data file which are not stored with their type (see LookupLib._decode_shared_record)
+SHARED_FIELD_DECODERS = {
+    const.START : _date_from_epoch,
+    const.END : _date_from_epoch,
+    const.WHITELIST_START : _date_from_epoch,
+    const.WHITELIST_END : _date_from_epoch,
+}
+
+# decoders of the columns in SQLite which are not returned with their type (see LookupLib._decode_sqlite_record)
+SQLITE_FIELD_DECODERS = {
+    const.START : _date_from_epoch,
+    const.END : _date_from_epoch,
+    const.WHITELIST_START : _date_from_epoch,
+    const.WHITELIST_END : _date_from_epoch,
+    const.WHITELIST : _bool_from_flag,
+    const.DELETED : _bool_from_flag,
+}
+
+
+# fields of the prefix, exception, invalid operation and zone exception records
+RECORD_FIELDS = (
+    const.COUNTRY,
+    const.ADIF,
+    const.CQZ,
+    const.ITUZ,
+    const.CONTINENT,
+    const.LATITUDE,
+    const.LONGITUDE,
+    const.START,
+    const.END,
+)
+
+_RECORD_FIELDS = frozenset(RECORD_FIELDS)
+
+# fields of the prefix and exception records which are shared with (and resolved from) their entity
+ENTITY_FIELDS = (
+    const.COUNTRY,
+    const.CQZ,
+    const.CONTINENT,
+    const.LATITUDE,
+    const.LONGITUDE,
+)
+
+class _LookupRecord(Mapping):
+    """
+    Compact, immutable record of the lookup data. The values are stored in slots
+    instead of a per record dict; fields which are not set are not part of the mapping.
+    Behaves like a read-only dict.
     """
-    def __init__(self, lookuptype = "countryfile", apikey=None, apiv="1.3.3", filename=None, logger=None, username=None, pwd=None, redis_instance=None, redis_prefix=None):
 
-        self._logger = None
-        if logger:
-            self._logger = logger
-        else:
-            self._logger = logging.getLogger(__name__)
-            self._logger.addHandler(logging.NullHandler())
+    __slots__ = RECORD_FIELDS
 
-        self._apikey = apikey
-        self._apiv = apiv
-        self._download = True
-        self._lib_filename = filename
-        self._redis = redis_instance
-        self._redis_prefix = redis_prefix
-        self._username = username
-        self._pwd = pwd
+    def __init__(self, fields=()):
+        for key, value in dict(fields).items():
+            object.__setattr__(self, key, value)
 
-        if self._lib_filename:
-            self._download = False
+    def __setattr__(self, name, value):
+        raise AttributeError("lookup records are read-only")
 
-        self._callsign_exceptions_index = {}
-        self._invalid_operations_index = {}
-        self._zone_exceptions_index = {}
+    def __delattr__(self, name):
+        raise AttributeError("lookup records are read-only")
 
-        self._entities = {}
-        self._callsign_exceptions = {}
-        self._invalid_operations = {}
-        self._zone_exceptions = {}
-        self._lookuptype = lookuptype
+    def __getitem__(self, key):
+        if key in _RECORD_FIELDS:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                pass
+        raise KeyError(key)
 
-        if self._lookuptype == "clublogxml":
-            self._load_clublogXML(apikey=self._apikey, cty_file=self._lib_filename)
-        elif self._lookuptype == "countryfile":
-            self._load_countryfile(cty_file=self._lib_filename)
-        elif self._lookuptype == "clublogapi":
-            pass
-        elif self._lookuptype == "redis":
-            import redis
-        elif self._lookuptype == "qrz":
-            self._apikey = self._get_qrz_session_key(self._username, self._pwd)
-        else:
-            raise AttributeError("Lookup type missing")
+    def __contains__(self, key):
+        return key in _RECORD_FIELDS and hasattr(self, key)
 
-    def _get_qrz_session_key(self, username, pwd):
+    def __iter__(self):
+        for key in RECORD_FIELDS:
+            if hasattr(self, key):
+                yield key
 
-        qrz_api_version = "1.3.3"
-        url = "https://xmldata.qrz.com/xml/" + qrz_api_version + "/"
-        agent = "PyHamTools"+version.__version__
+    def __len__(self):
+        return sum(1 for key in self)
 
-        params = {"username" : username,
-            "password" : pwd,
-            "agent" : agent
-        }
+    def __repr__(self):
+        return repr(dict(self))
 
-        encodeurl = url + "?" + urllib.parse.urlencode(params)
-        response = requests.get(encodeurl, timeout=10)
-        doc = BeautifulSoup(response.text, "xml")
-        session_key = None
-        if doc.QRZDatabase.Session.Key:
-            session_key = doc.QRZDatabase.Session.Key.text
-        else:
-            if doc.QRZDatabase.Session.Error:
-                raise ValueError(doc.QRZDatabase.Session.Error.text)
-            else:
-                raise ValueError("Could not retrieve Session Key from QRZ.com")
+    def __reduce__(self):
+        return (_LookupRecord, (dict(self),))
 
-        return session_key
+    def copy(self):
+        return dict(self)
 
 
-    def copy_data_in_redis(self, redis_prefix, redis_instance):
-        """
-        Copy the complete lookup data into redis. Old data will be overwritten.
+class _RecordViews(dict):
+    """
+    Cache of the read-only views of the records of a data dict. A view is created
+    by the view_factory when the record is accessed for the first time.
+    """
 
-        Args:
-            redis_prefix (str): Prefix to distinguish the data in redis for the different looktypes
-            redis_instance (str): an Instance of Redis
+    def __init__(self, view_factory, cache=True):
+        dict.__init__(self)
+        self._view_factory = view_factory
+        self._cache = cache
 
-        Returns:
-            bool: returns True when the data has been copied successfully into Redis
+    def __missing__(self, record_id):
+        view = self._view_factory(record_id)
+        if self._cache:
+            self[record_id] = view
+        return view
 
-        Example:
-           Copy the entire lookup data from the Country-files.com PLIST File into Redis. This example requires a running
-           instance of Redis, as well the python Redis connector (pip install redis-py).
 
-           >>> from pyhamtools import LookupLib
-           >>> import redis
-           >>> r = redis.Redis()
-           >>> my_lookuplib = LookupLib(lookuptype="countryfile")
-           >>> print my_lookuplib.copy_data_in_redis(redis_prefix="CF", redis_instance=r)
-           True
+class _LRUCache(object):
+    """
+    Thread safe cache of a bounded size. When it is full, the least recently used entry is evicted.
+    """
 
-           Now let's create an instance of LookupLib, using Redis to query the data
+    def __init__(self, maxsize):
+        self._maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
 
-           >>> from pyhamtools import LookupLib
-           >>> import redis
-           >>> r = redis.Redis()
-           >>> my_lookuplib = LookupLib(lookuptype="redis", redis_instance=r, redis_prefix="CF")
-           >>> my_lookuplib.lookup_callsign("3D2RI")
-           {
-             u'adif': 460,
-             u'continent': u'OC',
-             u'country': u'Rotuma Island',
-             u'cqz': 32,
-             u'ituz': 56,
-             u'latitude': -12.48,
-             u'longitude': 177.08
-           }
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._entries:
+                return default
+            self._entries.move_to_end(key)
+            return self._entries[key]
 
+    def put(self, key, value):
+        if self._maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._maxsize:
+                self._entries.popitem(last=False)
 
-        Note:
-            This method is available for the following lookup type
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
 
-            - clublogxml
-            - countryfile
-        """
+    def __len__(self):
+        return len(self._entries)
 
-        if redis_instance is not None:
-            self._redis = redis_instance
 
-        if self._redis is None:
-            raise AttributeError("redis_instance is missing")
+class _SharedRecords(Mapping):
+    """
+    Read-only mapping of record ids to records stored in a shared data file (see LookupLib.save_shared_data).
+    The records are found by binary search over the sorted id table and decoded on access,
+    so the process only keeps the memory mapped pages of the file.
+    """
 
-        if redis_prefix is None:
-            raise KeyError("redis_prefix is missing")
+    def __init__(self, buffer, offset, decode):
+        self._buffer = buffer
+        self._offset = offset
+        self._count = struct.unpack_from("<I", buffer, offset)[0]
+        self._decode = decode
+
+    def _record_id_at(self, i):
+        return struct.unpack_from("<q", self._buffer, self._offset + 4 + 16 * i)[0]
+
+    def _find(self, record_id):
+        if not isinstance(record_id, int):
+            return None
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._record_id_at(mid) < record_id:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self._count and self._record_id_at(lo) == record_id:
+            return struct.unpack_from("<Q", self._buffer, self._offset + 12 + 16 * lo)[0]
+        return None
 
-        if self._lookuptype == "clublogxml" or self._lookuptype == "countryfile":
+    def __getitem__(self, record_id):
+        position = self._find(record_id)
+        if position is None:
+            raise KeyError(record_id)
+        length = struct.unpack_from("<I", self._buffer, position)[0]
+        return self._decode(self._buffer[position + 4:position + 4 + length])
 
-            self._push_dict_to_redis(self._entities, redis_prefix, "_entity_")
+    def __contains__(self, record_id):
+        return self._find(record_id) is not None
 
-            self._push_dict_index_to_redis(self._callsign_exceptions_index, redis_prefix, "_call_ex_index_")
-            self._push_dict_to_redis(self._callsign_exceptions, redis_prefix, "_call_ex_")
+    def __iter__(self):
+        for i in range(self._count):
+            yield self._record_id_at(i)
 
-            self._push_dict_index_to_redis(self._prefixes_index, redis_prefix, "_prefix_index_")
-            self._push_dict_to_redis(self._prefixes, redis_prefix, "_prefix_")
+    def __len__(self):
+        return self._count
 
-            self._push_dict_index_to_redis(self._invalid_operations_index, redis_prefix, "_inv_op_index_")
-            self._push_dict_to_redis(self._invalid_operations, redis_prefix, "_inv_op_")
 
-            self._push_dict_index_to_redis(self._zone_exceptions_index, redis_prefix, "_zone_ex_index_")
-            self._push_dict_to_redis(self._zone_exceptions, redis_prefix, "_zone_ex_")
+class _SharedIndex(Mapping):
+    """
+    Read-only mapping of callsigns / prefixes to lists of record ids stored in a shared data file
+    (see LookupLib.save_shared_data). The entries are sorted by their UTF-8 encoded key. Indexes with
+    other values (e.g. the interval indexes) provide the function which decodes a value at its position.
+    """
 
-        return True
+    def __init__(self, buffer, offset, decode=None):
+        self._buffer = buffer
+        self._offset = offset
+        self._count = struct.unpack_from("<I", buffer, offset)[0]
+        self._decode = decode
+
+    def _entry_at(self, i):
+        position = struct.unpack_from("<Q", self._buffer, self._offset + 4 + 8 * i)[0]
+        length = struct.unpack_from("<H", self._buffer, position)[0]
+        return self._buffer[position + 2:position + 2 + length], position + 2 + length
+
+    def _find(self, key):
+        if not isinstance(key, str):
+            return None
+        encoded = key.encode("utf8")
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._entry_at(mid)[0] < encoded:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self._count:
+            entry_key, position = self._entry_at(lo)
+            if entry_key == encoded:
+                return position
+        return None
+
+    def __getitem__(self, key):
+        position = self._find(key)
+        if position is None:
+            raise KeyError(key)
+        if self._decode is not None:
+            return self._decode(self._buffer, position)
+        count = struct.unpack_from("<I", self._buffer, position)[0]
+        return list(struct.unpack_from("<" + str(count) + "q", self._buffer, position + 4))
+
+    def __contains__(self, key):
+        return self._find(key) is not None
+
+    def __iter__(self):
+        for i in range(self._count):
+            yield self._entry_at(i)[0].decode("utf8")
+
+    def __len__(self):
+        return self._count
+
+
+class _SharedTrie(Mapping):
+    """
+    Read-only node of the prefix trie stored in a shared data file (see LookupLib._write_shared_trie).
+    Like the nodes of the trie built in memory, it maps the following characters to their nodes and
+    the key "" to the prefix which ends at this node. The characters are sorted by their code point.
+    """
 
-    def _push_dict_to_redis(self, push_dict, redis_prefix, name):
-        r = self._redis
-        pipe = r.pipeline()
-        pipe.eval(REDIS_LUA_DEL_SCRIPT, 0, redis_prefix + name)
+    def __init__(self, buffer, offset):
+        self._buffer = buffer
+        length = struct.unpack_from("<H", buffer, offset)[0]
+        # the length is stored + 1; 0 marks a node where no prefix ends
+        self._prefix = buffer[offset + 2:offset + 1 + length].decode("utf8") if length else None
+        position = offset + 2 + max(length - 1, 0)
+        self._count = struct.unpack_from("<I", buffer, position)[0]
+        self._entries = position + 4
+
+    def _find(self, char):
+        if not isinstance(char, str) or len(char) != 1:
+            return None
+        code_point = ord(char)
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if struct.unpack_from("<I", self._buffer, self._entries + 12 * mid)[0] < code_point:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self._count:
+            entry_code_point, offset = struct.unpack_from("<IQ", self._buffer, self._entries + 12 * lo)
+            if entry_code_point == code_point:
+                return offset
+        return None
+
+    def __getitem__(self, key):
+        if key == "" and self._prefix is not None:
+            return self._prefix
+        offset = self._find(key)
+        if offset is None:
+            raise KeyError(key)
+        return _SharedTrie(self._buffer, offset)
+
+    def __contains__(self, key):
+        if key == "":
+            return self._prefix is not None
+        return self._find(key) is not None
+
+    def __iter__(self):
+        if self._prefix is not None:
+            yield ""
+        for i in range(self._count):
+            yield chr(struct.unpack_from("<I", self._buffer, self._entries + 12 * i)[0])
+
+    def __len__(self):
+        return self._count + (self._prefix is not None)
+
+
+class _SharedArray(Sequence):
+    """
+    Read-only sequence of floats stored in a shared data file, e.g. the sorted record boundaries
+    (see LookupLib._build_record_boundaries). It can be searched with bisect.
+    """
 
-        for i in push_dict:
-            json_data = self._serialize_data(push_dict[i])
-            pipe.set(redis_prefix + name + str(i), json_data)
+    def __init__(self, buffer, offset):
+        self._buffer = buffer
+        self._count = struct.unpack_from("<I", buffer, offset)[0]
+        self._values = offset + 4
 
-        pipe.execute()
-        return True
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            start, stop, step = i.indices(self._count)
+            if step != 1:
+                return [self[j] for j in range(start, stop, step)]
+            return list(struct.unpack_from("<" + str(max(stop - start, 0)) + "d", self._buffer, self._values + 8 * start))
+        if i < 0:
+            i += self._count
+        if not 0 <= i < self._count:
+            raise IndexError("index out of range")
+        return struct.unpack_from("<d", self._buffer, self._values + 8 * i)[0]
 
-    def _push_dict_index_to_redis(self, index_dict, redis_prefix, name):
-        r = self._redis
-        pipe = r.pipeline()
-        pipe.eval(REDIS_LUA_DEL_SCRIPT, 0, redis_prefix + name)
+    def __len__(self):
+        return self._count
 
-        for i in index_dict:
-            for el in index_dict[i]:
-                pipe.sadd(redis_prefix + name + str(i), el)
 
-        pipe.execute()
-        return True
+class _SharedBoundaryItems(Mapping):
+    """
+    Read-only mapping of the record boundaries (epoch seconds) to the set of (name of the data dict, item)
+    tuples whose records start or end there, stored in a shared data file (see LookupLib._build_record_boundaries)
+    """
 
+    def __init__(self, buffer, offset):
+        self._buffer = buffer
+        self._boundaries = _SharedArray(buffer, offset)
+        self._offsets = offset + 4 + 8 * len(self._boundaries)
+
+    def _find(self, boundary):
+        i = bisect.bisect_left(self._boundaries, boundary)
+        if i < len(self._boundaries) and self._boundaries[i] == boundary:
+            return struct.unpack_from("<Q", self._buffer, self._offsets + 8 * i)[0]
+        return None
+
+    def __getitem__(self, boundary):
+        position = self._find(boundary)
+        if position is None:
+            raise KeyError(boundary)
+        count = struct.unpack_from("<I", self._buffer, position)[0]
+        position += 4
+        items = set()
+        for i in range(count):
+            name, length = struct.unpack_from("<BH", self._buffer, position)
+            items.add((CURRENT_RECORDS_NAMES[name], self._buffer[position + 3:position + 3 + length].decode("utf8")))
+            position += 3 + length
+        return items
+
+    def __contains__(self, boundary):
+        return self._find(boundary) is not None
+
+    def __iter__(self):
+        return iter(self._boundaries)
+
+    def __len__(self):
+        return len(self._boundaries)
+
+
+class _SqliteRecords(Mapping):
+    """
+    Read-only mapping of record ids to the records of a table in a SQLite lookup data file
+    (see LookupLib.copy_data_in_sqlite). The records are queried by their primary key on access.
+    """
 
+    def __init__(self, connection, table, decode):
+        self._connection = connection
+        self._table = table
+        self._decode = decode
+        self._select = "SELECT " + ", ".join('"' + column + '"' for column, _ in SQLITE_COLUMNS) + \
+            ' FROM "' + table + '" WHERE id = ?'
+
+    def __getitem__(self, record_id):
+        if isinstance(record_id, int):
+            row = self._connection.execute(self._select, (record_id,)).fetchone()
+            if row is not None:
+                return self._decode(row)
+        raise KeyError(record_id)
+
+    def __contains__(self, record_id):
+        if not isinstance(record_id, int):
+            return False
+        return self._connection.execute('SELECT 1 FROM "' + self._table + '" WHERE id = ?', (record_id,)).fetchone() is not None
 
-    def lookup_entity(self, entity=None):
-        """Returns lookup data of an ADIF Entity
+    def __iter__(self):
+        for row in self._connection.execute('SELECT id FROM "' + self._table + '" ORDER BY id'):
+            yield row[0]
 
-        Args:
-            entity (int): ADIF identifier of country
+    def __len__(self):
+        return self._connection.execute('SELECT COUNT(*) FROM "' + self._table + '"').fetchone()[0]
 
-        Returns:
-            dict: Dictionary containing the country specific data
 
-        Raises:
-            KeyError: No matching entity found
+class _SqliteIndex(Mapping):
+    """
+    Read-only mapping of callsigns / prefixes to lists of record ids stored in an index table of a SQLite
+    lookup data file (see LookupLib.copy_data_in_sqlite). The rows are keyed by (key, position).
+    """
 
-        Example:
-           The following code queries the the Clublog XML database for the ADIF entity Turkmenistan, which has
-           the id 273.
+    def __init__(self, connection, table):
+        self._connection = connection
+        self._table = table
 
-           >>> from pyhamtools import LookupLib
-           >>> my_lookuplib = LookupLib(lookuptype="clublogapi", apikey="myapikey")
-           >>> print my_lookuplib.lookup_entity(273)
-           {
-            'deleted': False,
-            'country': u'TURKMENISTAN',
-            'longitude': 58.4,
-            'cqz': 17,
-            'prefix': u'EZ',
-            'latitude': 38.0,
-            'continent': u'AS'
-           }
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            rows = self._connection.execute('SELECT id FROM "' + self._table + '" WHERE key = ? ORDER BY position', (key,)).fetchall()
+            if rows:
+                return [row[0] for row in rows]
+        raise KeyError(key)
 
+    def __contains__(self, key):
+        if not isinstance(key, str):
+            return False
+        return self._connection.execute('SELECT 1 FROM "' + self._table + '" WHERE key = ? LIMIT 1', (key,)).fetchone() is not None
 
-        Note:
-            This method is available for the following lookup type
+    def __iter__(self):
+        for row in self._connection.execute('SELECT key FROM "' + self._table + '" WHERE position = 0 ORDER BY key'):
+            yield row[0]
 
-            - clublogxml
-            - redis
-            - qrz.com
+    def __len__(self):
+        return self._connection.execute('SELECT COUNT(*) FROM "' + self._table + '" WHERE position = 0').fetchone()[0]
 
-        """
-        if self._lookuptype == "clublogxml":
-            entity = int(entity)
-            if entity in self._entities:
-                return self._strip_metadata(self._entities[entity])
-            else:
-                raise KeyError
 
-        elif self._lookuptype == "redis":
-            if self._redis_prefix is None:
-                raise KeyError ("redis_prefix is missing")
-            #entity = str(entity)
-            json_data = self._redis.get(self._redis_prefix + "_entity_" + str(entity))
-            if json_data is not None:
-                my_dict = self._deserialize_data(json_data)
-                return self._strip_metadata(my_dict)
+class _LookupBase(object):
+    """
+    Lookup logic which doesn't depend on how Redis is accessed: checking the dates of the records, and
+    preparing the requests to Redis and decoding their replies. Shared by :py:class:`LookupLib` and
+    :py:class:`AsyncLookupLib`, which only differ in the (synchronous or asynchronous) I/O.
+    """
 
-        elif self._lookuptype == "qrz":
-            result = self._lookup_qrz_dxcc(entity, self._apikey)
-            return result
+    def _init_redis_lookups(self, redis_cache_size, redis_scripting):
+        """
+        Initialize the state of the lookups in Redis
+        """
+        # namespace, revision and filters of the data set in redis; replaced as a whole (see _get_redis_state)
+        self._redis_state = None
+        self._redis_get_script = None
+        self._redis_resolve_script = None
+        self._redis_filters_loaded = None
+        self._redis_revision_checked = None
+        self._redis_cache = _LRUCache(redis_cache_size)
+        self._redis_scripting = redis_scripting
+
+    def _complete_record(self, record, entity):
+        """
+        Returns a dict with the fields of a (normalized) record, completed by the fields
+        which are shared with its entity
+        """
+        completed = dict(record)
+        for key in ENTITY_FIELDS:
+            if key not in completed and key in entity:
+                completed[key] = entity[key]
+        return completed
 
-        # no matching case
-        raise KeyError
+    def _cache_redis_entity(self, entity, fields):
+        """
+        Decode the hash of an entity retrieved from redis and put it in the local cache
+        (an empty dict if the entity does not exist)
+        """
+        my_dict = self._decode_redis_record(fields) if fields else {}
+        self._redis_cache.put(("_entity_", str(entity)), my_dict)
+        return my_dict
 
     def _strip_metadata(self, my_dict):
         """
@@ -307,365 +827,2784 @@ class LookupLib(object):
             del new_dict[const.WHITELIST_END]
         return new_dict
 
+    def _get_redis_item_dicts(self, item, data_dict):
+        """
+        Put the records of an item retrieved from redis in a data and an index dictionary
+        (see _get_dicts_from_redis)
+        """
+        if data_dict:
+            return (data_dict, {str(item): list(data_dict)})
 
-    def lookup_callsign(self, callsign=None, timestamp=None):
+        raise KeyError ("No Data found in Redis for "+ item)
+
+    def _get_cached_redis_records(self, items, name):
+        """
+        Returns the locally cached data dict of each item (None if it is not cached) and the items
+        which have to be fetched from redis (see _get_redis_records)
+        """
+        data_dicts = [self._redis_cache.get((name, item)) for item in items]
+        return data_dicts, [item for item, data_dict in zip(items, data_dicts) if data_dict is None]
+
+    def _merge_redis_records(self, items, name, data_dicts, missing_items, fetched):
+        """
+        Put the data dicts fetched from redis for missing_items into the local cache and return
+        copies of the data dicts of all items (see _get_redis_records)
+        """
+        if missing_items:
+            fetched = dict(zip(missing_items, fetched))
+            for item in fetched:
+                self._redis_cache.put((name, item), fetched[item])
+            data_dicts = [fetched[item] if data_dict is None else data_dict for item, data_dict in zip(items, data_dicts)]
+
+        # the cached records are shared; the callers get copies
+        return [dict((record_id, dict(record)) for record_id, record in data_dict.items()) for data_dict in data_dicts]
+
+    def _register_redis_scripts(self):
+        """
+        Register the lookup scripts (REDIS_LUA_GET_SCRIPT and REDIS_LUA_RESOLVE_SCRIPT) with the redis client
+        on first use. The registration itself does not talk to redis.
+        """
+        if self._redis_get_script is None:
+            self._redis_resolve_script = self._redis.register_script(REDIS_LUA_RESOLVE_SCRIPT)
+            self._redis_get_script = self._redis.register_script(REDIS_LUA_GET_SCRIPT)
+
+    def _get_get_script_params(self, namespace, items, name, index_name):
+        """
+        Keys and arguments of REDIS_LUA_GET_SCRIPT for the records of several items
+        """
+        return ([namespace + index_name + item for item in items],
+                [namespace + name, namespace + "_entity_"])
+
+    def _queue_redis_index_members(self, pipe, namespace, items, index_name):
+        """
+        Queue the commands which retrieve the record ids of several items in a pipeline. The record ids of
+        prefixes are the members of their lexicographic range in REDIS_PREFIX_LEX_KEY.
+        """
+        for item in items:
+            if index_name == "_prefix_index_":
+                pipe.zrangebylex(namespace + REDIS_PREFIX_LEX_KEY, "[" + item + ":", "(" + item + ";")
+            else:
+                pipe.smembers(namespace + index_name + item)
+
+    def _queue_redis_records(self, pipe, namespace, name, record_ids):
+        """
+        Queue the commands which retrieve the hashes of several records in a pipeline
+        """
+        for record_id in record_ids:
+            pipe.hgetall(namespace + name + str(record_id))
+
+    def _queue_redis_entities(self, pipe, namespace, adifs):
+        """
+        Queue the commands which retrieve the hashes of several entities in a pipeline
+        """
+        for adif in adifs:
+            pipe.hgetall(namespace + "_entity_" + str(adif))
+
+    def _get_redis_record_ids(self, members):
+        """
+        The (unique, sorted) record ids of all items (see _decode_redis_index_members)
+        """
+        return sorted(set(i for item_members in members for i in item_members))
+
+    def _assemble_fetched_redis_records(self, members, records, adifs, entity_fields):
+        """
+        Complete the records retrieved with plain commands with the fields of their entities and
+        return a data dict for each item (see _fetch_redis_records_with_pipelines)
+        """
+        records = dict(zip(records, self._complete_records_with_entities(list(records.values()), adifs, entity_fields)))
+        return [dict((i, records[i]) for i in item_members if i in records) for item_members in members]
+
+    def _decode_redis_index_members(self, results):
+        """
+        Decode the record ids ("<record id>" or "<prefix>:<record id>") queued by _queue_redis_index_members
+        """
+        members = []
+        for result in results:
+            record_ids = []
+            for member in result:
+                if isinstance(member, bytes):
+                    member = member.decode("utf8")
+                record_ids.append(int(member.rsplit(":", 1)[-1]))
+            members.append(sorted(record_ids))
+        return members
+
+    def _decode_redis_records(self, record_ids, results):
+        """
+        Decode the record hashes retrieved for record_ids; missing records are skipped
+        """
+        records = {}
+        for record_id, fields in zip(record_ids, results):
+            if fields:
+                records[record_id] = self._decode_redis_record(fields)
+        return records
+
+    def _decode_redis_records_reply(self, reply):
+        """
+        Decode the reply of REDIS_LUA_GET_SCRIPT into a data dict for each index key
+        """
+        entities = {}
+        for i in range(0, len(reply[-1]), 2):
+            entities[int(reply[-1][i])] = self._decode_redis_record(reply[-1][i+1])
+
+        data_dicts = []
+        for item_records in reply[:-1]:
+            data_dict = {}
+            for i in range(0, len(item_records), 2):
+                record = self._decode_redis_record(item_records[i+1])
+                if record.get(const.ADIF) in entities:
+                    record = self._complete_record(record, entities[record[const.ADIF]])
+                data_dict[int(item_records[i])] = record
+            data_dicts.append(data_dict)
+        return data_dicts
+
+    def _check_redis_filter(self, filters, index_name, item):
+        """
+        Checks the filter of an index in the loaded filters (see _redis_filter_contains)
+        """
+        if index_name not in REDIS_FILTER_NAMES:
+            return True
+
+        redis_filter = filters.get(index_name)
+        return redis_filter is None or item in redis_filter
+
+    def _check_redis_scripting(self):
+        """
+        The lookup scripts access keys which are not declared in KEYS (see REDIS_LUA_GET_SCRIPT). Raises an
+        AttributeError if they would be used with a client of Redis Cluster, where such keys may be on other nodes.
+        """
+        if self._redis_scripting and any(cls.__name__ == "RedisCluster" for cls in type(self._redis).__mro__):
+            raise AttributeError("the lookup scripts require a single redis node; use redis_scripting=False with redis cluster")
+
+    def _redis_state_expired(self, state):
+        """
+        Checks if the state of the data set in Redis has never been loaded or if its filters are
+        older than REDIS_FILTER_TTL seconds (see _get_redis_state)
+        """
+        return state is None or time.monotonic() - self._redis_filters_loaded > REDIS_FILTER_TTL
+
+    def _redis_revision_check_due(self):
+        """
+        Checks if the revision of the data set in Redis has to be polled again (see REDIS_REVISION_CHECK_INTERVAL).
+        The interval starts again when True is returned.
+        """
+        now = time.monotonic()
+        if now - self._redis_revision_checked > REDIS_REVISION_CHECK_INTERVAL:
+            self._redis_revision_checked = now
+            return True
+        return False
+
+    def _redis_revision_changed(self, state, revision):
+        """
+        Compares the revision polled from Redis with the revision of the loaded state (see _get_redis_state)
+        """
+        if revision != state[1]:
+            self._logger.debug("data set " + self._redis_prefix + " in redis has changed")
+            return True
+        return False
+
+    def _publish_redis_state(self, namespace, revision, filters):
+        """
+        Replace the namespace, revision and filters of the data set in Redis at once, so concurrent lookups
+        never see a partial state. The locally cached lookups are dropped when the revision has changed.
+        """
+        previous_state = self._redis_state
+        self._redis_state = (namespace, revision, filters)
+        self._redis_filters_loaded = self._redis_revision_checked = time.monotonic()
+        if previous_state is None or previous_state[1] != revision:
+            self._redis_cache.clear()
+        return self._redis_state
+
+    def _get_redis_namespace_keys(self):
+        """
+        Keys of the schema version, the pointer and the revision of the data set in Redis
+        """
+        return [self._redis_prefix + REDIS_SCHEMA_KEY,
+                self._redis_prefix + REDIS_POINTER_KEY,
+                self._redis_prefix + REDIS_REVISION_KEY]
+
+    def _get_redis_legacy_keys(self):
+        """
+        Keys of a data set stored in the layout of pyhamtools 0.11 (see REDIS_LEGACY_KEYS)
+        """
+        return [self._redis_prefix + key for key in REDIS_LEGACY_KEYS]
+
+    def _is_redis_namespace_missing(self, schema, version, revision):
+        return schema is None and version is None and revision is None
+
+    def _check_redis_namespace(self, schema, version, revision, legacy=0):
+        """
+        Check the schema version of the data set in Redis and return its namespace and revision
+        (see _load_redis_namespace). legacy is the number of REDIS_LEGACY_KEYS found in Redis.
+        Raises a KeyError if there is no data set in Redis at all.
+        """
+        if self._is_redis_namespace_missing(schema, version, revision) and not legacy:
+            raise KeyError("No Data found in Redis for " + self._redis_prefix)
+        if schema is None or int(schema) != REDIS_SCHEMA_VERSION or version is None:
+            raise ValueError("lookup data in redis has schema version " + str(int(schema) if schema else 1) +
+                             " (expected " + str(REDIS_SCHEMA_VERSION) + "); copy the data again into redis")
+        return (self._redis_prefix + ":" + str(int(version)), revision)
+
+    def _queue_redis_filters(self, pipe, namespace):
+        """
+        Queue the commands which retrieve the filter sets of a version of the data set in a pipeline
+        """
+        pipe.smembers(namespace + REDIS_FILTERS_KEY)
+        for index_name in REDIS_FILTER_NAMES:
+            pipe.smembers(namespace + REDIS_FILTER_NAMES[index_name])
+
+    def _decode_redis_filters(self, results):
+        """
+        Decode the results of the pipeline which retrieves the filter sets (see _load_redis_filters)
+        """
+        written = set(name.decode("utf8") if isinstance(name, bytes) else name for name in results[0])
+        filters = {}
+        for index_name, calls in zip(REDIS_FILTER_NAMES, results[1:]):
+            if index_name in written:
+                filters[index_name] = frozenset(call.decode("utf8") if isinstance(call, bytes) else call
+                                                for call in calls)
+        self._logger.debug("filters loaded from redis for " + str(len(filters)) + " indexes")
+        return filters
+
+    def _check_redis_filters(self, filters, callsign):
+        """
+        Checks the loaded filters of all filtered indexes for a callsign (see has_callsign_records)
+        """
+        return any(self._check_redis_filter(filters, index_name, callsign) for index_name in REDIS_FILTER_NAMES)
+
+    def _find_record_for_date(self, item, timestamp, data_dict, data_index_dict, interval_index=None):
+        """
+        Returns the id of the first record of item (found through the index) which is valid at the
+        given timestamp. If an interval index (see _build_interval_index) is provided and contains
+        the item, the record is found by bisection. Otherwise all records of the item are checked.
+        None is returned if no valid record exists. Without timestamp, the current time is used.
+        """
+
+        if timestamp is None:
+            timestamp = datetime.now(timezone.utc)
+
+        if interval_index is not None and item in interval_index:
+            starts, ends, record_ids = interval_index[item]
+            epoch = timestamp.timestamp()
+            # last record with startdate < timestamp
+            i = bisect.bisect_left(starts, epoch) - 1
+            if i >= 0 and epoch < ends[i]:
+                return record_ids[i]
+            return None
+
+        if item in data_index_dict:
+            for record_id in data_index_dict[item]:
+                record = data_dict[record_id]
+
+                # startdate < timestamp
+                if const.START in record and not record[const.START] < timestamp:
+                    continue
+
+                # enddate > timestamp
+                if const.END in record and not record[const.END] > timestamp:
+                    continue
+
+                return record_id
+
+        return None
+
+    def _check_data_for_date(self, item, timestamp, data_dict, data_index_dict, interval_index=None):
+        """
+        Checks if the item is found in the index. An entry in the index points to the data
+        in the data_dict. This is mainly used retrieve callsigns and prefixes.
+        In case data is found for item, a dict containing the data is returned. Otherwise a KeyError is raised.
+        """
+
+        record_id = self._find_record_for_date(item, timestamp, data_dict, data_index_dict, interval_index)
+        if record_id is None:
+            raise KeyError
+
+        record = data_dict[record_id]
+        if const.START in record or const.END in record:
+            item_data = copy.deepcopy(record)
+            item_data.pop(const.START, None)
+            item_data.pop(const.END, None)
+            return item_data
+
+        return record
+
+    def _check_inv_operation_for_date(self, item, timestamp, data_dict, data_index_dict, interval_index=None):
+        """
+        Checks if the callsign is marked as an invalid operation for a given timestamp.
+        In case the operation is invalid, True is returned. Otherwise a KeyError is raised.
+        """
+
+        if self._find_record_for_date(item, timestamp, data_dict, data_index_dict, interval_index) is None:
+            raise KeyError
+
+        return True
+
+    def _check_longest_prefix_for_date(self, prefixes, timestamp, data_dicts):
+        """
+        Returns the data of the first (longest) prefix which is valid at the timestamp from the data dicts
+        of all beginnings of a callsign retrieved from redis (see lookup_longest_prefix)
+        """
+        for prefix, data_dict in zip(prefixes, data_dicts):
+            if data_dict:
+                try:
+                    return self._check_data_for_date(prefix, timestamp, data_dict, {prefix: list(data_dict)})
+                except KeyError:
+                    pass
+
+        raise KeyError
+
+    def _check_zone_exception_for_date(self, item, timestamp, data_dict, data_index_dict, interval_index=None):
+        """
+        Checks the index and data if a cq-zone exception exists for the callsign
+        When a zone exception is found, the zone is returned. If no exception is found
+        a KeyError is raised
+
+        """
+
+        record_id = self._find_record_for_date(item, timestamp, data_dict, data_index_dict, interval_index)
+        if record_id is None:
+            raise KeyError
+
+        return data_dict[record_id][const.CQZ]
+
+    def _get_resolve_script_args(self, namespace, callsign, prefix, timestamp):
+        """
+        Arguments of REDIS_LUA_RESOLVE_SCRIPT; without timestamp the current time is used
+        """
+        if timestamp is None:
+            epoch = time.time()
+        else:
+            epoch = timestamp.timestamp()
+        return [namespace, callsign, prefix, repr(epoch)]
+
+    def _decode_resolve_script_reply(self, reply):
+        """
+        Decode the reply of REDIS_LUA_RESOLVE_SCRIPT into the data of the callsign
+        """
+        if not reply:
+            raise KeyError
+
+        data = self._decode_redis_record(reply[0])
+        if reply[1]:
+            data = self._complete_record(data, self._decode_redis_record(reply[1]))
+        data.pop(const.START, None)
+        data.pop(const.END, None)
+        if reply[2] is not None:
+            data[const.CQZ] = int(reply[2])
+        return data
+
+    def _get_bulk_prefix_candidates(self, callsigns):
+        """
+        All (unique) beginnings of several callsigns (see lookup_longest_prefixes)
+        """
+        return list(dict.fromkeys(callsign[:i] for callsign in callsigns for i in range(len(callsign), 0, -1)))
+
+    def _resolve_bulk_longest_prefixes(self, callsigns, timestamps, data_dicts):
+        """
+        Resolve the longest prefix of each callsign which is valid at its timestamp from the data dicts
+        of all beginnings of the callsigns retrieved from redis (see lookup_longest_prefixes)
+        """
+        results = []
+        for callsign, timestamp in zip(callsigns, timestamps):
+            result = None
+            for i in range(len(callsign), 0, -1):
+                prefix = callsign[:i]
+                data_dict = data_dicts[prefix]
+                if data_dict:
+                    record_id = self._find_record_for_date(prefix, timestamp, data_dict, {prefix: list(data_dict)})
+                    if record_id is not None:
+                        result = dict(data_dict[record_id])
+                        result.pop(const.START, None)
+                        result.pop(const.END, None)
+                        break
+            results.append(result)
+        return results
+
+    def _prepare_bulk_lookup(self, items, timestamp):
+        """
+        Normalize the items of a bulk lookup and return them together with a list containing
+        the timestamp of each item
+        """
+        items = [item.strip().upper() for item in items]
+
+        if timestamp is None or isinstance(timestamp, datetime):
+            return items, [timestamp] * len(items)
+
+        timestamps = list(timestamp)
+        if len(timestamps) != len(items):
+            raise ValueError("the number of timestamps does not match the number of items")
+        return items, timestamps
+
+    def _check_bulk_data_for_date(self, items, timestamps, bulk_dicts):
+        """
+        Bulk version of _check_data_for_date. Returns a list with the data of each item, or None if no
+        data is found for the item. The data and index dicts of each item are provided in bulk_dicts
+        (see _get_bulk_dicts_from_redis).
+        """
+        results = []
+        for i, item in enumerate(items):
+            if bulk_dicts[i] is None:
+                results.append(None)
+                continue
+            data_dict, data_index_dict = bulk_dicts[i]
+
+            record_id = self._find_record_for_date(item, timestamps[i], data_dict, data_index_dict)
+            if record_id is None:
+                results.append(None)
+            else:
+                record = dict(data_dict[record_id])
+                record.pop(const.START, None)
+                record.pop(const.END, None)
+                results.append(record)
+        return results
+
+    def _get_filtered_bulk_items(self, filters, index_name, items):
+        """
+        The unique items of a bulk lookup which may be in the index according to the loaded filters
+        """
+        return [item for item in dict.fromkeys(items) if self._check_redis_filter(filters, index_name, item)]
+
+    def _assemble_bulk_dicts(self, items, unique_items, members, records):
+        """
+        Build the (data_dict, data_index_dict) tuples of a bulk lookup in redis (see _get_bulk_dicts_from_redis)
+        from the record ids of each unique item and the retrieved records
+        """
+        item_dicts = dict.fromkeys(items)
+        for item, item_members in zip(unique_items, members):
+            item_members = [i for i in item_members if i in records]
+            if item_members:
+                item_dicts[item] = (dict((i, records[i]) for i in item_members), {item: item_members})
+            else:
+                item_dicts[item] = None
+
+        return [item_dicts[item] for item in items]
+
+    def _get_incomplete_adifs(self, records):
+        """
+        ADIF identifiers of the entities which are missing in records (see _complete_redis_records)
+        """
+        return sorted(set(record[const.ADIF] for record in records
+                          if record is not None and const.ADIF in record and any(key not in record for key in ENTITY_FIELDS)))
+
+    def _complete_records_with_entities(self, records, adifs, entity_fields):
+        """
+        Complete records with the fields of the entities retrieved from redis for adifs
+        """
+        entities = {}
+        for adif, fields in zip(adifs, entity_fields):
+            if fields:
+                entities[adif] = self._decode_redis_record(fields)
+
+        completed = []
+        for record in records:
+            if record is not None and record.get(const.ADIF) in entities:
+                record = self._complete_record(record, entities[record[const.ADIF]])
+            completed.append(record)
+        return completed
+
+    def _decode_redis_record(self, fields):
+        """
+        Decode the fields of a record hash retrieved from Redis (a dict, or a flat list of
+        field names and values as returned by scripts) into a dictionary
+        """
+        if not isinstance(fields, dict):
+            fields = dict(zip(fields[::2], fields[1::2]))
+
+        record = {}
+        for key, value in fields.items():
+            if isinstance(key, bytes):
+                key = key.decode("utf8")
+            if key == REDIS_EMPTY_RECORD_FIELD:
+                continue
+            decoder = REDIS_FIELD_DECODERS.get(key)
+            if decoder is not None:
+                record[key] = decoder(value)
+            elif isinstance(value, bytes):
+                record[key] = value.decode("utf8")
+            else:
+                record[key] = value
+        return record
+
+
+class LookupLib(_LookupBase):
+    """
+
+    This class is a wrapper for the following three Amateur Radio databases:
+
+    1. Clublog.org (daily updated XML File)
+    2. Clublog.org (HTTPS lookup)
+    3. Country-files.com (infrequently updated PLIST File)
+    4. QRZ.com (HTTP / XML Lookup)
+
+    It's aim is to provide a homogeneous interface to different databases.
+
+    Typically an instance of this class is injected as a dependency in the :py:class:`Callinfo` class, but it can also
+    be used directly.
+
+    Even the interface is the same for all lookup sources, the returning data can be different.
+    The documentation of the various methods provide more detail.
+
+    By default, LookupLib requires an Internet connection to download the libraries or perform the
+    lookup against the Clublog API or QRZ.com.
+
+    The entire lookup data (where database files are downloaded) can also be copied into Redis, which an extremely
+    fast in-memory Key/Value store. A LookupLib object can be instantiated to perform then all lookups in Redis,
+    instead processing and loading the data from Internet / File. This saves some time and allows several instances
+    of :py:class:`LookupLib` to query the same data concurrently.
+
+    Alternatively the parsed lookup data can be cached in a snapshot file (see :py:meth:`save_snapshot`).
+    Loading a snapshot is much faster than downloading and parsing the Clublog XML or Country-files.com PLIST File.
+
+    Processes on the same machine can share a single copy of the lookup data through a shared data file
+    (see :py:meth:`save_shared_data`). With the lookuptype "shared" the file is memory mapped read-only
+    and the records are decoded on access, so the data is not copied into each process.
+    Similarly, the lookup data can be stored in a SQLite database with indexed, typed tables
+    (see :py:meth:`copy_data_in_sqlite`), which is queried read-only with the lookuptype "sqlite".
+
+    Args:
+        lookuptype (str) : "clublogxml" or "clublogapi" or "countryfile" or "redis" or "qrz" or "snapshot" or "shared" or "sqlite"
+        apikey (str): Clublog API Key
+        username (str): QRZ.com username
+        pwd (str): QRZ.com password
+        apiv (str, optional): QRZ.com API Version
+        filename (str, optional): Filename for Clublog XML or Country-files.com cty.plist file. When a local file is
+        used, no Internet connection not API Key is necessary. Mandatory for the lookuptypes "snapshot", "shared" and "sqlite".
+        logger (logging.getLogger(__name__), optional): Python logger
+        redis_instance (redis.Redis(), optional): Instance of Redis
+        redis_prefix (str, optional): Prefix to identify the lookup data set in Redis
+        refresh_interval (int, optional): Interval in seconds in which the lookup data is reloaded in a
+        background thread (see :py:meth:`refresh`). By default the data is only loaded once.
+        redis_cache_size (int, optional): Number of lookups which are cached locally for the lookuptype "redis".
+        The cache is dropped as soon as the data set in Redis changes. 0 disables the cache.
+        redis_scripting (bool, optional): Use server-side (Lua) scripts for the lookups in Redis. When False,
+        only plain commands are issued (in pipelines), e.g. for Redis proxies which don't support scripting.
+        The scripts require a single Redis node; for Redis Cluster, redis_scripting must be False.
+
+
+    """
+    def __init__(self, lookuptype = "countryfile", apikey=None, apiv="1.3.3", filename=None, logger=None, username=None, pwd=None, redis_instance=None, redis_prefix=None, refresh_interval=None, redis_cache_size=REDIS_CACHE_SIZE, redis_scripting=True):
+
+        self._logger = None
+        if logger:
+            self._logger = logger
+        else:
+            self._logger = logging.getLogger(__name__)
+            self._logger.addHandler(logging.NullHandler())
+
+        self._apikey = apikey
+        self._apiv = apiv
+        self._download = True
+        self._lib_filename = filename
+        self._redis = redis_instance
+        self._redis_prefix = redis_prefix
+        self._username = username
+        self._pwd = pwd
+
+        if self._lib_filename:
+            self._download = False
+
+        # all lookup data (entities, exceptions, prefixes... and their indexes) is held in one dict
+        # which is only ever replaced as a whole. Lookups grab a reference to it once, so
+        # that a (background) reload can never expose a partially updated data set.
+        self._data = self._build_derived_indexes(self._create_empty_data())
+        self._lookuptype = lookuptype
+
+        self._refresh_interval = refresh_interval
+        self._refresh_stop = None
+        self._refresh_thread = None
+
+        self._init_redis_lookups(redis_cache_size, redis_scripting)
+
+        if self._lookuptype == "clublogxml" or self._lookuptype == "countryfile":
+            self._data = self._build_derived_indexes(self._load_data())
+        elif self._lookuptype == "snapshot":
+            if self._lib_filename is None:
+                raise AttributeError("filename of the snapshot is missing")
+            self._data = self._build_derived_indexes(self._load_data())
+        elif self._lookuptype == "shared":
+            if self._lib_filename is None:
+                raise AttributeError("filename of the shared data is missing")
+            self._data = self._attach_shared_data(self._lib_filename)
+        elif self._lookuptype == "sqlite":
+            if self._lib_filename is None:
+                raise AttributeError("filename of the sqlite data is missing")
+            self._data = self._attach_sqlite_data(self._lib_filename)
+        elif self._lookuptype == "clublogapi":
+            pass
+        elif self._lookuptype == "redis":
+            import redis
+            self._check_redis_scripting()
+        elif self._lookuptype == "qrz":
+            self._apikey = self._get_qrz_session_key(self._username, self._pwd)
+        else:
+            raise AttributeError("Lookup type missing")
+
+        if self._refresh_interval:
+            self.start_auto_refresh(self._refresh_interval)
+
+    def _get_qrz_session_key(self, username, pwd):
+
+        qrz_api_version = "1.3.3"
+        url = "https://xmldata.qrz.com/xml/" + qrz_api_version + "/"
+        agent = "PyHamTools"+version.__version__
+
+        params = {"username" : username,
+            "password" : pwd,
+            "agent" : agent
+        }
+
+        encodeurl = url + "?" + urllib.parse.urlencode(params)
+        response = requests.get(encodeurl, timeout=10)
+        doc = BeautifulSoup(response.text, "xml")
+        session_key = None
+        if doc.QRZDatabase.Session.Key:
+            session_key = doc.QRZDatabase.Session.Key.text
+        else:
+            if doc.QRZDatabase.Session.Error:
+                raise ValueError(doc.QRZDatabase.Session.Error.text)
+            else:
+                raise ValueError("Could not retrieve Session Key from QRZ.com")
+
+        return session_key
+
+
+    def _create_empty_data(self):
+        """
+        Returns empty lookup data (all data and index dicts); the derived indexes are added
+        by _build_derived_indexes
+        """
+        return dict((name, {}) for name in DATA_NAMES)
+
+    def _build_derived_indexes(self, data):
+        """
+        Add the indexes which are derived from the lookup data (and therefore neither
+        part of snapshots nor of Redis) to a data set
+        """
+        data["prefixes_trie"] = self._build_prefix_trie(data["prefixes_index"])
+        data["call_exceptions_intervals"] = self._build_interval_index(data["call_exceptions"], data["call_exceptions_index"])
+        data["prefixes_intervals"] = self._build_interval_index(data["prefixes"], data["prefixes_index"])
+        data["invalid_operations_intervals"] = self._build_interval_index(data["invalid_operations"], data["invalid_operations_index"])
+        data["zone_exceptions_intervals"] = self._build_interval_index(data["zone_exceptions"], data["zone_exceptions_index"])
+        data["entities_views"] = self._build_record_views(data["entities"])
+        data["call_exceptions_views"] = self._build_record_views(data["call_exceptions"], data["entities"])
+        data["prefixes_views"] = self._build_record_views(data["prefixes"], data["entities"])
+        data["record_boundaries"], data["boundary_items"] = self._build_record_boundaries(data)
+        data["current_records"] = None
+        return data
+
+    def _build_record_boundaries(self, data):
+        """
+        Returns the sorted start and end dates (as epoch seconds) of all records with a validity period,
+        and for each of these boundaries the items (as tuples of the name of the data dict and the item)
+        whose records start or end there. Between two boundaries, the same records are valid.
+        """
+        boundary_items = {}
+        for name in CURRENT_RECORDS_NAMES:
+            data_dict = data[name]
+            for item, record_ids in data[name + "_index"].items():
+                for record_id in record_ids:
+                    record = data_dict[record_id]
+                    for field in (const.START, const.END):
+                        if field in record:
+                            boundary_items.setdefault(record[field].timestamp(), set()).add((name, item))
+        return sorted(boundary_items), boundary_items
+
+    def _get_current_records(self, data):
+        """
+        Returns for the data dicts in CURRENT_RECORDS_NAMES a dict of all items with the id of their record
+        valid right now. The dicts are computed once and reused until the next record boundary is reached
+        (see _build_record_boundaries); lookups without timestamp need no date checks. When boundaries
+        have been passed, only the items whose records start or end at these boundaries are computed again.
+        """
+        now = time.time()
+
+        current_records = data["current_records"]
+        if current_records is not None and current_records[0] < now < current_records[1]:
+            return current_records[2]
+
+        boundaries = data["record_boundaries"]
+        if current_records is None:
+            items = dict((name, data[name + "_index"]) for name in CURRENT_RECORDS_NAMES)
+            records = dict((name, {}) for name in CURRENT_RECORDS_NAMES)
+        else:
+            # the boundaries between the previous period and now (in either direction, if the clock was set back)
+            valid_from, valid_until, records = current_records
+            if now >= valid_until:
+                passed = boundaries[bisect.bisect_left(boundaries, valid_until):bisect.bisect_right(boundaries, now)]
+            else:
+                passed = boundaries[bisect.bisect_left(boundaries, now):bisect.bisect_right(boundaries, valid_from)]
+            items = dict((name, set()) for name in CURRENT_RECORDS_NAMES)
+            for boundary in passed:
+                for name, item in data["boundary_items"][boundary]:
+                    items[name].add(item)
+            # the dicts of the previous period may still be in use; changed dicts are copied
+            records = dict((name, dict(records[name]) if items[name] else records[name]) for name in CURRENT_RECORDS_NAMES)
+
+        timestamp = datetime.fromtimestamp(now, timezone.utc)
+        for name in CURRENT_RECORDS_NAMES:
+            data_dict = data[name]
+            data_index_dict = data[name + "_index"]
+            interval_index = data[name + "_intervals"]
+            for item in items[name]:
+                record_id = self._find_record_for_date(item, timestamp, data_dict, data_index_dict, interval_index)
+                if record_id is not None:
+                    records[name][item] = record_id
+                else:
+                    records[name].pop(item, None)
+
+        i = bisect.bisect_right(boundaries, now)
+        valid_from = boundaries[i-1] if i > 0 else float("-inf")
+        valid_until = boundaries[i] if i < len(boundaries) else float("inf")
+        # exactly on a boundary the records change right after now; don't reuse them
+        if valid_from < now:
+            data["current_records"] = (valid_from, valid_until, records)
+            self._logger.debug("current records computed; valid until " + str(valid_until))
+        return records
+
+    def _build_record_views(self, data_dict, entities=None, cache=True):
+        """
+        Create the read-only views of the records in a data dict with the metadata (start/end dates,
+        whitelist) already removed. The lookup methods return these views instead of copies.
+        The views are created on first access; when the entities are provided, the fields
+        shared with the entity are completed (see _normalize_records).
+        """
+        return _RecordViews(lambda record_id: self._create_record_view(data_dict[record_id], entities), cache)
+
+    def _create_record_view(self, record, entities=None):
+        """
+        Create the read-only view of a single record (see _build_record_views)
+        """
+        metadata = (const.START, const.END, const.WHITELIST, const.WHITELIST_START, const.WHITELIST_END)
+        fields = dict((key, value) for key, value in record.items() if key not in metadata)
+        if entities is not None and fields.get(const.ADIF) in entities:
+            fields = self._complete_record(fields, entities[fields[const.ADIF]])
+        if _RECORD_FIELDS.issuperset(fields):
+            return _LookupRecord(fields)
+        return MappingProxyType(fields)
+
+    def _normalize_records(self, records, entities):
+        """
+        Remove the fields from prefix / exception records which are identical with the
+        fields of their entity (referenced by the ADIF identifier). The removed fields are
+        completed on lookup (see _complete_record).
+        """
+        for record_id, record in records.items():
+            entity = entities.get(record.get(const.ADIF))
+            if entity is None or any(key not in record for key in ENTITY_FIELDS):
+                continue
+            records[record_id] = _LookupRecord((key, value) for key, value in record.items()
+                                               if not (key in ENTITY_FIELDS and entity.get(key) == value))
+
+    def _build_interval_index(self, data_dict, data_index_dict):
+        """
+        Compile the records of every item in an index into validity intervals sorted by their startdate.
+        Each entry is a tuple of three lists (startdates, enddates, record ids); the dates are stored as
+        epoch seconds, missing dates as -inf / +inf. Items with overlapping intervals are left out, since
+        for them the order of the records in the index matters. They are checked record by record.
+        """
+        interval_index = {}
+        for item, record_ids in data_index_dict.items():
+            intervals = []
+            for record_id in record_ids:
+                record = data_dict[record_id]
+                start = float("-inf")
+                end = float("inf")
+                if const.START in record:
+                    start = int(record[const.START].timestamp())
+                if const.END in record:
+                    end = int(record[const.END].timestamp())
+                intervals.append((start, end, record_id))
+            intervals.sort(key=lambda interval: interval[0])
+
+            if any(intervals[i][1] > intervals[i+1][0] for i in range(len(intervals)-1)):
+                continue
+
+            interval_index[item] = ([interval[0] for interval in intervals],
+                                    [interval[1] for interval in intervals],
+                                    [interval[2] for interval in intervals])
+        return interval_index
+
+    def _build_prefix_trie(self, prefixes_index):
+        """
+        Build a character trie of all prefixes. Every node is a dict of the following characters;
+        the key "" marks the end of a prefix and holds the prefix itself.
+        """
+        trie = {}
+        for prefix in prefixes_index:
+            node = trie
+            for char in prefix:
+                node = node.setdefault(char, {})
+            node[""] = prefix
+        return trie
+
+    def _load_data(self):
+        """
+        Load (download or read from file) the lookup data and return it (without the derived indexes,
+        see _build_derived_indexes)
+        """
+        if self._lookuptype == "clublogxml":
+            data = self._load_clublogXML(apikey=self._apikey, cty_file=self._lib_filename)
+        elif self._lookuptype == "countryfile":
+            data = self._load_countryfile(cty_file=self._lib_filename)
+        elif self._lookuptype == "snapshot":
+            data = self._load_snapshot(self._lib_filename)
+        else:
+            raise AttributeError("refresh is not available for lookuptype " + str(self._lookuptype))
+        return data
+
+    def refresh(self, redis_prefix=None, redis_instance=None):
+        """
+        Reload the lookup data (download or read the file again) and swap it atomically with the
+        data currently in use. Lookups executed concurrently are never blocked and either see the
+        complete old or the complete new data set.
+
+        Only the records which differ between the old and the new data set are applied. Unchanged
+        records are kept. If a redis_prefix is provided, the changed records are written into Redis as
+        well, instead of copying the complete data set again (see :py:meth:`copy_data_in_redis`).
+
+        Args:
+            redis_prefix (str, optional): Prefix of the data set in Redis which shall be updated
+            redis_instance (redis.Redis(), optional): Instance of Redis
+
+        Returns:
+            bool: returns True when the lookup data has been reloaded successfully
+
+        Raises:
+            AttributeError: Lookup type does not support reloading
+
+        Example:
+           Copy the Clublog data into Redis once and update it later with the changes only
+
+           >>> from pyhamtools import LookupLib
+           >>> import redis
+           >>> r = redis.Redis()
+           >>> my_lookuplib = LookupLib(lookuptype="clublogxml", apikey="myapikey")
+           >>> my_lookuplib.copy_data_in_redis(redis_prefix="CLX", redis_instance=r)
+           True
+           >>> my_lookuplib.refresh(redis_prefix="CLX", redis_instance=r)
+           True
+
+        Note:
+            This method is available for the following lookup type
+
+            - clublogxml
+            - countryfile
+            - snapshot
+
+            The update in Redis relies on the Redis data set having been copied from
+            the data currently loaded in this instance.
+        """
+
+        if redis_instance is not None:
+            self._redis = redis_instance
+
+        if redis_prefix is not None and self._redis is None:
+            raise AttributeError("redis_instance is missing")
+
+        old_data = self._data
+        delta = self._compute_data_delta(old_data, self._load_data())
+
+        if redis_prefix is not None:
+            self._push_delta_to_redis(delta, redis_prefix)
+
+        self._data = self._build_derived_indexes(self._apply_data_delta(old_data, delta))
+
+        changes = sum(len(delta[name]["changed"]) + len(delta[name]["removed"]) for name in delta)
+        self._logger.debug("lookup data successfully refreshed; " + str(changes) + " records / index entries changed")
+        return True
+
+    def _compute_data_delta(self, old_data, new_data):
+        """
+        Compare two lookup data sets record by record (using the Clublog record ids as keys) and
+        return for every data and index dict the changed (or added) and removed entries.
+        """
+        delta = {}
+        for name in DATA_NAMES:
+            old_dict = old_data.get(name, {})
+            new_dict = new_data[name]
+            changed = {}
+            for key in new_dict:
+                if key not in old_dict or old_dict[key] != new_dict[key]:
+                    changed[key] = new_dict[key]
+            removed = [key for key in old_dict if key not in new_dict]
+            delta[name] = {"changed": changed, "removed": removed}
+        return delta
+
+    def _apply_data_delta(self, data, delta):
+        """
+        Apply a delta (see _compute_data_delta) on a lookup data set. The data set itself is not
+        modified; a new data set is returned which shares all unchanged records with the old one.
+        """
+        new_data = {}
+        for name in DATA_NAMES:
+            if name not in delta or (not delta[name]["changed"] and not delta[name]["removed"]):
+                new_data[name] = data[name]
+                continue
+            new_dict = dict(data[name])
+            for key in delta[name]["removed"]:
+                del new_dict[key]
+            new_dict.update(delta[name]["changed"])
+            new_data[name] = new_dict
+        return new_data
+
+    def _push_delta_to_redis(self, delta, redis_prefix):
+        """
+        Write only the changed records and indexes of a delta (see _compute_data_delta) into the current
+        version of the data set in Redis. All changes are applied in one transaction.
+        """
+        version = self._redis.get(redis_prefix + REDIS_POINTER_KEY)
+        if version is None:
+            raise KeyError("No Data found in Redis for " + redis_prefix)
+        namespace = redis_prefix + ":" + str(int(version))
+
+        pipe = self._redis.pipeline(transaction=True)
+
+        for name in delta:
+            redis_name = REDIS_DATA_NAMES[name]
+            is_index = name.endswith("_index")
+            filter_name = REDIS_FILTER_NAMES.get(redis_name)
+            is_lex_indexed = name == "prefixes_index"
+
+            for key in delta[name]["removed"]:
+                pipe.delete(namespace + redis_name + str(key))
+                if filter_name is not None:
+                    pipe.srem(namespace + filter_name, key)
+                if is_lex_indexed:
+                    pipe.zremrangebylex(namespace + REDIS_PREFIX_LEX_KEY, "[" + key + ":", "(" + key + ";")
+
+            for key, value in delta[name]["changed"].items():
+                if is_index:
+                    pipe.delete(namespace + redis_name + str(key))
+                    pipe.sadd(namespace + redis_name + str(key), *value)
+                    if filter_name is not None:
+                        pipe.sadd(namespace + filter_name, key)
+                    if is_lex_indexed:
+                        pipe.zremrangebylex(namespace + REDIS_PREFIX_LEX_KEY, "[" + key + ":", "(" + key + ";")
+                        pipe.zadd(namespace + REDIS_PREFIX_LEX_KEY, dict((key + ":" + str(el), 0) for el in value))
+                else:
+                    pipe.delete(namespace + redis_name + str(key))
+                    pipe.hset(namespace + redis_name + str(key), mapping=self._encode_redis_record(value))
+
+        pipe.incr(redis_prefix + REDIS_REVISION_KEY)
+        pipe.execute()
+        return True
+
+    def start_auto_refresh(self, interval, redis_prefix=None, redis_instance=None):
+        """
+        Start a background thread which calls :py:meth:`refresh` every interval seconds.
+        Errors during a reload are logged and the previous lookup data stays in use.
+
+        Args:
+            interval (int): Refresh interval in seconds
+            redis_prefix (str, optional): Prefix of the data set in Redis which shall be updated as well
+            redis_instance (redis.Redis(), optional): Instance of Redis
+
+        Example:
+           Reload the Clublog XML data once a day
+
+           >>> from pyhamtools import LookupLib
+           >>> my_lookuplib = LookupLib(lookuptype="clublogxml", apikey="myapikey", refresh_interval=86400)
+
+        """
+        if not (self._lookuptype == "clublogxml" or self._lookuptype == "countryfile" or self._lookuptype == "snapshot"):
+            raise AttributeError("refresh is not available for lookuptype " + str(self._lookuptype))
+
+        if interval <= 0:
+            raise ValueError("refresh interval must be greater than 0")
+
+        self.stop_auto_refresh()
+        self._refresh_interval = interval
+        self._refresh_stop = threading.Event()
+        self._refresh_thread = threading.Thread(target=self._auto_refresh_loop,
+                                                args=(interval, self._refresh_stop, redis_prefix, redis_instance),
+                                                name="LookupLib-refresh")
+        self._refresh_thread.daemon = True
+        self._refresh_thread.start()
+
+    def stop_auto_refresh(self):
+        """
+        Stop the background thread started by :py:meth:`start_auto_refresh`
+        """
+        if self._refresh_stop is not None:
+            self._refresh_stop.set()
+            self._refresh_stop = None
+            self._refresh_thread = None
+
+    def _auto_refresh_loop(self, interval, stop_event, redis_prefix=None, redis_instance=None):
+        while not stop_event.wait(interval):
+            try:
+                self.refresh(redis_prefix=redis_prefix, redis_instance=redis_instance)
+            except Exception as e:
+                self._logger.error("refresh of the lookup data failed, continuing with the previous data")
+                self._logger.error("Error Message: " + str(e))
+
+    def copy_data_in_redis(self, redis_prefix, redis_instance, chunk_size=REDIS_LOAD_CHUNK_SIZE, connections=1, progress=None):
+        """
+        Copy the complete lookup data into redis. Old data will be replaced.
+
+        The data is written into a new version of the data set; readers keep using the previous version
+        until the copy is complete. Then the readers are switched atomically to the new version and
+        older versions are deleted incrementally (with SCAN), so Redis is not blocked.
+
+        Each table is written in chunks of chunk_size keys (one pipeline per chunk), so neither the
+        complete data set is buffered in the client, nor sent to Redis in one burst. The throughput
+        of each table is logged (debug level).
+
+        Args:
+            redis_prefix (str): Prefix to distinguish the data in redis for the different looktypes
+            redis_instance (str): an Instance of Redis
+            chunk_size (int, optional): Number of keys written per pipeline
+            connections (int, optional): Number of tables written concurrently, each over its own connection
+            progress (callable, optional): Called after each chunk with the name of the table, the number of
+            keys written, the number of keys of the table and the elapsed seconds. With several connections
+            it is called from worker threads.
+
+        Returns:
+            bool: returns True when the data has been copied successfully into Redis
+
+        Example:
+           Copy the entire lookup data from the Country-files.com PLIST File into Redis. This example requires a running
+           instance of Redis, as well the python Redis connector (pip install redis-py).
+
+           >>> from pyhamtools import LookupLib
+           >>> import redis
+           >>> r = redis.Redis()
+           >>> my_lookuplib = LookupLib(lookuptype="countryfile")
+           >>> print my_lookuplib.copy_data_in_redis(redis_prefix="CF", redis_instance=r)
+           True
+
+           Now let's create an instance of LookupLib, using Redis to query the data
+
+           >>> from pyhamtools import LookupLib
+           >>> import redis
+           >>> r = redis.Redis()
+           >>> my_lookuplib = LookupLib(lookuptype="redis", redis_instance=r, redis_prefix="CF")
+           >>> my_lookuplib.lookup_callsign("3D2RI")
+           {
+             u'adif': 460,
+             u'continent': u'OC',
+             u'country': u'Rotuma Island',
+             u'cqz': 32,
+             u'ituz': 56,
+             u'latitude': -12.48,
+             u'longitude': 177.08
+           }
+
+
+        Note:
+            This method is available for the following lookup type
+
+            - clublogxml
+            - countryfile
+            - snapshot
+            - shared
+            - sqlite
+        """
+
+        if redis_instance is not None:
+            self._redis = redis_instance
+
+        if self._redis is None:
+            raise AttributeError("redis_instance is missing")
+
+        if redis_prefix is None:
+            raise KeyError("redis_prefix is missing")
+
+        if self._lookuptype == "clublogxml" or self._lookuptype == "countryfile" or self._lookuptype == "snapshot" or self._lookuptype == "shared" or self._lookuptype == "sqlite":
+
+            data = self._data
+            r = self._redis
+
+            version = r.incr(redis_prefix + REDIS_VERSION_COUNTER_KEY)
+            r.sadd(redis_prefix + REDIS_VERSIONS_KEY, version)
+            namespace = redis_prefix + ":" + str(version)
+
+            tables = [
+                (self._push_dict_to_redis, data["entities"], "_entity_"),
+                (self._push_dict_index_to_redis, data["call_exceptions_index"], "_call_ex_index_"),
+                (self._push_filter_to_redis, data["call_exceptions_index"], "_call_ex_index_"),
+                (self._push_dict_to_redis, data["call_exceptions"], "_call_ex_"),
+                (self._push_dict_index_to_redis, data["prefixes_index"], "_prefix_index_"),
+                (self._push_lex_index_to_redis, data["prefixes_index"], "_prefix_index_"),
+                (self._push_dict_to_redis, data["prefixes"], "_prefix_"),
+                (self._push_dict_index_to_redis, data["invalid_operations_index"], "_inv_op_index_"),
+                (self._push_filter_to_redis, data["invalid_operations_index"], "_inv_op_index_"),
+                (self._push_dict_to_redis, data["invalid_operations"], "_inv_op_"),
+                (self._push_dict_index_to_redis, data["zone_exceptions_index"], "_zone_ex_index_"),
+                (self._push_filter_to_redis, data["zone_exceptions_index"], "_zone_ex_index_"),
+                (self._push_dict_to_redis, data["zone_exceptions"], "_zone_ex_"),
+            ]
+
+            if connections > 1:
+                with ThreadPoolExecutor(max_workers=connections) as executor:
+                    futures = [executor.submit(push, table, namespace, name, chunk_size, progress) for push, table, name in tables]
+                    for future in futures:
+                        future.result()
+            else:
+                for push, table, name in tables:
+                    push(table, namespace, name, chunk_size, progress)
+
+            previous_version = self._switch_redis_version(redis_prefix, version)
+            self._collect_redis_garbage(redis_prefix, keep=[version, previous_version])
+
+        return True
+
+    def _switch_redis_version(self, redis_prefix, version):
+        """
+        Point the readers of a data set in Redis atomically to a new version. Returns the previous version.
+        """
+        pipe = self._redis.pipeline(transaction=True)
+        pipe.get(redis_prefix + REDIS_POINTER_KEY)
+        pipe.set(redis_prefix + REDIS_SCHEMA_KEY, REDIS_SCHEMA_VERSION)
+        pipe.set(redis_prefix + REDIS_POINTER_KEY, version)
+        pipe.incr(redis_prefix + REDIS_REVISION_KEY)
+        previous_version = pipe.execute()[0]
+        self._logger.debug("data set " + redis_prefix + " in redis switched to version " + str(version))
+        if previous_version is not None:
+            return int(previous_version)
+        return None
+
+    def _collect_redis_garbage(self, redis_prefix, keep):
+        """
+        Delete the old versions of a data set in Redis, except the versions in keep. The previous version
+        should be kept, since readers switch to the new version only when their cached filters expire.
+        Versions newer than the kept ones may still be written and are skipped. The keys are found with SCAN
+        and deleted in small batches, so Redis is never blocked for long.
+        """
+        r = self._redis
+        keep = set(version for version in keep if version is not None)
+        pattern_prefix = re.sub(r"([*?\[\]\\])", r"\\\1", redis_prefix)
+
+        for version in r.smembers(redis_prefix + REDIS_VERSIONS_KEY):
+            version = int(version)
+            if version in keep or version > max(keep):
+                continue
+            keys = []
+            for key in r.scan_iter(match=pattern_prefix + ":" + str(version) + "_*", count=REDIS_GC_BATCH_SIZE):
+                keys.append(key)
+                if len(keys) >= REDIS_GC_BATCH_SIZE:
+                    r.delete(*keys)
+                    keys = []
+            if keys:
+                r.delete(*keys)
+            r.srem(redis_prefix + REDIS_VERSIONS_KEY, version)
+            self._logger.debug("version " + str(version) + " of data set " + redis_prefix + " deleted from redis")
+
+    def _push_dict_to_redis(self, push_dict, redis_prefix, name, chunk_size=REDIS_LOAD_CHUNK_SIZE, progress=None):
+        def push_chunk(pipe, keys):
+            for i in keys:
+                pipe.hset(redis_prefix + name + str(i), mapping=self._encode_redis_record(push_dict[i]))
+
+        return self._push_in_chunks(list(push_dict), push_chunk, name, chunk_size, progress)
+
+    def _push_dict_index_to_redis(self, index_dict, redis_prefix, name, chunk_size=REDIS_LOAD_CHUNK_SIZE, progress=None):
+        def push_chunk(pipe, keys):
+            for i in keys:
+                pipe.sadd(redis_prefix + name + str(i), *index_dict[i])
+
+        return self._push_in_chunks(list(index_dict), push_chunk, name, chunk_size, progress)
+
+    def _push_lex_index_to_redis(self, index_dict, redis_prefix, name, chunk_size=REDIS_LOAD_CHUNK_SIZE, progress=None):
+        """
+        Store the record ids of all prefixes in the lexicographic prefix index (see REDIS_PREFIX_LEX_KEY)
+        """
+        def push_chunk(pipe, keys):
+            pipe.zadd(redis_prefix + REDIS_PREFIX_LEX_KEY, dict((key + ":" + str(el), 0) for key in keys for el in index_dict[key]))
+
+        return self._push_in_chunks(list(index_dict), push_chunk, REDIS_PREFIX_LEX_KEY, chunk_size, progress)
+
+    def _push_filter_to_redis(self, index_dict, redis_prefix, name, chunk_size=REDIS_LOAD_CHUNK_SIZE, progress=None):
+        """
+        Store all callsigns of an index in the filter set of the index (see REDIS_FILTER_NAMES)
+        """
+        filter_name = redis_prefix + REDIS_FILTER_NAMES[name]
+
+        def push_chunk(pipe, calls):
+            pipe.sadd(filter_name, *calls)
+
+        result = self._push_in_chunks(list(index_dict), push_chunk, REDIS_FILTER_NAMES[name], chunk_size, progress)
+        self._redis.sadd(redis_prefix + REDIS_FILTERS_KEY, name)
+        return result
+
+    def _push_in_chunks(self, keys, push_chunk, name, chunk_size, progress):
+        """
+        Write the keys of a table into redis with one pipeline per chunk of keys (push_chunk queues the
+        commands of a chunk). Reports the progress after each chunk and logs the throughput of the table.
+        """
+        r = self._redis
+        start = time.monotonic()
+
+        for i in range(0, len(keys), chunk_size):
+            pipe = r.pipeline(transaction=False)
+            push_chunk(pipe, keys[i:i+chunk_size])
+            pipe.execute()
+            if progress is not None:
+                progress(name, min(i + chunk_size, len(keys)), len(keys), time.monotonic() - start)
+
+        elapsed = time.monotonic() - start
+        if not keys and progress is not None:
+            progress(name, 0, 0, elapsed)
+        self._logger.debug(name + ": " + str(len(keys)) + " keys written into redis in " + "%.3f" % elapsed +
+                           "s (" + "%.0f" % (len(keys) / max(elapsed, 1e-6)) + " keys/s)")
+        return True
+
+
+
+    def save_snapshot(self, filename):
+        """
+        Store the complete (parsed) lookup data in a snapshot file, a pickle cache of the data.
+
+        The snapshot can be loaded with the lookuptype "snapshot". Loading a snapshot avoids downloading and
+        parsing the Clublog XML or Country-files.com PLIST File, which makes it well suited for
+        setups where many processes have to load the same data. Each process loads its own copy of the
+        data; to share one copy between processes, see :py:meth:`save_shared_data`.
+
+        Args:
+            filename (str): Path of the snapshot file. An existing file will be replaced atomically.
+
+        Returns:
+            bool: returns True when the snapshot has been written successfully
+
+        Raises:
+            AttributeError: Lookup type does not hold the lookup data in memory
+
+        Example:
+           Store the Clublog XML data in a snapshot and load it again
+
+           >>> from pyhamtools import LookupLib
+           >>> my_lookuplib = LookupLib(lookuptype="clublogxml", apikey="myapikey")
+           >>> my_lookuplib.save_snapshot("/var/lib/pyhamtools/clublog.snapshot")
+           True
+           >>> my_lookuplib = LookupLib(lookuptype="snapshot", filename="/var/lib/pyhamtools/clublog.snapshot")
+           >>> my_lookuplib.lookup_zone_exception("DP0GVN")
+           38
+
+        Note:
+            This method is available for the following lookup type
+
+            - clublogxml
+            - countryfile
+            - snapshot
+
+            Snapshots are stored with pickle. Only load snapshots from trusted sources.
+        """
+        if not (self._lookuptype == "clublogxml" or self._lookuptype == "countryfile" or self._lookuptype == "snapshot"):
+            raise AttributeError("snapshots are not available for lookuptype " + str(self._lookuptype))
+
+        data = self._data
+        # records are stored as plain dicts, so the snapshot doesn't depend on the classes of this module
+        snapshot = {}
+        for name in DATA_NAMES:
+            if name.endswith("_index"):
+                snapshot[name] = dict((key, list(record_ids)) for key, record_ids in data[name].items())
+            else:
+                snapshot[name] = dict((record_id, dict(record)) for record_id, record in data[name].items())
+
+        def write(tmp_filename):
+            with open(tmp_filename, "wb") as f:
+                f.write(SNAPSHOT_MAGIC)
+                f.write(struct.pack("<H", SNAPSHOT_VERSION))
+                pickle.dump(snapshot, f, protocol=4)
+
+        filename = self._atomic_write(filename, write)
+        self._logger.debug("snapshot successfully written to " + filename)
+        return True
+
+    def _atomic_write(self, filename, write):
+        """
+        Let write create the file in a temporary file next to filename (write is called with its name)
+        and replace filename with it atomically. The temporary file is removed when write fails.
+        Returns the absolute path of the file.
+        """
+        filename = os.path.abspath(filename)
+        tmp_filename = filename + "." + self._generate_random_word(8) + ".tmp"
+        try:
+            write(tmp_filename)
+            os.replace(tmp_filename, filename)
+        except Exception:
+            if os.path.exists(tmp_filename):
+                os.remove(tmp_filename)
+            raise
+        return filename
+
+    def _load_snapshot(self, filename):
+        """ Load the lookup data from a snapshot file (see save_snapshot) and return it
+        """
+        with open(filename, "rb") as f:
+            if f.read(len(SNAPSHOT_MAGIC)) != SNAPSHOT_MAGIC:
+                raise ValueError(filename + " is not a PyHamTools snapshot")
+            version = struct.unpack("<H", f.read(2))[0]
+            if version != SNAPSHOT_VERSION:
+                raise ValueError("Unsupported snapshot version " + str(version) +
+                                 " (expected " + str(SNAPSHOT_VERSION) + ")")
+            snapshot = pickle.load(f)
+
+        for name in DATA_NAMES:
+            if not name.endswith("_index"):
+                records = snapshot[name]
+                for record_id, record in records.items():
+                    if _RECORD_FIELDS.issuperset(record):
+                        records[record_id] = _LookupRecord(record)
+
+        self._logger.debug("snapshot successfully loaded from " + filename)
+        return snapshot
+
+    def save_shared_data(self, filename):
+        """
+        Store the complete (parsed) lookup data in a read-only shared data file.
+
+        The file can be attached with the lookuptype "shared" by any number of processes. Unlike a snapshot,
+        the data is not loaded into the process. The file is memory mapped and the records are located by
+        their offsets and decoded from their typed binary encoding on access, so all processes share the same
+        (page cached) memory. The derived indexes (prefix trie, validity intervals, record boundaries) are
+        stored in the file as well; attaching the file neither decodes records nor builds indexes.
+        Place the file on a RAM backed file system like /dev/shm to keep it off the disk.
+
+        Args:
+            filename (str): Path of the shared data file. An existing file will be replaced atomically;
+            processes which are already attached keep using the previous data.
+
+        Returns:
+            bool: returns True when the shared data has been written successfully
+
+        Raises:
+            AttributeError: Lookup type does not hold the lookup data in memory
+
+        Example:
+           Load the Clublog XML data once and attach it from the worker processes
+
+           >>> from pyhamtools import LookupLib
+           >>> my_lookuplib = LookupLib(lookuptype="clublogxml", apikey="myapikey")
+           >>> my_lookuplib.save_shared_data("/dev/shm/clublog.shared")
+           True
+           >>> my_lookuplib = LookupLib(lookuptype="shared", filename="/dev/shm/clublog.shared")
+           >>> my_lookuplib.lookup_zone_exception("DP0GVN")
+           38
+
+        Note:
+            This method is available for the following lookup types
+
+            - clublogxml
+            - countryfile
+            - snapshot
+            - shared
+            - sqlite
+        """
+
+        if not (self._lookuptype == "clublogxml" or self._lookuptype == "countryfile" or
+                self._lookuptype == "snapshot" or self._lookuptype == "shared" or self._lookuptype == "sqlite"):
+            raise AttributeError("shared data is not available for lookuptype " + str(self._lookuptype))
+
+        data = self._data
+
+        def write(tmp_filename):
+            with open(tmp_filename, "wb") as f:
+                f.write(SHARED_DATA_MAGIC)
+                f.write(struct.pack("<H", SHARED_DATA_VERSION))
+                table_position = f.tell()
+                f.write(b"\0" * 8 * (len(DATA_NAMES) + len(SHARED_INDEX_NAMES)))
+                offsets = []
+                for name in DATA_NAMES:
+                    offsets.append(f.tell())
+                    if name.endswith("_index"):
+                        self._write_shared_index(f, data[name])
+                    else:
+                        self._write_shared_records(f, data[name])
+                offsets.append(self._write_shared_trie(f, data["prefixes_trie"]))
+                for name in CURRENT_RECORDS_NAMES:
+                    offsets.append(f.tell())
+                    self._write_shared_index(f, data[name + "_intervals"], self._encode_shared_intervals)
+                offsets.append(f.tell())
+                self._write_shared_array(f, data["record_boundaries"])
+                offsets.append(f.tell())
+                self._write_shared_boundary_items(f, data["record_boundaries"], data["boundary_items"])
+                f.seek(table_position)
+                f.write(struct.pack("<" + str(len(offsets)) + "Q", *offsets))
+
+        filename = self._atomic_write(filename, write)
+        self._logger.debug("shared data successfully written to " + filename)
+        return True
+
+    def _write_shared_records(self, f, data_dict):
+        """
+        Write a data dict as section of a shared data file: the number of records, the table of
+        (record id, offset) sorted by record id and the encoded records (see _SharedRecords)
+        """
+        record_ids = sorted(data_dict)
+        position = f.tell() + 4 + 16 * len(record_ids)
+        table = []
+        records = []
+        for record_id in record_ids:
+            record = self._encode_shared_record(data_dict[record_id])
+            table.append(struct.pack("<qQ", record_id, position))
+            records.append(struct.pack("<I", len(record)) + record)
+            position += 4 + len(record)
+        f.write(struct.pack("<I", len(record_ids)))
+        f.write(b"".join(table))
+        f.write(b"".join(records))
+
+    def _encode_shared_record(self, record):
+        """
+        Encode a record of a shared data file: a bitmask of the fields in SHARED_RECORD_FIELDS
+        which are set, followed by their values
+        """
+        unknown_fields = set(record) - set(field for field, _ in SHARED_RECORD_FIELDS)
+        if unknown_fields:
+            raise ValueError("fields which can't be stored in shared data: " + ", ".join(sorted(unknown_fields)))
+
+        mask = 0
+        values = []
+        for i, (field, field_format) in enumerate(SHARED_RECORD_FIELDS):
+            if field not in record:
+                continue
+            mask |= 1 << i
+            value = record[field]
+            if field_format == "s":
+                value = value.encode("utf8")
+                values.append(struct.pack("<H", len(value)) + value)
+            elif isinstance(value, datetime):
+                values.append(struct.pack("<q", int(value.timestamp())))
+            else:
+                values.append(struct.pack("<" + field_format, value))
+        return struct.pack("<H", mask) + b"".join(values)
+
+    def _decode_shared_record(self, buffer):
+        """
+        Decode a record of a shared data file (see _encode_shared_record) into a dictionary
+        """
+        mask = struct.unpack_from("<H", buffer)[0]
+        position = 2
+        record = {}
+        for i, (field, field_format) in enumerate(SHARED_RECORD_FIELDS):
+            if not mask & (1 << i):
+                continue
+            if field_format == "s":
+                length = struct.unpack_from("<H", buffer, position)[0]
+                value = buffer[position + 2:position + 2 + length].decode("utf8")
+                position += 2 + length
+            else:
+                value = struct.unpack_from("<" + field_format, buffer, position)[0]
+                position += struct.calcsize("<" + field_format)
+            decoder = SHARED_FIELD_DECODERS.get(field)
+            if decoder is not None:
+                value = decoder(value)
+            record[field] = value
+        return record
+
+    def _write_shared_index(self, f, index_dict, encode=None):
+        """
+        Write an index dict as section of a shared data file: the number of entries, the offsets of the
+        entries sorted by key and the entries with key and record ids (see _SharedIndex). Indexes with
+        other values provide the function which encodes a value.
+        """
+        keys = sorted(index_dict, key=lambda key: key.encode("utf8"))
+        position = f.tell() + 4 + 8 * len(keys)
+        offsets = []
+        entries = []
+        for key in keys:
+            encoded = key.encode("utf8")
+            if encode is not None:
+                value = encode(index_dict[key])
+            else:
+                record_ids = index_dict[key]
+                value = struct.pack("<I", len(record_ids)) + struct.pack("<" + str(len(record_ids)) + "q", *record_ids)
+            entry = struct.pack("<H", len(encoded)) + encoded + value
+            offsets.append(position)
+            entries.append(entry)
+            position += len(entry)
+        f.write(struct.pack("<I", len(keys)))
+        f.write(struct.pack("<" + str(len(offsets)) + "Q", *offsets))
+        f.write(b"".join(entries))
+
+    def _encode_shared_intervals(self, intervals):
+        """
+        Encode the validity intervals of an item (see _build_interval_index): the number of intervals,
+        the startdates, the enddates and the record ids
+        """
+        starts, ends, record_ids = intervals
+        count = str(len(record_ids))
+        return struct.pack("<I", len(record_ids)) + struct.pack("<" + count + "d", *starts) + \
+            struct.pack("<" + count + "d", *ends) + struct.pack("<" + count + "q", *record_ids)
+
+    def _decode_shared_intervals(self, buffer, position):
+        """
+        Decode the validity intervals of an item at their position in a shared data file (see _encode_shared_intervals)
+        """
+        count = struct.unpack_from("<I", buffer, position)[0]
+        position += 4
+        starts = list(struct.unpack_from("<" + str(count) + "d", buffer, position))
+        ends = list(struct.unpack_from("<" + str(count) + "d", buffer, position + 8 * count))
+        record_ids = list(struct.unpack_from("<" + str(count) + "q", buffer, position + 16 * count))
+        return (starts, ends, record_ids)
+
+    def _write_shared_trie(self, f, node):
+        """
+        Write a node of the prefix trie (see _build_prefix_trie) and its children as section of a shared data
+        file and return the offset of the node. The children are written first; each node holds the prefix which
+        ends there (its length + 1, 0 if none) and the code points of the following characters with the offsets
+        of their nodes (see _SharedTrie).
+        """
+        children = []
+        for char in sorted((char for char in node if char != ""), key=ord):
+            children.append(struct.pack("<IQ", ord(char), self._write_shared_trie(f, node[char])))
+
+        offset = f.tell()
+        if "" in node:
+            prefix = node[""].encode("utf8")
+            f.write(struct.pack("<H", len(prefix) + 1) + prefix)
+        else:
+            f.write(struct.pack("<H", 0))
+        f.write(struct.pack("<I", len(children)))
+        f.write(b"".join(children))
+        return offset
+
+    def _write_shared_array(self, f, values):
+        """
+        Write a sequence of floats as section of a shared data file (see _SharedArray)
+        """
+        f.write(struct.pack("<I", len(values)))
+        f.write(struct.pack("<" + str(len(values)) + "d", *values))
+
+    def _write_shared_boundary_items(self, f, boundaries, boundary_items):
+        """
+        Write the items of the record boundaries as section of a shared data file: the sorted boundaries,
+        the offsets of their entries and the entries with the (index of the name of the data dict, item)
+        tuples (see _SharedBoundaryItems)
+        """
+        self._write_shared_array(f, boundaries)
+        position = f.tell() + 8 * len(boundaries)
+        offsets = []
+        entries = []
+        for boundary in boundaries:
+            items = sorted(boundary_items[boundary])
+            entry = [struct.pack("<I", len(items))]
+            for name, item in items:
+                encoded = item.encode("utf8")
+                entry.append(struct.pack("<BH", CURRENT_RECORDS_NAMES.index(name), len(encoded)) + encoded)
+            entry = b"".join(entry)
+            offsets.append(position)
+            entries.append(entry)
+            position += len(entry)
+        f.write(struct.pack("<" + str(len(offsets)) + "Q", *offsets))
+        f.write(b"".join(entries))
+
+    def _attach_shared_data(self, filename):
+        """ Memory map a shared data file (see save_shared_data) and return a data set on top of it
+        """
+        with open(filename, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if mm[:len(SHARED_DATA_MAGIC)] != SHARED_DATA_MAGIC:
+            mm.close()
+            raise ValueError(filename + " is not a PyHamTools shared data file")
+        version = struct.unpack_from("<H", mm, len(SHARED_DATA_MAGIC))[0]
+        if version != SHARED_DATA_VERSION:
+            mm.close()
+            raise ValueError("Unsupported shared data version " + str(version) +
+                             " (expected " + str(SHARED_DATA_VERSION) + ")")
+        offsets = struct.unpack_from("<" + str(len(DATA_NAMES) + len(SHARED_INDEX_NAMES)) + "Q", mm, len(SHARED_DATA_MAGIC) + 2)
+        offsets = dict(zip(DATA_NAMES + SHARED_INDEX_NAMES, offsets))
+
+        data = {}
+        for name in DATA_NAMES:
+            if name.endswith("_index"):
+                data[name] = _SharedIndex(mm, offsets[name])
+            else:
+                data[name] = _SharedRecords(mm, offsets[name], self._decode_shared_record)
+        data["prefixes_trie"] = _SharedTrie(mm, offsets["prefixes_trie"])
+        for name in CURRENT_RECORDS_NAMES:
+            data[name + "_intervals"] = _SharedIndex(mm, offsets[name + "_intervals"], self._decode_shared_intervals)
+        data["record_boundaries"] = _SharedArray(mm, offsets["record_boundaries"])
+        data["boundary_items"] = _SharedBoundaryItems(mm, offsets["boundary_items"])
+        self._add_record_views(data)
+
+        self._logger.debug("shared data successfully attached from " + filename)
+        return data
+
+    def _add_record_views(self, data):
+        """
+        Add the (uncached) record views to a data set whose data dicts are read from a file on access
+        (shared data or sqlite). The records stay in the file and are decoded on each access.
+        """
+        data["entities_views"] = self._build_record_views(data["entities"], cache=False)
+        data["call_exceptions_views"] = self._build_record_views(data["call_exceptions"], data["entities"], False)
+        data["prefixes_views"] = self._build_record_views(data["prefixes"], data["entities"], False)
+        data["current_records"] = None
+
+    def _build_attached_indexes(self, data):
+        """
+        Complete a data set whose data dicts are queried from a SQLite database on access. The derived indexes
+        (see _build_derived_indexes) hold only prefixes, dates and record ids; they are built from a transient
+        copy of the records, which is dropped afterwards.
+        """
+        derived = self._build_derived_indexes(dict((name, dict(data[name].items())) for name in DATA_NAMES))
+        data["prefixes_trie"] = derived["prefixes_trie"]
+        for name in CURRENT_RECORDS_NAMES:
+            data[name + "_intervals"] = derived[name + "_intervals"]
+        data["record_boundaries"] = derived["record_boundaries"]
+        data["boundary_items"] = derived["boundary_items"]
+        self._add_record_views(data)
+
+    def copy_data_in_sqlite(self, filename):
+        """
+        Store the complete (parsed) lookup data in a SQLite database.
+
+        Every data dict and index is stored in a table with typed columns (see SQLITE_COLUMNS), keyed by
+        the record id or by the callsign / prefix. With the lookuptype "sqlite", any number of processes
+        query the database read-only. The records are not loaded into the processes; they share the
+        pages of the file through the page cache of the operating system.
+
+        Args:
+            filename (str): Path of the SQLite database. An existing file will be replaced atomically;
+            processes which have it already opened keep using the previous data.
+
+        Returns:
+            bool: returns True when the data has been copied successfully into the database
+
+        Raises:
+            AttributeError: Lookup type does not hold the lookup data in memory
+            ValueError: A record contains a field without column in the database
+
+        Example:
+           Load the Clublog XML data once and query it from the worker processes
+
+           >>> from pyhamtools import LookupLib
+           >>> my_lookuplib = LookupLib(lookuptype="clublogxml", apikey="myapikey")
+           >>> my_lookuplib.copy_data_in_sqlite("/var/lib/pyhamtools/clublog.sqlite")
+           True
+           >>> my_lookuplib = LookupLib(lookuptype="sqlite", filename="/var/lib/pyhamtools/clublog.sqlite")
+           >>> my_lookuplib.lookup_zone_exception("DP0GVN")
+           38
+
+        Note:
+            Open the database (create the :py:class:`LookupLib`) in each process, not before forking.
+
+            This method is available for the following lookup types
+
+            - clublogxml
+            - countryfile
+            - snapshot
+            - shared
+            - sqlite
+        """
+        if not (self._lookuptype == "clublogxml" or self._lookuptype == "countryfile" or
+                self._lookuptype == "snapshot" or self._lookuptype == "shared" or self._lookuptype == "sqlite"):
+            raise AttributeError("sqlite data is not available for lookuptype " + str(self._lookuptype))
+
+        data = self._data
+
+        def write(tmp_filename):
+            connection = sqlite3.connect(tmp_filename)
+            try:
+                with connection:
+                    connection.execute("CREATE TABLE metadata (name TEXT PRIMARY KEY, value)")
+                    connection.execute("INSERT INTO metadata VALUES (?, ?)", ("schema_version", SQLITE_SCHEMA_VERSION))
+                    for name in DATA_NAMES:
+                        if name.endswith("_index"):
+                            self._write_sqlite_index(connection, name, data[name])
+                        else:
+                            self._write_sqlite_records(connection, name, data[name])
+            finally:
+                connection.close()
+
+        filename = self._atomic_write(filename, write)
+        self._logger.debug("lookup data successfully copied into sqlite database " + filename)
+        return True
+
+    def _write_sqlite_records(self, connection, table, data_dict):
+        """
+        Create the table of a data dict in a SQLite database and insert its records (see SQLITE_COLUMNS)
+        """
+        columns = ", ".join('"' + column + '" ' + column_type for column, column_type in SQLITE_COLUMNS)
+        connection.execute('CREATE TABLE "' + table + '" (id INTEGER PRIMARY KEY, ' + columns + ")")
+        connection.executemany('INSERT INTO "' + table + '" VALUES (?' + ", ?" * len(SQLITE_COLUMNS) + ")",
+                               ([record_id] + self._encode_sqlite_record(data_dict[record_id]) for record_id in data_dict))
+
+    def _write_sqlite_index(self, connection, table, index_dict):
+        """
+        Create the table of an index dict in a SQLite database and insert the record ids of each key,
+        together with their position in the index (see _SqliteIndex)
+        """
+        connection.execute('CREATE TABLE "' + table + '" (key TEXT NOT NULL, position INTEGER NOT NULL, '
+                           'id INTEGER NOT NULL, PRIMARY KEY (key, position)) WITHOUT ROWID')
+        connection.executemany('INSERT INTO "' + table + '" VALUES (?, ?, ?)',
+                               ((key, position, record_id) for key in index_dict
+                                for position, record_id in enumerate(index_dict[key])))
+
+    def _encode_sqlite_record(self, record):
+        """
+        Encode a record as the values of the columns in SQLITE_COLUMNS
+        """
+        unknown_fields = set(record) - set(column for column, _ in SQLITE_COLUMNS)
+        if unknown_fields:
+            raise ValueError("fields without column in sqlite: " + ", ".join(sorted(unknown_fields)))
+
+        values = []
+        for column, _ in SQLITE_COLUMNS:
+            value = record.get(column)
+            if isinstance(value, datetime):
+                value = int(value.timestamp())
+            elif isinstance(value, bool):
+                value = int(value)
+            values.append(value)
+        return values
+
+    def _decode_sqlite_record(self, row):
+        """
+        Decode a row of a record table (see SQLITE_COLUMNS) into a dictionary; NULL columns are omitted
+        """
+        record = {}
+        for (column, _), value in zip(SQLITE_COLUMNS, row):
+            if value is None:
+                continue
+            decoder = SQLITE_FIELD_DECODERS.get(column)
+            if decoder is not None:
+                value = decoder(value)
+            record[column] = value
+        return record
+
+    def _attach_sqlite_data(self, filename):
+        """ Open a SQLite database (see copy_data_in_sqlite) read-only and return a data set on top of it
+        """
+        filename = os.path.abspath(filename)
+        if not os.path.isfile(filename):
+            raise FileNotFoundError("No such file: " + filename)
+
+        # the connection only reads; it may be shared by the threads of the process
+        connection = sqlite3.connect("file:" + pathname2url(filename) + "?mode=ro", uri=True, check_same_thread=False)
+        try:
+            row = connection.execute("SELECT value FROM metadata WHERE name = 'schema_version'").fetchone()
+        except sqlite3.DatabaseError:
+            connection.close()
+            raise ValueError(filename + " is not a PyHamTools sqlite database")
+        if row is None or row[0] != SQLITE_SCHEMA_VERSION:
+            connection.close()
+            raise ValueError("Unsupported sqlite schema version " + str(row[0] if row else None) +
+                             " (expected " + str(SQLITE_SCHEMA_VERSION) + ")")
+
+        data = {}
+        for name in DATA_NAMES:
+            if name.endswith("_index"):
+                data[name] = _SqliteIndex(connection, name)
+            else:
+                data[name] = _SqliteRecords(connection, name, self._decode_sqlite_record)
+        self._build_attached_indexes(data)
+
+        self._logger.debug("sqlite data successfully attached from " + filename)
+        return data
+
+    def lookup_entity(self, entity=None):
+        """Returns lookup data of an ADIF Entity
+
+        Args:
+            entity (int): ADIF identifier of country
+
+        Returns:
+            dict: Dictionary containing the country specific data
+            (a read-only mapping for clublogxml, countryfile and snapshot; use dict() for a modifiable copy)
+
+        Raises:
+            KeyError: No matching entity found
+
+        Example:
+           The following code queries the the Clublog XML database for the ADIF entity Turkmenistan, which has
+           the id 273.
+
+           >>> from pyhamtools import LookupLib
+           >>> my_lookuplib = LookupLib(lookuptype="clublogapi", apikey="myapikey")
+           >>> print my_lookuplib.lookup_entity(273)
+           {
+            'deleted': False,
+            'country': u'TURKMENISTAN',
+            'longitude': 58.4,
+            'cqz': 17,
+            'prefix': u'EZ',
+            'latitude': 38.0,
+            'continent': u'AS'
+           }
+
+
+        Note:
+            This method is available for the following lookup type
+
+            - clublogxml
+            - redis
+            - qrz.com
+            - snapshot
+            - shared
+            - sqlite
+
+        """
+        if self._lookuptype == "clublogxml" or self._lookuptype == "snapshot" or self._lookuptype == "shared" or self._lookuptype == "sqlite":
+            entity = int(entity)
+            data = self._data
+            if entity in data["entities"]:
+                return data["entities_views"][entity]
+            else:
+                raise KeyError
+
+        elif self._lookuptype == "redis":
+            if self._redis_prefix is None:
+                raise KeyError ("redis_prefix is missing")
+            namespace = self._get_redis_namespace()
+            my_dict = self._redis_cache.get(("_entity_", str(entity)))
+            if my_dict is None:
+                my_dict = self._cache_redis_entity(entity, self._redis.hgetall(namespace + "_entity_" + str(entity)))
+            if my_dict:
+                return self._strip_metadata(my_dict)
+
+        elif self._lookuptype == "qrz":
+            result = self._lookup_qrz_dxcc(entity, self._apikey)
+            return result
+
+        # no matching case
+        raise KeyError
+
+    def lookup_callsign(self, callsign=None, timestamp=None):
+        """
+        Returns lookup data if an exception exists for a callsign
+
+        Args:
+            callsign (string): Amateur radio callsign
+            timestamp (datetime, optional): datetime in UTC (tzinfo=timezone.utc)
+
+        Returns:
+            dict: Dictionary containing the country specific data of the callsign
+            (a read-only mapping for clublogxml, countryfile and snapshot; use dict() for a modifiable copy)
+
+        Raises:
+            KeyError: No matching callsign found
+            APIKeyMissingError: API Key for Clublog missing or incorrect
+
+        Example:
+           The following code queries the the online Clublog API for the callsign "VK9XO" on a specific date.
+
+           >>> from pyhamtools import LookupLib
+           >>> from datetime import datetime, timezone
+           >>> my_lookuplib = LookupLib(lookuptype="clublogapi", apikey="myapikey")
+           >>> timestamp = datetime(year=1962, month=7, day=7, tzinfo=timezone.utc)
+           >>> print my_lookuplib.lookup_callsign("VK9XO", timestamp)
+           {
+            'country': u'CHRISTMAS ISLAND',
+            'longitude': 105.7,
+            'cqz': 29,
+            'adif': 35,
+            'latitude': -10.5,
+            'continent': u'OC'
+           }
+
+        Note:
+            This method is available for
+
+            - clublogxml
+            - clublogapi
+            - countryfile
+            - qrz.com
+            - redis
+            - snapshot
+            - shared
+            - sqlite
+
+
+        """
+        callsign = callsign.strip().upper()
+
+        if self._lookuptype == "clublogapi":
+            if timestamp is None:
+                timestamp = datetime.now(timezone.utc)
+            callsign_data =  self._lookup_clublogAPI(callsign=callsign, timestamp=timestamp, apikey=self._apikey)
+            if callsign_data[const.ADIF]==1000:
+                raise KeyError
+            else:
+                return callsign_data
+
+        elif self._lookuptype == "clublogxml" or self._lookuptype == "countryfile" or self._lookuptype == "snapshot" or self._lookuptype == "shared" or self._lookuptype == "sqlite":
+
+            callsign_data = self._get_data_for_date(callsign, timestamp, self._data, "call_exceptions")
+            if callsign_data is None:
+                raise KeyError
+            return callsign_data
+
+        elif self._lookuptype == "redis":
+
+            data_dict, index = self._get_dicts_from_redis("_call_ex_", "_call_ex_index_", self._redis_prefix, callsign)
+            return self._check_data_for_date(callsign, timestamp, data_dict, index)
+
+        # no matching case
+        elif self._lookuptype == "qrz":
+            return self._lookup_qrz_callsign(callsign, self._apikey, self._apiv)
+
+        raise KeyError("unknown Callsign")
+
+    def _get_dicts_from_redis(self, name, index_name, redis_prefix, item):
+        """
+        Retrieve the data of an item from redis and put it in an index and data dictionary to match the
+        common query interface.
+        """
+        if redis_prefix is None:
+            raise KeyError ("redis_prefix is missing")
+
+        if not self._redis_filter_contains(index_name, item):
+            raise KeyError ("No Data found in Redis for "+ item)
+
+        return self._get_redis_item_dicts(item, self._get_redis_records([str(item)], name, index_name)[0])
+
+    def _get_redis_records(self, items, name, index_name):
+        """
+        Retrieve the records of several items from the local cache, or from redis in a single round trip.
+        Returns a data dict for each item; the records are already completed with the fields of their entity.
+        """
+        namespace = self._get_redis_namespace()
+
+        data_dicts, missing_items = self._get_cached_redis_records(items, name)
+        fetched = []
+        if missing_items:
+            fetched = self._fetch_redis_records(namespace, missing_items, name, index_name)
+        return self._merge_redis_records(items, name, data_dicts, missing_items, fetched)
+
+    def _fetch_redis_records(self, namespace, items, name, index_name):
+        """
+        Retrieve the records of several items from redis in a single round trip (see REDIS_LUA_GET_SCRIPT)
+        """
+        if not self._redis_scripting:
+            return self._fetch_redis_records_with_pipelines(namespace, items, name, index_name)
+
+        self._register_redis_scripts()
+        keys, args = self._get_get_script_params(namespace, items, name, index_name)
+        return self._decode_redis_records_reply(self._redis_get_script(keys=keys, args=args, client=self._redis))
+
+    def _fetch_redis_records_with_pipelines(self, namespace, items, name, index_name):
+        """
+        Retrieve the records of several items from redis with plain commands instead of REDIS_LUA_GET_SCRIPT:
+        the record ids of all items in one pipeline (for prefixes from REDIS_PREFIX_LEX_KEY), then the
+        records and finally the entities of the records in one pipeline each
+        """
+        pipe = self._redis.pipeline(transaction=False)
+        self._queue_redis_index_members(pipe, namespace, items, index_name)
+        members = self._decode_redis_index_members(pipe.execute())
+
+        record_ids = self._get_redis_record_ids(members)
+        if not record_ids:
+            return [{} for item in items]
+
+        pipe = self._redis.pipeline(transaction=False)
+        self._queue_redis_records(pipe, namespace, name, record_ids)
+        records = self._decode_redis_records(record_ids, pipe.execute())
+
+        adifs = self._get_incomplete_adifs(list(records.values()))
+        entity_fields = []
+        if adifs:
+            pipe = self._redis.pipeline(transaction=False)
+            self._queue_redis_entities(pipe, namespace, adifs)
+            entity_fields = pipe.execute()
+
+        return self._assemble_fetched_redis_records(members, records, adifs, entity_fields)
+
+    def _redis_filter_contains(self, index_name, item):
+        """
+        Checks the locally cached filter of an index in Redis (see REDIS_FILTER_NAMES). Returns False
+        if the item is definitely not in the index. The filters are reloaded after REDIS_FILTER_TTL seconds;
+        for indexes without filter (not listed in REDIS_FILTERS_KEY) True is returned.
+        """
+        return self._check_redis_filter(self._get_redis_state()[2], index_name, item)
+
+    def _get_redis_namespace(self):
+        """
+        Returns the namespace of the current version of the data set in Redis (see REDIS_POINTER_KEY)
+        """
+        return self._get_redis_state()[0]
+
+    def _get_redis_state(self):
+        """
+        Returns the namespace, the revision and the filters of the current version of the data set in Redis.
+        They are loaded again after REDIS_FILTER_TTL seconds, or as soon as the revision of the data set
+        has changed (see REDIS_REVISION_KEY).
+        """
+        if self._redis_prefix is None:
+            raise KeyError ("redis_prefix is missing")
+
+        state = self._redis_state
+        reload = self._redis_state_expired(state)
+        if not reload and self._redis_revision_check_due():
+            reload = self._redis_revision_changed(state, self._redis.get(self._redis_prefix + REDIS_REVISION_KEY))
+
+        if reload:
+            namespace, revision = self._load_redis_namespace()
+            state = self._publish_redis_state(namespace, revision, self._load_redis_filters(namespace))
+        return state
+
+    def _load_redis_namespace(self):
+        """
+        Resolve the pointer to the current version of the data set in Redis and return its namespace together
+        with the revision of the data set. Raises a ValueError if the data in Redis has not been stored with
+        the current schema (see REDIS_SCHEMA_VERSION).
+        """
+        schema, version, revision = self._redis.mget(self._get_redis_namespace_keys())
+        legacy = 0
+        if self._is_redis_namespace_missing(schema, version, revision):
+            legacy = self._redis.exists(*self._get_redis_legacy_keys())
+        return self._check_redis_namespace(schema, version, revision, legacy)
+
+    def _load_redis_filters(self, namespace):
+        """
+        Retrieve the filter sets (see REDIS_FILTER_NAMES) of a version of the data set from Redis
+        """
+        pipe = self._redis.pipeline(transaction=False)
+        self._queue_redis_filters(pipe, namespace)
+        return self._decode_redis_filters(pipe.execute())
+
+    def has_callsign_records(self, callsign):
+        """
+        Checks if exceptions, invalid operations or zone exceptions exist for a callsign (at any time).
+        This check never raises a KeyError and, for redis, is answered from locally cached filters.
+
+        Args:
+            callsign (string): Amateur Radio callsign
+
+        Returns:
+            bool: False if neither :py:meth:`lookup_callsign`, nor :py:meth:`is_invalid_operation`, nor
+            :py:meth:`lookup_zone_exception` can return data for this callsign. Otherwise True.
+
+        Note:
+            For redis, the filters are reloaded every REDIS_FILTER_TTL (60) seconds. Changes of the
+            data in Redis become visible with this delay. For the online lookup types True is always returned.
+
+        """
+        callsign = callsign.strip().upper()
+
+        if self._lookuptype == "clublogxml" or self._lookuptype == "countryfile" or self._lookuptype == "snapshot" or self._lookuptype == "shared" or self._lookuptype == "sqlite":
+
+            data = self._data
+            return (callsign in data["call_exceptions_index"] or
+                    callsign in data["invalid_operations_index"] or
+                    callsign in data["zone_exceptions_index"])
+
+        elif self._lookuptype == "redis":
+
+            if self._redis_prefix is None:
+                raise KeyError ("redis_prefix is missing")
+            return self._check_redis_filters(self._get_redis_state()[2], callsign)
+
+        return True
+
+    def _find_record(self, item, timestamp, data, name):
+        """
+        Returns the id of the record of item in the data dict name (e.g. "prefixes") of a data set which
+        is valid at the timestamp, or None. Lookups without timestamp use the current records.
+        """
+        if timestamp is None:
+            return self._get_current_records(data)[name].get(item)
+        return self._find_record_for_date(item, timestamp, data[name], data[name + "_index"], data[name + "_intervals"])
+
+    def lookup_prefix(self, prefix, timestamp=None):
+        """
+        Returns lookup data of a Prefix
+
+        Args:
+            prefix (string): Prefix of a Amateur Radio callsign
+            timestamp (datetime, optional): datetime in UTC (tzinfo=timezone.utc)
+
+        Returns:
+            dict: Dictionary containing the country specific data of the Prefix
+            (a read-only mapping for clublogxml, countryfile and snapshot; use dict() for a modifiable copy)
+
+        Raises:
+            KeyError: No matching Prefix found
+            APIKeyMissingError: API Key for Clublog missing or incorrect
+
+        Example:
+           The following code shows how to obtain the information for the prefix "DH" from the countryfile.com
+           database (default database).
+
+           >>> from pyhamtools import LookupLib
+           >>> myLookupLib = LookupLib()
+           >>> print myLookupLib.lookup_prefix("DH")
+           {
+            'adif': 230,
+            'country': u'Fed. Rep. of Germany',
+            'longitude': 10.0,
+            'cqz': 14,
+            'ituz': 28,
+            'latitude': 51.0,
+            'continent': u'EU'
+           }
+
+        Note:
+            This method is available for
+
+            - clublogxml
+            - countryfile
+            - redis
+            - snapshot
+            - shared
+            - sqlite
+
+        """
+
+        prefix = prefix.strip().upper()
+
+        if self._lookuptype == "clublogxml" or self._lookuptype == "countryfile" or self._lookuptype == "snapshot" or self._lookuptype == "shared" or self._lookuptype == "sqlite":
+
+            prefix_data = self._get_data_for_date(prefix, timestamp, self._data, "prefixes")
+            if prefix_data is None:
+                raise KeyError
+            return prefix_data
+
+        elif self._lookuptype == "redis":
+
+            data_dict, index = self._get_dicts_from_redis("_prefix_", "_prefix_index_", self._redis_prefix, prefix)
+            return self._check_data_for_date(prefix, timestamp, data_dict, index)
+
+        # no matching case
+        raise KeyError
+
+    def lookup_longest_prefix(self, callsign, timestamp=None):
+        """
+        Returns lookup data of the longest Prefix which matches the beginning of a callsign
+
+        Args:
+            callsign (string): Amateur Radio callsign (or any string starting with a prefix)
+            timestamp (datetime, optional): datetime in UTC (tzinfo=timezone.utc)
+
+        Returns:
+            dict: Dictionary containing the country specific data of the longest matching Prefix
+            (a read-only mapping for clublogxml, countryfile and snapshot; use dict() for a modifiable copy)
+
+        Raises:
+            KeyError: No matching Prefix found
+
+        Example:
+           The following code shows how to obtain the information for the callsign "DH1TW" from the
+           countryfile.com database (default database). The longest matching prefix is "DH".
+
+           >>> from pyhamtools import LookupLib
+           >>> myLookupLib = LookupLib()
+           >>> print myLookupLib.lookup_longest_prefix("DH1TW")
+           {
+            'adif': 230,
+            'country': u'Fed. Rep. of Germany',
+            'longitude': 10.0,
+            'cqz': 14,
+            'ituz': 28,
+            'latitude': 51.0,
+            'continent': u'EU'
+           }
+
+        Note:
+            Prefixes which exist, but are not valid at the given timestamp are skipped and the next shorter
+            prefix is used instead. This corresponds to calling :py:meth:`lookup_prefix` while truncating the
+            callsign by one character after each unsuccessful lookup.
+
+            This method is available for
+
+            - clublogxml
+            - countryfile
+            - redis
+            - snapshot
+            - shared
+            - sqlite
+
+        """
+
+        callsign = callsign.strip().upper().replace(" ", "")
+
+        if self._lookuptype == "clublogxml" or self._lookuptype == "countryfile" or self._lookuptype == "snapshot" or self._lookuptype == "shared" or self._lookuptype == "sqlite":
+
+            prefix_data = self._find_longest_prefix(callsign, timestamp, self._data)
+            if prefix_data is not None:
+                return prefix_data
+
+        elif self._lookuptype == "redis":
+
+            # all beginnings of the callsign are retrieved at once and checked from the longest one
+            prefixes = self._get_bulk_prefix_candidates([callsign])
+            return self._check_longest_prefix_for_date(prefixes, timestamp, self._get_redis_records(prefixes, "_prefix_", "_prefix_index_"))
+
+        # no matching case
+        raise KeyError
+
+    def _find_longest_prefix(self, callsign, timestamp, data):
+        """
+        Walk the prefix trie of a data set along the callsign and return the view of the longest
+        prefix valid at the timestamp, or None if no prefix matches
+        """
+        node = data["prefixes_trie"]
+        matches = []
+        for char in callsign:
+            node = node.get(char)
+            if node is None:
+                break
+            if "" in node:
+                matches.append(node[""])
+
+        for prefix in reversed(matches):
+            record_id = self._find_record(prefix, timestamp, data, "prefixes")
+            if record_id is not None:
+                return data["prefixes_views"][record_id]
+
+        return None
+
+    def is_invalid_operation(self, callsign, timestamp=None):
+        """
+        Returns True if an operations is known as invalid
+
+        Args:
+            callsign (string): Amateur Radio callsign
+            timestamp (datetime, optional): datetime in UTC (tzinfo=timezone.utc)
+
+        Returns:
+            bool: True if a record exists for this callsign (at the given time)
+
+        Raises:
+            KeyError: No matching callsign found
+            APIKeyMissingError: API Key for Clublog missing or incorrect
+
+        Example:
+           The following code checks the Clublog XML database if the operation is valid for two dates.
+
+           >>> from pyhamtools import LookupLib
+           >>> from datetime import datetime, timezone
+           >>> my_lookuplib = LookupLib(lookuptype="clublogxml", apikey="myapikey")
+           >>> print my_lookuplib.is_invalid_operation("5W1CFN")
+           True
+           >>> try:
+           >>>   timestamp = datetime(year=2012, month=1, day=31, tzinfo=timezone.utc)
+           >>>   my_lookuplib.is_invalid_operation("5W1CFN", timestamp)
+           >>> except KeyError:
+           >>>   print "Seems to be invalid operation before 31.1.2012"
+           Seems to be an invalid operation before 31.1.2012
+
+        Note:
+            This method is available for
+
+            - clublogxml
+            - redis
+            - snapshot
+            - shared
+            - sqlite
+
+        """
+
+        callsign = callsign.strip().upper()
+
+        if self._lookuptype == "clublogxml" or self._lookuptype == "snapshot" or self._lookuptype == "shared" or self._lookuptype == "sqlite":
+
+            if self._find_record(callsign, timestamp, self._data, "invalid_operations") is None:
+                raise KeyError
+            return True
+
+        elif self._lookuptype == "redis":
+
+            data_dict, index = self._get_dicts_from_redis("_inv_op_", "_inv_op_index_", self._redis_prefix, callsign)
+            return self._check_inv_operation_for_date(callsign, timestamp, data_dict, index)
+
+        #no matching case
+        raise KeyError
+
+
+    def lookup_zone_exception(self, callsign, timestamp=None):
         """
-        Returns lookup data if an exception exists for a callsign
+        Returns a CQ Zone if an exception exists for the given callsign
 
         Args:
-            callsign (string): Amateur radio callsign
-            timestamp (datetime, optional): datetime in UTC (tzinfo=timezone.utc)
+        callsign (string): Amateur radio callsign
+        timestamp (datetime, optional): datetime in UTC (tzinfo=timezone.utc)
 
         Returns:
-            dict: Dictionary containing the country specific data of the callsign
+            int: Value of the the CQ Zone exception which exists for this callsign (at the given time)
 
         Raises:
             KeyError: No matching callsign found
             APIKeyMissingError: API Key for Clublog missing or incorrect
 
         Example:
-           The following code queries the the online Clublog API for the callsign "VK9XO" on a specific date.
+           The following code checks the Clublog XML database if a CQ Zone exception exists for the callsign DP0GVN.
 
            >>> from pyhamtools import LookupLib
-           >>> from datetime import datetime, timezone
-           >>> my_lookuplib = LookupLib(lookuptype="clublogapi", apikey="myapikey")
-           >>> timestamp = datetime(year=1962, month=7, day=7, tzinfo=timezone.utc)
-           >>> print my_lookuplib.lookup_callsign("VK9XO", timestamp)
-           {
-            'country': u'CHRISTMAS ISLAND',
-            'longitude': 105.7,
-            'cqz': 29,
-            'adif': 35,
-            'latitude': -10.5,
-            'continent': u'OC'
-           }
+           >>> my_lookuplib = LookupLib(lookuptype="clublogxml", apikey="myapikey")
+           >>> print my_lookuplib.lookup_zone_exception("DP0GVN")
+           38
+
+           The prefix "DP" It is assigned to Germany, but the station is located in Antarctica, and therefore
+           in CQ Zone 38
 
         Note:
             This method is available for
 
             - clublogxml
-            - clublogapi
-            - countryfile
-            - qrz.com
             - redis
-
+            - snapshot
+            - shared
+            - sqlite
 
         """
+
         callsign = callsign.strip().upper()
-        if timestamp is None:
-            timestamp = datetime.now(timezone.utc)
 
-        if self._lookuptype == "clublogapi":
-            callsign_data =  self._lookup_clublogAPI(callsign=callsign, timestamp=timestamp, apikey=self._apikey)
-            if callsign_data[const.ADIF]==1000:
+        if self._lookuptype == "clublogxml" or self._lookuptype == "snapshot" or self._lookuptype == "shared" or self._lookuptype == "sqlite":
+
+            data = self._data
+            record_id = self._find_record(callsign, timestamp, data, "zone_exceptions")
+            if record_id is None:
                 raise KeyError
-            else:
-                return callsign_data
+            return data["zone_exceptions"][record_id][const.CQZ]
 
-        elif self._lookuptype == "clublogxml" or self._lookuptype == "countryfile":
+        elif self._lookuptype == "redis":
 
-            return self._check_data_for_date(callsign, timestamp, self._callsign_exceptions, self._callsign_exceptions_index)
+            data_dict, index = self._get_dicts_from_redis("_zone_ex_", "_zone_ex_index_", self._redis_prefix, callsign)
+            return self._check_zone_exception_for_date(callsign, timestamp, data_dict, index)
 
-        elif self._lookuptype == "redis":
+        #no matching case
+        raise KeyError
 
-            data_dict, index = self._get_dicts_from_redis("_call_ex_", "_call_ex_index_", self._redis_prefix, callsign)
-            return self._check_data_for_date(callsign, timestamp, data_dict, index)
+    def get_callsign(self, callsign, timestamp=None, default=None):
+        """
+        Returns lookup data if an exception exists for a callsign. Same as :py:meth:`lookup_callsign`,
+        but instead of raising a KeyError, default is returned when no matching callsign is found.
 
-        # no matching case
-        elif self._lookuptype == "qrz":
-            return self._lookup_qrz_callsign(callsign, self._apikey, self._apiv)
+        Args:
+            callsign (string): Amateur radio callsign
+            timestamp (datetime, optional): datetime in UTC (tzinfo=timezone.utc)
+            default (optional): Value returned when no matching callsign is found
 
-        raise KeyError("unknown Callsign")
+        Returns:
+            dict: Dictionary containing the country specific data of the callsign, or default
 
-    def _get_dicts_from_redis(self, name, index_name, redis_prefix, item):
         """
-        Retrieve the data of an item from redis and put it in an index and data dictionary to match the
-        common query interface.
-        """
-        r = self._redis
-        data_dict = {}
-        data_index_dict = {}
+        if self._lookuptype == "clublogxml" or self._lookuptype == "countryfile" or self._lookuptype == "snapshot" or self._lookuptype == "shared" or self._lookuptype == "sqlite":
+            return self._get_data_for_date(callsign.strip().upper(), timestamp, self._data, "call_exceptions", default)
 
-        if redis_prefix is None:
-            raise KeyError ("redis_prefix is missing")
-
-        if r.scard(redis_prefix + index_name + str(item)) > 0:
-            data_index_dict[str(item)] = r.smembers(redis_prefix + index_name + str(item))
+        try:
+            return self.lookup_callsign(callsign, timestamp)
+        except KeyError:
+            return default
 
-            for i in data_index_dict[item]:
-                json_data = r.get(redis_prefix + name + str(int(i)))
-                data_dict[i] = self._deserialize_data(json_data)
+    def get_prefix(self, prefix, timestamp=None, default=None):
+        """
+        Returns lookup data of a Prefix. Same as :py:meth:`lookup_prefix`, but instead of raising a
+        KeyError, default is returned when no matching Prefix is found.
 
-            return (data_dict, data_index_dict)
+        Args:
+            prefix (string): Prefix of a Amateur Radio callsign
+            timestamp (datetime, optional): datetime in UTC (tzinfo=timezone.utc)
+            default (optional): Value returned when no matching Prefix is found
 
-        raise KeyError ("No Data found in Redis for "+ item)
+        Returns:
+            dict: Dictionary containing the country specific data of the Prefix, or default
 
-    def _check_data_for_date(self, item, timestamp, data_dict, data_index_dict):
-        """
-        Checks if the item is found in the index. An entry in the index points to the data
-        in the data_dict. This is mainly used retrieve callsigns and prefixes.
-        In case data is found for item, a dict containing the data is returned. Otherwise a KeyError is raised.
         """
+        if self._lookuptype == "clublogxml" or self._lookuptype == "countryfile" or self._lookuptype == "snapshot" or self._lookuptype == "shared" or self._lookuptype == "sqlite":
+            return self._get_data_for_date(prefix.strip().upper(), timestamp, self._data, "prefixes", default)
 
-        if item in data_index_dict:
-            for item in data_index_dict[item]:
-
-                # startdate < timestamp
-                if const.START in data_dict[item] and not const.END in data_dict[item]:
-                    if data_dict[item][const.START] < timestamp:
-                        item_data = copy.deepcopy(data_dict[item])
-                        del item_data[const.START]
-                        return item_data
+        try:
+            return self.lookup_prefix(prefix, timestamp)
+        except KeyError:
+            return default
 
-                # enddate > timestamp
-                elif not const.START in data_dict[item] and const.END in data_dict[item]:
-                    if data_dict[item][const.END] > timestamp:
-                        item_data = copy.deepcopy(data_dict[item])
-                        del item_data[const.END]
-                        return item_data
-
-                # startdate > timestamp > enddate
-                elif const.START in data_dict[item] and const.END in data_dict[item]:
-                    if data_dict[item][const.START] < timestamp \
-                            and data_dict[item][const.END] > timestamp:
-                        item_data = copy.deepcopy(data_dict[item])
-                        del item_data[const.START]
-                        del item_data[const.END]
-                        return item_data
-
-                # no startdate or enddate available
-                elif not const.START in data_dict[item] and not const.END in data_dict[item]:
-                    return data_dict[item]
+    def get_longest_prefix(self, callsign, timestamp=None, default=None):
+        """
+        Returns lookup data of the longest Prefix which matches the beginning of a callsign. Same as
+        :py:meth:`lookup_longest_prefix`, but instead of raising a KeyError, default is returned when
+        no matching Prefix is found.
 
-        raise KeyError
+        Args:
+            callsign (string): Amateur Radio callsign (or any string starting with a prefix)
+            timestamp (datetime, optional): datetime in UTC (tzinfo=timezone.utc)
+            default (optional): Value returned when no matching Prefix is found
 
+        Returns:
+            dict: Dictionary containing the country specific data of the longest matching Prefix, or default
 
-    def _check_inv_operation_for_date(self, item, timestamp, data_dict, data_index_dict):
         """
-        Checks if the callsign is marked as an invalid operation for a given timestamp.
-        In case the operation is invalid, True is returned. Otherwise a KeyError is raised.
+        if self._lookuptype == "clublogxml" or self._lookuptype == "countryfile" or self._lookuptype == "snapshot" or self._lookuptype == "shared" or self._lookuptype == "sqlite":
+            callsign = callsign.strip().upper().replace(" ", "")
+            prefix_data = self._find_longest_prefix(callsign, timestamp, self._data)
+            if prefix_data is None:
+                return default
+            return prefix_data
+
+        try:
+            return self.lookup_longest_prefix(callsign, timestamp)
+        except KeyError:
+            return default
+
+    def get_invalid_operation(self, callsign, timestamp=None, default=False):
         """
+        Checks if an operation is known as invalid. Same as :py:meth:`is_invalid_operation`, but instead
+        of raising a KeyError, default is returned when no matching callsign is found.
 
-        if item in data_index_dict:
-            for item in data_index_dict[item]:
+        Args:
+            callsign (string): Amateur Radio callsign
+            timestamp (datetime, optional): datetime in UTC (tzinfo=timezone.utc)
+            default (optional): Value returned when no matching callsign is found
 
-                # startdate < timestamp
-                if const.START in data_dict[item] and not const.END in data_dict[item]:
-                    if data_dict[item][const.START] < timestamp:
-                        return True
+        Returns:
+            bool: True if a record exists for this callsign (at the given time), otherwise default
 
-                # enddate > timestamp
-                elif not const.START in data_dict[item] and const.END in data_dict[item]:
-                    if data_dict[item][const.END] > timestamp:
-                        return True
+        """
+        if self._lookuptype == "clublogxml" or self._lookuptype == "countryfile" or self._lookuptype == "snapshot" or self._lookuptype == "shared" or self._lookuptype == "sqlite":
+            if self._find_record(callsign.strip().upper(), timestamp, self._data, "invalid_operations") is None:
+                return default
+            return True
 
-                # startdate > timestamp > enddate
-                elif const.START in data_dict[item] and const.END in data_dict[item]:
-                    if data_dict[item][const.START] < timestamp \
-                            and data_dict[item][const.END] > timestamp:
-                        return True
+        try:
+            return self.is_invalid_operation(callsign, timestamp)
+        except KeyError:
+            return default
 
-                # no startdate or enddate available
-                elif not const.START in data_dict[item] and not const.END in data_dict[item]:
-                    return True
+    def get_zone_exception(self, callsign, timestamp=None, default=None):
+        """
+        Returns a CQ Zone if an exception exists for the given callsign. Same as :py:meth:`lookup_zone_exception`,
+        but instead of raising a KeyError, default is returned when no matching callsign is found.
 
-        raise KeyError
+        Args:
+            callsign (string): Amateur radio callsign
+            timestamp (datetime, optional): datetime in UTC (tzinfo=timezone.utc)
+            default (optional): Value returned when no matching callsign is found
 
+        Returns:
+            int: Value of the the CQ Zone exception which exists for this callsign (at the given time), or default
 
-    def lookup_prefix(self, prefix, timestamp=None):
         """
-        Returns lookup data of a Prefix
+        if self._lookuptype == "clublogxml" or self._lookuptype == "countryfile" or self._lookuptype == "snapshot" or self._lookuptype == "shared" or self._lookuptype == "sqlite":
+            data = self._data
+            record_id = self._find_record(callsign.strip().upper(), timestamp, data, "zone_exceptions")
+            if record_id is None:
+                return default
+            return data["zone_exceptions"][record_id][const.CQZ]
+
+        try:
+            return self.lookup_zone_exception(callsign, timestamp)
+        except KeyError:
+            return default
+
+    def resolve_callsign(self, callsign, timestamp=None, prefix=None):
+        """
+        Returns the data of a callsign in one step: unless the operation is invalid, the data of the
+        callsign exception or else of the longest matching prefix, with the CQ Zone exception applied.
 
         Args:
-            prefix (string): Prefix of a Amateur Radio callsign
+            callsign (string): Amateur radio callsign
             timestamp (datetime, optional): datetime in UTC (tzinfo=timezone.utc)
+            prefix (string, optional): String used for the longest prefix match instead of the callsign
 
         Returns:
-            dict: Dictionary containing the country specific data of the Prefix
+            dict: Dictionary containing the callsign specific data
 
         Raises:
-            KeyError: No matching Prefix found
-            APIKeyMissingError: API Key for Clublog missing or incorrect
+            KeyError: Invalid operation or no matching exception / prefix found
 
         Example:
-           The following code shows how to obtain the information for the prefix "DH" from the countryfile.com
-           database (default database).
+           The following code resolves a callsign which has an exception and a CQ zone exception
 
            >>> from pyhamtools import LookupLib
-           >>> myLookupLib = LookupLib()
-           >>> print myLookupLib.lookup_prefix("DH")
+           >>> import redis
+           >>> r = redis.Redis()
+           >>> my_lookuplib = LookupLib(lookuptype="redis", redis_instance=r, redis_prefix="CLX")
+           >>> my_lookuplib.resolve_callsign("VK9XO")
            {
-            'adif': 230,
-            'country': u'Fed. Rep. of Germany',
-            'longitude': 10.0,
-            'cqz': 14,
-            'ituz': 28,
-            'latitude': 51.0,
-            'continent': u'EU'
+            'adif': 35,
+            'country': u'CHRISTMAS ISLAND',
+            'continent': u'OC',
+            'latitude': -10.48,
+            'longitude': 105.62,
+            'cqz': 29
            }
 
         Note:
-            This method is available for
-
-            - clublogxml
-            - countryfile
-            - redis
+            This corresponds to :py:meth:`Callinfo.get_all` for callsigns without prefix or appendix.
+            With redis, callsigns which have exceptions, invalid operations or zone exceptions are
+            resolved by a server-side script (see REDIS_LUA_RESOLVE_SCRIPT) in a single round trip.
 
         """
+        callsign = callsign.strip().upper()
+        if prefix is None:
+            prefix = callsign
 
-        prefix = prefix.strip().upper()
-        if timestamp is None:
-            timestamp = datetime.now(timezone.utc)
+        has_records = self.has_callsign_records(callsign)
 
-        if self._lookuptype == "clublogxml" or self._lookuptype == "countryfile":
+        if has_records and self._lookuptype == "redis" and self._redis_scripting:
+            return self._resolve_callsign_in_redis(callsign, timestamp, prefix)
 
-            return self._check_data_for_date(prefix, timestamp, self._prefixes, self._prefixes_index)
+        if has_records and self.get_invalid_operation(callsign, timestamp):
+            raise KeyError
 
-        elif self._lookuptype == "redis":
+        data = None
+        if has_records:
+            data = self.get_callsign(callsign, timestamp)
+        if data is None:
+            data = self.get_longest_prefix(prefix, timestamp)
+        if data is None:
+            raise KeyError
 
-            data_dict, index = self._get_dicts_from_redis("_prefix_", "_prefix_index_", self._redis_prefix, prefix)
-            return self._check_data_for_date(prefix, timestamp, data_dict, index)
+        data = dict(data)
+        if has_records:
+            cqz = self.get_zone_exception(callsign, timestamp)
+            if cqz is not None:
+                data[const.CQZ] = cqz
+        return data
 
-        # no matching case
-        raise KeyError
+    def _resolve_callsign_in_redis(self, callsign, timestamp, prefix):
+        """
+        Resolve a callsign with a single call of REDIS_LUA_RESOLVE_SCRIPT (see resolve_callsign)
+        """
+        namespace = self._get_redis_namespace()
+        self._register_redis_scripts()
+        reply = self._redis_resolve_script(keys=[], args=self._get_resolve_script_args(namespace, callsign, prefix, timestamp),
+                                           client=self._redis)
+        return self._decode_resolve_script_reply(reply)
 
-    def is_invalid_operation(self, callsign, timestamp=None):
+    def _get_data_for_date(self, item, timestamp, data, name, default=None):
         """
-        Returns True if an operations is known as invalid
+        Returns the view of the record of item in the data dict name (e.g. "prefixes") of a data set
+        which is valid at the timestamp (or right now, if timestamp is None), or default
+        """
+        record_id = self._find_record(item, timestamp, data, name)
+        if record_id is None:
+            return default
+        return data[name + "_views"][record_id]
+
+    def lookup_callsigns(self, callsigns, timestamp=None):
+        """
+        Returns the lookup data of several callsigns (see :py:meth:`lookup_callsign`)
 
         Args:
-            callsign (string): Amateur Radio callsign
-            timestamp (datetime, optional): datetime in UTC (tzinfo=timezone.utc)
+            callsigns (iterable): Amateur radio callsigns
+            timestamp (datetime or list of datetime, optional): datetime in UTC (tzinfo=timezone.utc), either
+            one for all callsigns or one per callsign
 
         Returns:
-            bool: True if a record exists for this callsign (at the given time)
+            list: Lookup data of the callsigns, in the order of the input. None for callsigns without
+            a matching exception.
 
         Raises:
-            KeyError: No matching callsign found
             APIKeyMissingError: API Key for Clublog missing or incorrect
+            ValueError: The number of timestamps does not match the number of callsigns
 
         Example:
-           The following code checks the Clublog XML database if the operation is valid for two dates.
+           The following code looks up the exceptions of a list of callsigns
 
            >>> from pyhamtools import LookupLib
-           >>> from datetime import datetime, timezone
            >>> my_lookuplib = LookupLib(lookuptype="clublogxml", apikey="myapikey")
-           >>> print my_lookuplib.is_invalid_operation("5W1CFN")
-           True
-           >>> try:
-           >>>   timestamp = datetime(year=2012, month=1, day=31, tzinfo=timezone.utc)
-           >>>   my_lookuplib.is_invalid_operation("5W1CFN", timestamp)
-           >>> except KeyError:
-           >>>   print "Seems to be invalid operation before 31.1.2012"
-           Seems to be an invalid operation before 31.1.2012
+           >>> results = my_lookuplib.lookup_callsigns(["VK9XO", "DH1TW"])
+           >>> print(results[1])
+           None
 
         Note:
             This method is available for
 
             - clublogxml
+            - clublogapi
+            - countryfile
+            - qrz.com
             - redis
+            - snapshot
+            - shared
+            - sqlite
 
-        """
+            The data is looked up in one go: directly in the indexes for the file based lookup types,
+            with a few pipelined requests for redis and with concurrent requests for clublogapi and qrz.com.
 
-        callsign = callsign.strip().upper()
-        if timestamp is None:
-            timestamp = datetime.now(timezone.utc)
+        """
+        callsigns, timestamps = self._prepare_bulk_lookup(callsigns, timestamp)
 
-        if self._lookuptype == "clublogxml":
+        if self._lookuptype == "clublogxml" or self._lookuptype == "countryfile" or self._lookuptype == "snapshot" or self._lookuptype == "shared" or self._lookuptype == "sqlite":
 
-            return self._check_inv_operation_for_date(callsign, timestamp, self._invalid_operations, self._invalid_operations_index)
+            data = self._data
+            return [self._get_data_for_date(callsign, timestamp, data, "call_exceptions") for callsign, timestamp in zip(callsigns, timestamps)]
 
         elif self._lookuptype == "redis":
 
-            data_dict, index = self._get_dicts_from_redis("_inv_op_", "_inv_op_index_", self._redis_prefix, callsign)
-            return self._check_inv_operation_for_date(callsign, timestamp, data_dict, index)
+            bulk_dicts = self._get_bulk_dicts_from_redis("_call_ex_", "_call_ex_index_", callsigns)
+            return self._complete_redis_records(self._check_bulk_data_for_date(callsigns, timestamps, bulk_dicts))
 
-        #no matching case
-        raise KeyError
+        elif self._lookuptype == "clublogapi" or self._lookuptype == "qrz":
+            return self._lookup_bulk_concurrently(self.lookup_callsign, callsigns, timestamps)
 
+        # no matching case
+        return [None] * len(callsigns)
 
-    def _check_zone_exception_for_date(self, item, timestamp, data_dict, data_index_dict):
+    def lookup_prefixes(self, prefixes, timestamp=None):
         """
-        Checks the index and data if a cq-zone exception exists for the callsign
-        When a zone exception is found, the zone is returned. If no exception is found
-        a KeyError is raised
+        Returns the lookup data of several prefixes (see :py:meth:`lookup_prefix`)
 
-        """
-        if item in data_index_dict:
-            for item in data_index_dict[item]:
+        Args:
+            prefixes (iterable): Prefixes of Amateur Radio callsigns
+            timestamp (datetime or list of datetime, optional): datetime in UTC (tzinfo=timezone.utc), either
+            one for all prefixes or one per prefix
 
-                # startdate < timestamp
-                if const.START in data_dict[item] and not const.END in data_dict[item]:
-                    if data_dict[item][const.START] < timestamp:
-                        return data_dict[item][const.CQZ]
+        Returns:
+            list: Lookup data of the prefixes, in the order of the input. None for unknown prefixes.
 
-                # enddate > timestamp
-                elif not const.START in data_dict[item] and const.END in data_dict[item]:
-                    if data_dict[item][const.END] > timestamp:
-                        return data_dict[item][const.CQZ]
+        Raises:
+            ValueError: The number of timestamps does not match the number of prefixes
+
+        Note:
+            This method is available for
 
-                # startdate > timestamp > enddate
-                elif const.START in data_dict[item] and const.END in data_dict[item]:
-                    if data_dict[item][const.START] < timestamp \
-                            and data_dict[item][const.END] > timestamp:
-                        return data_dict[item][const.CQZ]
+            - clublogxml
+            - countryfile
+            - redis
+            - snapshot
+            - shared
+            - sqlite
+
+        """
+        prefixes, timestamps = self._prepare_bulk_lookup(prefixes, timestamp)
 
-                # no startdate or enddate available
-                elif not const.START in data_dict[item] and not const.END in data_dict[item]:
-                        return data_dict[item][const.CQZ]
+        if self._lookuptype == "clublogxml" or self._lookuptype == "countryfile" or self._lookuptype == "snapshot" or self._lookuptype == "shared" or self._lookuptype == "sqlite":
 
-        raise KeyError
+            data = self._data
+            return [self._get_data_for_date(prefix, timestamp, data, "prefixes") for prefix, timestamp in zip(prefixes, timestamps)]
 
+        elif self._lookuptype == "redis":
 
-    def lookup_zone_exception(self, callsign, timestamp=None):
+            bulk_dicts = self._get_bulk_dicts_from_redis("_prefix_", "_prefix_index_", prefixes)
+            return self._complete_redis_records(self._check_bulk_data_for_date(prefixes, timestamps, bulk_dicts))
+
+        # no matching case
+        return [None] * len(prefixes)
+
+    def lookup_longest_prefixes(self, callsigns, timestamp=None):
         """
-        Returns a CQ Zone if an exception exists for the given callsign
+        Returns the lookup data of the longest matching Prefix of several callsigns
+        (see :py:meth:`lookup_longest_prefix`)
 
         Args:
-        callsign (string): Amateur radio callsign
-        timestamp (datetime, optional): datetime in UTC (tzinfo=timezone.utc)
+            callsigns (iterable): Amateur radio callsigns
+            timestamp (datetime or list of datetime, optional): datetime in UTC (tzinfo=timezone.utc), either
+            one for all callsigns or one per callsign
 
         Returns:
-            int: Value of the the CQ Zone exception which exists for this callsign (at the given time)
+            list: Lookup data of the longest matching Prefix of each callsign, in the order of the input.
+            None for callsigns without matching Prefix.
 
         Raises:
-            KeyError: No matching callsign found
-            APIKeyMissingError: API Key for Clublog missing or incorrect
+            ValueError: The number of timestamps does not match the number of callsigns
 
-        Example:
-           The following code checks the Clublog XML database if a CQ Zone exception exists for the callsign DP0GVN.
+        Note:
+            With redis, all beginnings of all callsigns are retrieved at once, in batches of
+            REDIS_BULK_BATCH_SIZE keys per request, and the longest matches are resolved locally.
 
-           >>> from pyhamtools import LookupLib
-           >>> my_lookuplib = LookupLib(lookuptype="clublogxml", apikey="myapikey")
-           >>> print my_lookuplib.lookup_zone_exception("DP0GVN")
-           38
+            This method is available for
 
-           The prefix "DP" It is assigned to Germany, but the station is located in Antarctica, and therefore
-           in CQ Zone 38
+            - clublogxml
+            - countryfile
+            - redis
+            - snapshot
+            - shared
+            - sqlite
+
+        """
+        callsigns, timestamps = self._prepare_bulk_lookup(callsigns, timestamp)
+        callsigns = [callsign.replace(" ", "") for callsign in callsigns]
+
+        if self._lookuptype == "clublogxml" or self._lookuptype == "countryfile" or self._lookuptype == "snapshot" or self._lookuptype == "shared" or self._lookuptype == "sqlite":
+
+            data = self._data
+            return [self._find_longest_prefix(callsign, timestamp, data) for callsign, timestamp in zip(callsigns, timestamps)]
+
+        elif self._lookuptype == "redis":
+
+            prefixes = self._get_bulk_prefix_candidates(callsigns)
+            data_dicts = {}
+            for i in range(0, len(prefixes), REDIS_BULK_BATCH_SIZE):
+                batch = prefixes[i:i+REDIS_BULK_BATCH_SIZE]
+                data_dicts.update(zip(batch, self._get_redis_records(batch, "_prefix_", "_prefix_index_")))
+            return self._resolve_bulk_longest_prefixes(callsigns, timestamps, data_dicts)
+
+        # no matching case
+        return [None] * len(callsigns)
+
+    def is_invalid_operations(self, callsigns, timestamp=None):
+        """
+        Checks for several callsigns if the operation is known as invalid (see :py:meth:`is_invalid_operation`)
+
+        Args:
+            callsigns (iterable): Amateur radio callsigns
+            timestamp (datetime or list of datetime, optional): datetime in UTC (tzinfo=timezone.utc), either
+            one for all callsigns or one per callsign
+
+        Returns:
+            list: True for the callsigns which are known as invalid operations (at the given time),
+            otherwise False. In the order of the input.
+
+        Raises:
+            ValueError: The number of timestamps does not match the number of callsigns
 
         Note:
             This method is available for
 
             - clublogxml
             - redis
+            - snapshot
+            - shared
+            - sqlite
 
         """
+        callsigns, timestamps = self._prepare_bulk_lookup(callsigns, timestamp)
 
-        callsign = callsign.strip().upper()
-        if timestamp is None:
-            timestamp = datetime.now(timezone.utc)
+        if self._lookuptype == "clublogxml" or self._lookuptype == "snapshot" or self._lookuptype == "shared" or self._lookuptype == "sqlite":
 
-        if self._lookuptype == "clublogxml":
+            data = self._data
+            return [self._find_record(callsign, timestamp, data, "invalid_operations") is not None
+                    for callsign, timestamp in zip(callsigns, timestamps)]
+
+        elif self._lookuptype == "redis":
+
+            bulk_dicts = self._get_bulk_dicts_from_redis("_inv_op_", "_inv_op_index_", callsigns)
+            return [item_dicts is not None and self._find_record_for_date(callsign, timestamp, item_dicts[0], item_dicts[1]) is not None
+                    for callsign, timestamp, item_dicts in zip(callsigns, timestamps, bulk_dicts)]
+
+        # no matching case
+        return [False] * len(callsigns)
 
-            return self._check_zone_exception_for_date(callsign, timestamp, self._zone_exceptions, self._zone_exceptions_index)
+    def _get_bulk_dicts_from_redis(self, name, index_name, items):
+        """
+        Bulk version of _get_dicts_from_redis. The indexes of all items are retrieved in one pipeline and
+        the records in another one. Returns a list with a (data_dict, data_index_dict) tuple for each item,
+        or None if the item is not found.
+        """
+        namespace, revision, filters = self._get_redis_state()
+        unique_items = self._get_filtered_bulk_items(filters, index_name, items)
+        pipe = self._redis.pipeline(transaction=False)
+        self._queue_redis_index_members(pipe, namespace, unique_items, index_name)
+        members = self._decode_redis_index_members(pipe.execute())
+
+        records = {}
+        record_ids = self._get_redis_record_ids(members)
+        if record_ids:
+            pipe = self._redis.pipeline(transaction=False)
+            self._queue_redis_records(pipe, namespace, name, record_ids)
+            records = self._decode_redis_records(record_ids, pipe.execute())
+
+        return self._assemble_bulk_dicts(items, unique_items, members, records)
+
+    def _complete_redis_records(self, records):
+        """
+        Complete (normalized) records retrieved from redis with the fields of their entities.
+        The missing entities are retrieved with one pipeline.
+        """
+        adifs = self._get_incomplete_adifs(records)
+        if not adifs:
+            return records
 
-        elif self._lookuptype == "redis":
+        namespace = self._get_redis_namespace()
+        pipe = self._redis.pipeline(transaction=False)
+        self._queue_redis_entities(pipe, namespace, adifs)
+        return self._complete_records_with_entities(records, adifs, pipe.execute())
 
-            data_dict, index = self._get_dicts_from_redis("_zone_ex_", "_zone_ex_index_", self._redis_prefix, callsign)
-            return self._check_zone_exception_for_date(callsign, timestamp, data_dict, index)
+    def _lookup_bulk_concurrently(self, lookup, items, timestamps):
+        """
+        Execute a lookup method (e.g. an online lookup) for several items with concurrent requests.
+        Returns a list with the result of each item, or None if the item is not found.
+        """
+        def lookup_item(item, timestamp):
+            try:
+                return lookup(item, timestamp)
+            except KeyError:
+                return None
 
-        #no matching case
-        raise KeyError
+        with ThreadPoolExecutor(max_workers=BULK_REQUEST_WORKERS) as executor:
+            return list(executor.map(lookup_item, items, timestamps))
 
     def _lookup_clublogAPI(self, callsign=None, timestamp=None, url="https://cdn.clublog.org/dxcc", apikey=None):
         """ Set up the Lookup object for Clublog Online API
@@ -947,6 +3886,7 @@ class LookupLib(object):
                         apikey=None,
                         cty_file=None):
         """ Load and process the ClublogXML file either as a download or from file
+        and return the lookup data
         """
 
         if self._download:
@@ -954,27 +3894,14 @@ class LookupLib(object):
                     url = url,
                     apikey = apikey)
         else:
-            cty_file = self._lib_filename
+            cty_file = self._open_file(self._lib_filename)
 
-        header = self._extract_clublog_header(cty_file)
-        cty_file = self._remove_clublog_xml_header(cty_file)
-        cty_dict = self._parse_clublog_xml(cty_file)
-
-        self._entities = cty_dict["entities"]
-        self._callsign_exceptions = cty_dict["call_exceptions"]
-        self._prefixes = cty_dict["prefixes"]
-        self._invalid_operations = cty_dict["invalid_operations"]
-        self._zone_exceptions = cty_dict["zone_exceptions"]
-
-        self._callsign_exceptions_index = cty_dict["call_exceptions_index"]
-        self._prefixes_index = cty_dict["prefixes_index"]
-        self._invalid_operations_index = cty_dict["invalid_operations_index"]
-        self._zone_exceptions_index = cty_dict["zone_exceptions_index"]
-
-        if self._download:
-            self._cleanup_download_artifact(cty_file)
+        try:
+            cty_dict = self._parse_clublog_xml(cty_file)
+        finally:
+            cty_file.close()
 
-        return True
+        return cty_dict
 
     def _load_countryfile(self,
                          url="https://www.country-files.com/cty/cty.plist",
@@ -1000,161 +3927,68 @@ class LookupLib(object):
         if self._download:
             cty_file = self._download_file(url=url)
         else:
-            cty_file = os.path.abspath(cty_file)
+            cty_file = self._open_file(cty_file)
 
-        cty_dict = self._parse_country_file(cty_file, country_mapping_filename)
-        self._callsign_exceptions = cty_dict["exceptions"]
-        self._prefixes = cty_dict["prefixes"]
-        self._callsign_exceptions_index = cty_dict["exceptions_index"]
-        self._prefixes_index = cty_dict["prefixes_index"]
-
-        if self._download:
-            self._cleanup_download_artifact(cty_file)
+        try:
+            cty_dict = self._parse_country_file(cty_file, country_mapping_filename)
+        finally:
+            cty_file.close()
 
-        return True
+        return cty_dict
 
     def _download_file(self, url, apikey=None):
         """ Download lookup files either from Clublog or Country-files.com
-        """
-        import gzip
-        import tempfile
 
-        cty = {}
-        cty_date = ""
-        cty_file_path = None
-
-        filename = None
+        The HTTP body is not stored on disk. A file object is returned which
+        streams the (if necessary decompressed) content directly into the parser.
+        """
 
         # download file
         if apikey: # clublog
-            response = requests.get(url+"?api="+apikey, timeout=10)
+            response = requests.get(url+"?api="+apikey, timeout=10, stream=True)
         else: # country-files.com
-            response = requests.get(url, timeout=10)
-
-        if not self._check_html_response(response):
-            raise LookupError
-
-        #Clublog Webserver Header
-        if "Content-Disposition" in response.headers:
-            f = re.search('filename=".+"', response.headers["Content-Disposition"])
-            if f:
-                f = f.group(0)
-                filename = re.search('".+"', f).group(0).replace('"', '')
-
-        #Country-files.org webserver header
-        else:
-            f = re.search('/.{4}plist$', url)
-            if f:
-                f = f.group(0)
-                filename = f[1:]
-
-        if not filename:
-            filename = "cty_" + self._generate_random_word(5)
-
-        download_file_path = os.path.join(tempfile.gettempdir(), filename)
-        with open(download_file_path, "wb") as download_file:
-            download_file.write(response.content)
-        self._logger.debug(str(download_file_path) + " successfully downloaded")
-
-        # unzip file, if gz
-        if os.path.splitext(download_file_path)[1][1:] == "gz":
-
-            download_file = gzip.open(download_file_path, "r")
-            try:
-                cty_file_path = os.path.join(os.path.splitext(download_file_path)[0])
-                with open(cty_file_path, "wb") as cty_file:
-                    cty_file.write(download_file.read())
-                self._logger.debug(str(cty_file_path) + " successfully extracted")
-            finally:
-                download_file.close()
-        else:
-            cty_file_path = download_file_path
-
-        return cty_file_path
-
-    def _cleanup_download_artifact(self, filename):
-        """
-        Delete the downloaded files which are not necessary anymore
-
-        Args:
-            filename (string): absolute path to the download artifact
-        """
+            response = requests.get(url, timeout=10, stream=True)
 
+        # the response is closed together with the returned file object
         try:
-            os.remove(filename)
-        except:
-            self._logger.warning("unable delete the download artifact: %s", _download_file)
-
-    def _extract_clublog_header(self, cty_xml_filename):
-        """
-        Extract the header of the Clublog XML File
-        """
+            if not self._check_html_response(response):
+                raise LookupError
 
-        cty_header = {}
+            self._logger.debug(url + " successfully requested")
 
-        try:
-            with open(cty_xml_filename, "r") as cty:
-                raw_header = cty.readline()
-
-            cty_date = re.search("date='.+'", raw_header)
-            if cty_date:
-                cty_date = cty_date.group(0).replace("date=", "").replace("'", "")
-                cty_date = datetime.strptime(cty_date[:19], '%Y-%m-%dT%H:%M:%S')
-                cty_date.replace(tzinfo=timezone.utc)
-                cty_header["Date"] = cty_date
-
-            cty_ns = re.search("xmlns='.+[']", raw_header)
-            if cty_ns:
-                cty_ns = cty_ns.group(0).replace("xmlns=", "").replace("'", "")
-                cty_header['NameSpace'] = cty_ns
-
-            if len(cty_header) == 2:
-                self._logger.debug("Header successfully retrieved from CTY File")
-            elif len(cty_header) < 2:
-                self._logger.warning("Header could only be partially retrieved from CTY File")
-                self._logger.warning("Content of Header: ")
-                for key in cty_header:
-                    self._logger.warning(str(key)+": "+str(cty_header[key]))
-            return cty_header
-
-        except Exception as e:
-            self._logger.error("Clublog CTY File could not be opened / modified")
-            self._logger.error("Error Message: " + str(e))
-            return
+            return self._decompress_stream(_IterStream(response.iter_content(chunk_size=64*1024), response.close))
+        except Exception:
+            response.close()
+            raise
 
+    def _open_file(self, filename):
+        """ Open a local lookup file (optionally gzip compressed) for reading
+        """
+        return self._decompress_stream(open(os.path.abspath(filename), "rb"))
 
-    def _remove_clublog_xml_header(self, cty_xml_filename):
+    def _decompress_stream(self, stream):
         """
-            remove the header of the Clublog XML File to make it
-            properly parseable for the python ElementTree XML parser
+        Wrap a binary stream into a buffered reader. If the stream contains gzip
+        compressed data (e.g. cty.xml.gz from Clublog), it is decompressed on the fly.
         """
-        import tempfile
-
-        try:
-            with open(cty_xml_filename, "r") as f:
-                content = f.readlines()
-
-            cty_dir = tempfile.gettempdir()
-            cty_name = os.path.split(cty_xml_filename)[1]
-            cty_xml_filename_no_header = os.path.join(cty_dir, "NoHeader_"+cty_name)
-
-            with open(cty_xml_filename_no_header, "w") as f:
-                f.writelines("<clublog>\n\r")
-                f.writelines(content[1:])
-
-            self._logger.debug("Header successfully modified for XML Parsing")
-            return cty_xml_filename_no_header
+        import gzip
 
-        except Exception as e:
-            self._logger.error("Clublog CTY could not be opened / modified")
-            self._logger.error("Error Message: " + str(e))
-            return
+        stream = io.BufferedReader(stream)
+        if stream.peek(2)[:2] == b"\x1f\x8b":
+            self._logger.debug("decompressing gzip stream")
+            return gzip.GzipFile(fileobj=stream, mode="rb")
+        return stream
 
-    def _parse_clublog_xml(self, cty_xml_filename):
+    def _parse_clublog_xml(self, cty_xml_file):
         """
         parse the content of a clublog XML file and return the
         parsed values in dictionaries
 
+        The file is parsed incrementally. Each record is processed as soon
+        as it has been read completely and is then removed from the element
+        tree, so that the whole document never has to be held in memory. The
+        namespaced Clublog header is handled directly by the parser.
+
         """
 
         entities = {}
@@ -1168,187 +4002,95 @@ class LookupLib(object):
         invalid_operations_index = {}
         zone_exceptions_index = {}
 
-        cty_tree = ET.parse(cty_xml_filename)
-        root = cty_tree.getroot()
+        record_counter = {
+            "entities" : 0,
+            "exceptions" : 0,
+            "prefixes" : 0,
+            "invalid_operations" : 0,
+            "zone_exceptions" : 0,
+        }
+
+        # identical datetimes are shared between the records
+        shared_values = {}
 
-        #retrieve ADIF Country Entities
-        cty_entities = cty_tree.find("entities")
-        self._logger.debug("total entities: " + str(len(cty_entities)))
-        if len(cty_entities) > 1:
-            for cty_entity in cty_entities:
-                try:
-                    entity = {}
-                    for item in cty_entity:
-                        if item.tag == "name":
-                            entity[const.COUNTRY] = str(item.text)
-                            self._logger.debug(str(item.text))
-                        elif item.tag == "prefix":
-                            entity[const.PREFIX] = str(item.text)
-                        elif item.tag == "deleted":
-                            if item.text == "TRUE":
-                                entity[const.DELETED] = True
-                            else:
-                                entity[const.DELETED] = False
-                        elif item.tag == "cqz":
-                            entity[const.CQZ] = int(item.text)
-                        elif item.tag == "cont":
-                            entity[const.CONTINENT] = str(item.text)
-                        elif item.tag == "long":
-                            entity[const.LONGITUDE] = float(item.text)
-                        elif item.tag == "lat":
-                            entity[const.LATITUDE] = float(item.text)
-                        elif item.tag == "start":
-                            dt = datetime.strptime(item.text[:19], '%Y-%m-%dT%H:%M:%S')
-                            entity[const.START] = dt.replace(tzinfo=timezone.utc)
-                        elif item.tag == "end":
-                            dt = datetime.strptime(item.text[:19], '%Y-%m-%dT%H:%M:%S')
-                            entity[const.END] = dt.replace(tzinfo=timezone.utc)
-                        elif item.tag == "whitelist":
-                            if item.text == "TRUE":
-                                entity[const.WHITELIST] = True
-                            else:
-                                entity[const.WHITELIST] = False
-                        elif item.tag == "whitelist_start":
-                            dt = datetime.strptime(item.text[:19], '%Y-%m-%dT%H:%M:%S')
-                            entity[const.WHITELIST_START] = dt.replace(tzinfo=timezone.utc)
-                        elif item.tag == "whitelist_end":
-                            dt = datetime.strptime(item.text[:19], '%Y-%m-%dT%H:%M:%S')
-                            entity[const.WHITELIST_END] = dt.replace(tzinfo=timezone.utc)
-                except AttributeError:
-                    self._logger.error("Error while processing: ")
-                entities[int(cty_entity[0].text)] = entity
+        depth = 0
+        section = None
+        section_tag = None
+
+        for event, element in ET.iterparse(cty_xml_file, events=("start", "end")):
+
+            if event == "start":
+                depth += 1
+                if depth == 1:
+                    self._log_clublog_header(element)
+                elif depth == 2:
+                    section = element
+                    section_tag = self._strip_xml_namespace(element.tag)
+                continue
+
+            depth -= 1
+            if depth != 2:
+                continue
+
+            # a record (direct child of a section) has been read completely
+            if section_tag == "entities":
+                entity = self._parse_clublog_entity(element)
+                entities[int(element[0].text)] = entity
+
+            elif section_tag == "exceptions":
+                call, call_exception = self._parse_clublog_record(element, shared_values)
+                self._add_to_index(call_exceptions_index, call, int(element.attrib["record"]))
+                call_exceptions[int(element.attrib["record"])] = call_exception
+
+            elif section_tag == "prefixes":
+                call, prefix = self._parse_clublog_record(element, shared_values)
+                self._add_to_index(prefixes_index, call, int(element.attrib["record"]))
+                prefixes[int(element.attrib["record"])] = prefix
+
+            elif section_tag == "invalid_operations":
+                call, invalid_operation = self._parse_clublog_record(element, shared_values)
+                self._add_to_index(invalid_operations_index, call, int(element.attrib["record"]))
+                invalid_operations[int(element.attrib["record"])] = invalid_operation
+
+            elif section_tag == "zone_exceptions":
+                call, zone_exception = self._parse_clublog_record(element, shared_values)
+                self._add_to_index(zone_exceptions_index, call, int(element.attrib["record"]))
+                zone_exceptions[int(element.attrib["record"])] = zone_exception
+
+            if section_tag in record_counter:
+                record_counter[section_tag] += 1
+
+            # free the memory of the processed record
+            section.clear()
+
+        # the records only keep the fields which differ from their entity
+        self._normalize_records(call_exceptions, entities)
+        self._normalize_records(prefixes, entities)
+
+        if record_counter["entities"] > 1:
             self._logger.debug(str(len(entities))+" Entities added")
         else:
             raise Exception("No Country Entities detected in XML File")
 
-
-        cty_exceptions = cty_tree.find("exceptions")
-        if len(cty_exceptions) > 1:
-            for cty_exception in cty_exceptions:
-                call_exception = {}
-                for item in cty_exception:
-                    if item.tag == "call":
-                        call = str(item.text)
-                        if call in call_exceptions_index.keys():
-                            call_exceptions_index[call].append(int(cty_exception.attrib["record"]))
-                        else:
-                            call_exceptions_index[call] = [int(cty_exception.attrib["record"])]
-                    elif item.tag == "entity":
-                        call_exception[const.COUNTRY] = str(item.text)
-                    elif item.tag == "adif":
-                        call_exception[const.ADIF] = int(item.text)
-                    elif item.tag == "cqz":
-                        call_exception[const.CQZ] = int(item.text)
-                    elif item.tag == "cont":
-                        call_exception[const.CONTINENT] = str(item.text)
-                    elif item.tag == "long":
-                        call_exception[const.LONGITUDE] = float(item.text)
-                    elif item.tag == "lat":
-                        call_exception[const.LATITUDE] = float(item.text)
-                    elif item.tag == "start":
-                        dt = datetime.strptime(item.text[:19], '%Y-%m-%dT%H:%M:%S')
-                        call_exception[const.START] = dt.replace(tzinfo=timezone.utc)
-                    elif item.tag == "end":
-                        dt = datetime.strptime(item.text[:19], '%Y-%m-%dT%H:%M:%S')
-                        call_exception[const.END] = dt.replace(tzinfo=timezone.utc)
-                    call_exceptions[int(cty_exception.attrib["record"])] = call_exception
-
+        if record_counter["exceptions"] > 1:
             self._logger.debug(str(len(call_exceptions))+" Exceptions added")
             self._logger.debug(str(len(call_exceptions_index))+" unique Calls in Index ")
-
         else:
             raise Exception("No Exceptions detected in XML File")
 
-
-        cty_prefixes = cty_tree.find("prefixes")
-        if len(cty_prefixes) > 1:
-            for cty_prefix in cty_prefixes:
-                prefix = {}
-                for item in cty_prefix:
-                    pref = None
-                    if item.tag == "call":
-
-                        #create index for this prefix
-                        call = str(item.text)
-                        if call in prefixes_index.keys():
-                            prefixes_index[call].append(int(cty_prefix.attrib["record"]))
-                        else:
-                            prefixes_index[call] = [int(cty_prefix.attrib["record"])]
-                    if item.tag == "entity":
-                        prefix[const.COUNTRY] = str(item.text)
-                    elif item.tag == "adif":
-                        prefix[const.ADIF] = int(item.text)
-                    elif item.tag == "cqz":
-                        prefix[const.CQZ] = int(item.text)
-                    elif item.tag == "cont":
-                        prefix[const.CONTINENT] = str(item.text)
-                    elif item.tag == "long":
-                        prefix[const.LONGITUDE] = float(item.text)
-                    elif item.tag == "lat":
-                        prefix[const.LATITUDE] = float(item.text)
-                    elif item.tag == "start":
-                        dt = datetime.strptime(item.text[:19], '%Y-%m-%dT%H:%M:%S')
-                        prefix[const.START] = dt.replace(tzinfo=timezone.utc)
-                    elif item.tag == "end":
-                        dt = datetime.strptime(item.text[:19], '%Y-%m-%dT%H:%M:%S')
-                        prefix[const.END] = dt.replace(tzinfo=timezone.utc)
-                    prefixes[int(cty_prefix.attrib["record"])] = prefix
-
+        if record_counter["prefixes"] > 1:
             self._logger.debug(str(len(prefixes))+" Prefixes added")
             self._logger.debug(str(len(prefixes_index))+" unique Prefixes in Index")
         else:
             raise Exception("No Prefixes detected in XML File")
 
-        cty_inv_operations = cty_tree.find("invalid_operations")
-        if len(cty_inv_operations) > 1:
-            for cty_inv_operation in cty_inv_operations:
-                invalid_operation = {}
-                for item in cty_inv_operation:
-                    call = None
-                    if item.tag == "call":
-                        call = str(item.text)
-                        if call in invalid_operations_index.keys():
-                            invalid_operations_index[call].append(int(cty_inv_operation.attrib["record"]))
-                        else:
-                            invalid_operations_index[call] = [int(cty_inv_operation.attrib["record"])]
-
-                    elif item.tag == "start":
-                        dt = datetime.strptime(item.text[:19], '%Y-%m-%dT%H:%M:%S')
-                        invalid_operation[const.START] = dt.replace(tzinfo=timezone.utc)
-                    elif item.tag == "end":
-                        dt = datetime.strptime(item.text[:19], '%Y-%m-%dT%H:%M:%S')
-                        invalid_operation[const.END] = dt.replace(tzinfo=timezone.utc)
-                    invalid_operations[int(cty_inv_operation.attrib["record"])] = invalid_operation
-
+        if record_counter["invalid_operations"] > 1:
             self._logger.debug(str(len(invalid_operations))+" Invalid Operations added")
             self._logger.debug(str(len(invalid_operations_index))+" unique Calls in Index")
         else:
             raise Exception("No records for invalid operations detected in XML File")
 
-
-        cty_zone_exceptions = cty_tree.find("zone_exceptions")
-        if len(cty_zone_exceptions) > 1:
-            for cty_zone_exception in cty_zone_exceptions:
-                zoneException = {}
-                for item in cty_zone_exception:
-                    call = None
-                    if item.tag == "call":
-                        call = str(item.text)
-                        if call in zone_exceptions_index.keys():
-                            zone_exceptions_index[call].append(int(cty_zone_exception.attrib["record"]))
-                        else:
-                            zone_exceptions_index[call] = [int(cty_zone_exception.attrib["record"])]
-
-                    elif item.tag == "zone":
-                        zoneException[const.CQZ] = int(item.text)
-                    elif item.tag == "start":
-                        dt = datetime.strptime(item.text[:19], '%Y-%m-%dT%H:%M:%S')
-                        zoneException[const.START] = dt.replace(tzinfo=timezone.utc)
-                    elif item.tag == "end":
-                        dt = datetime.strptime(item.text[:19], '%Y-%m-%dT%H:%M:%S')
-                        zoneException[const.END] = dt.replace(tzinfo=timezone.utc)
-                    zone_exceptions[int(cty_zone_exception.attrib["record"])] = zoneException
-
+        if record_counter["zone_exceptions"] > 1:
             self._logger.debug(str(len(zone_exceptions))+" Zone Exceptions added")
             self._logger.debug(str(len(zone_exceptions_index))+" unique Calls in Index")
         else:
@@ -1367,12 +4109,132 @@ class LookupLib(object):
         }
         return result
 
+    def _log_clublog_header(self, root):
+        """
+        Log the date and namespace from the root element (header) of the Clublog XML File
+        """
+
+        cty_ns = None
+        if root.tag.startswith("{"):
+            cty_ns = root.tag[1:root.tag.index("}")]
+
+        cty_date = root.attrib.get("date")
+
+        if cty_date and cty_ns:
+            self._logger.debug("Header successfully retrieved from CTY File")
+        else:
+            self._logger.warning("Header could only be partially retrieved from CTY File")
+        self._logger.debug("Date: " + str(cty_date) + " NameSpace: " + str(cty_ns))
+
+    def _strip_xml_namespace(self, tag):
+        """
+        Remove the namespace from an ElementTree tag ({namespace}tag -> tag)
+        """
+        return tag.rpartition("}")[2]
+
+    def _add_to_index(self, index, call, record):
+        """
+        Add a record id to the list of records of a call in an index
+        """
+        if call in index:
+            index[call].append(record)
+        else:
+            index[call] = [record]
+
+    def _parse_clublog_datetime(self, text):
+        """
+        Convert a Clublog XML timestamp into a datetime (UTC)
+        """
+        dt = datetime.strptime(text[:19], '%Y-%m-%dT%H:%M:%S')
+        return dt.replace(tzinfo=timezone.utc)
+
+    def _parse_clublog_entity(self, cty_entity):
+        """
+        Parse an entity element of the Clublog XML File
+        """
+        entity = {}
+        try:
+            for item in cty_entity:
+                tag = self._strip_xml_namespace(item.tag)
+                if tag == "name":
+                    entity[const.COUNTRY] = str(item.text)
+                elif tag == "prefix":
+                    entity[const.PREFIX] = str(item.text)
+                elif tag == "deleted":
+                    if item.text == "TRUE":
+                        entity[const.DELETED] = True
+                    else:
+                        entity[const.DELETED] = False
+                elif tag == "cqz":
+                    entity[const.CQZ] = int(item.text)
+                elif tag == "cont":
+                    entity[const.CONTINENT] = str(item.text)
+                elif tag == "long":
+                    entity[const.LONGITUDE] = float(item.text)
+                elif tag == "lat":
+                    entity[const.LATITUDE] = float(item.text)
+                elif tag == "start":
+                    entity[const.START] = self._parse_clublog_datetime(item.text)
+                elif tag == "end":
+                    entity[const.END] = self._parse_clublog_datetime(item.text)
+                elif tag == "whitelist":
+                    if item.text == "TRUE":
+                        entity[const.WHITELIST] = True
+                    else:
+                        entity[const.WHITELIST] = False
+                elif tag == "whitelist_start":
+                    entity[const.WHITELIST_START] = self._parse_clublog_datetime(item.text)
+                elif tag == "whitelist_end":
+                    entity[const.WHITELIST_END] = self._parse_clublog_datetime(item.text)
+        except AttributeError:
+            self._logger.error("Error while processing: ")
+        return entity
+
+    def _parse_clublog_record(self, cty_record, shared_values=None):
+        """
+        Parse an exception, prefix, invalid operation or zone exception element
+        of the Clublog XML File. Returns the call and the record data.
+        Strings are interned; datetimes are shared through the shared_values dict.
+        """
+        if shared_values is None:
+            shared_values = {}
+        call = None
+        record = {}
+        for item in cty_record:
+            tag = self._strip_xml_namespace(item.tag)
+            if tag == "call":
+                call = str(item.text)
+            elif tag == "entity":
+                record[const.COUNTRY] = sys.intern(str(item.text))
+            elif tag == "adif":
+                record[const.ADIF] = int(item.text)
+            elif tag == "cqz" or tag == "zone":
+                record[const.CQZ] = int(item.text)
+            elif tag == "cont":
+                record[const.CONTINENT] = sys.intern(str(item.text))
+            elif tag == "long":
+                record[const.LONGITUDE] = float(item.text)
+            elif tag == "lat":
+                record[const.LATITUDE] = float(item.text)
+            elif tag == "start":
+                if item.text not in shared_values:
+                    shared_values[item.text] = self._parse_clublog_datetime(item.text)
+                record[const.START] = shared_values[item.text]
+            elif tag == "end":
+                if item.text not in shared_values:
+                    shared_values[item.text] = self._parse_clublog_datetime(item.text)
+                record[const.END] = shared_values[item.text]
+        return call, _LookupRecord(record)
+
     def _parse_country_file(self, cty_file, country_mapping_filename=None):
         """
         Parse the content of a PLIST file from country-files.com return the
         parsed values in dictionaries.
         Country-files.com provides Prefixes and Exceptions
 
+        cty_file is a binary file object. Since the plist parser requires a
+        seekable file, the content is read into memory first.
+
         """
 
         import plistlib
@@ -1393,23 +4255,20 @@ class LookupLib(object):
         with open(country_mapping_filename, "r") as f:
             mapping = json.loads(f.read())
 
-        with open(cty_file, 'rb') as f:        
-            try:
-                cty_list = plistlib.load(f) #New API (Python >=3.4)
-            except AttributeError:
-                cty_list = plistlib.readPlist(cty_file) #Old API (Python >=2.7 && <=3.8) 
+        cty_list = plistlib.loads(cty_file.read())
 
         for item in cty_list:
             entry = {}
             call = str(item)
-            entry[const.COUNTRY] = str(cty_list[item]["Country"])
+            entry[const.COUNTRY] = sys.intern(str(cty_list[item]["Country"]))
             if mapping:
                  entry[const.ADIF] = int(mapping[cty_list[item]["Country"]])
             entry[const.CQZ] = int(cty_list[item]["CQZone"])
             entry[const.ITUZ] = int(cty_list[item]["ITUZone"])
-            entry[const.CONTINENT] = str(cty_list[item]["Continent"])
+            entry[const.CONTINENT] = sys.intern(str(cty_list[item]["Continent"]))
             entry[const.LATITUDE] = float(cty_list[item]["Latitude"])
             entry[const.LONGITUDE] = float(cty_list[item]["Longitude"])*(-1)
+            entry = _LookupRecord(entry)
 
             if cty_list[item]["ExactCallsign"]:
                 if call in exceptions_index.keys():
@@ -1431,12 +4290,11 @@ class LookupLib(object):
         self._logger.debug(str(len(exceptions))+" Exceptions added")
         self._logger.debug(str(len(exceptions_index))+" Exceptions in Index")
 
-        result = {
-            "prefixes" : prefixes,
-            "exceptions" : exceptions,
-            "prefixes_index" : prefixes_index,
-            "exceptions_index" : exceptions_index,
-        }
+        result = self._create_empty_data()
+        result["prefixes"] = prefixes
+        result["call_exceptions"] = exceptions
+        result["prefixes_index"] = prefixes_index
+        result["call_exceptions_index"] = exceptions_index
 
         return result
 
@@ -1465,58 +4323,403 @@ class LookupLib(object):
                 raise LookupError(err_str)
 
 
-    def _serialize_data(self, my_dict):
+    def _encode_redis_record(self, record):
         """
-        Serialize a Dictionary into JSON
+        Encode a record as the fields of a hash in Redis. Dates are stored as epoch seconds and
+        booleans as 0 / 1; the fields are decoded by their type (see REDIS_FIELD_DECODERS).
         """
-        new_dict = {}
-        for item in my_dict:
-            if isinstance(my_dict[item], datetime):
-                new_dict[item] = my_dict[item].strftime('%Y-%m-%d%H:%M:%S')
+        fields = {}
+        for key, value in record.items():
+            if isinstance(value, datetime):
+                fields[key] = int(value.timestamp())
+            elif isinstance(value, bool):
+                fields[key] = int(value)
             else:
-                new_dict[item] = str(my_dict[item])
-
-        return json.dumps(new_dict)
-
-    def _deserialize_data(self, json_data):
-        """
-        Deserialize a JSON into a dictionary
-        """
-
-        my_dict = json.loads(json_data.decode('utf8'))
-
-        for item in my_dict:
-            if item == const.ADIF:
-                my_dict[item] = int(my_dict[item])
-            elif item == const.DELETED:
-                my_dict[item] = self._str_to_bool(my_dict[item])
-            elif item == const.CQZ:
-                my_dict[item] = int(my_dict[item])
-            elif item == const.ITUZ:
-                my_dict[item] = int(my_dict[item])
-            elif item == const.LATITUDE:
-                my_dict[item] = float(my_dict[item])
-            elif item == const.LONGITUDE:
-                my_dict[item] = float(my_dict[item])
-            elif item == const.START:
-                my_dict[item] = datetime.strptime(my_dict[item], '%Y-%m-%d%H:%M:%S').replace(tzinfo=timezone.utc)
-            elif item == const.END:
-                my_dict[item] = datetime.strptime(my_dict[item], '%Y-%m-%d%H:%M:%S').replace(tzinfo=timezone.utc)
-            elif item == const.WHITELIST_START:
-                my_dict[item] = datetime.strptime(my_dict[item], '%Y-%m-%d%H:%M:%S').replace(tzinfo=timezone.utc)
-            elif item == const.WHITELIST_END:
-                my_dict[item] = datetime.strptime(my_dict[item], '%Y-%m-%d%H:%M:%S').replace(tzinfo=timezone.utc)
-            elif item == const.WHITELIST:
-                my_dict[item] = self._str_to_bool(my_dict[item])
-            else:
-                my_dict[item] = str(my_dict[item])
+                fields[key] = value
+        if not fields:
+            fields[REDIS_EMPTY_RECORD_FIELD] = ""
+        return fields
 
-        return my_dict
 
-    def _str_to_bool(self, input):
-        if input.lower() == "true":
-            return True
-        elif input.lower() == "false":
-            return False
+class AsyncLookupLib(_LookupBase):
+    """
+
+    Asynchronous variant of the lookuptype "redis" of :py:class:`LookupLib`, built on the asyncio client
+    of redis-py (redis.asyncio, redis>=4.2.0). The lookups are coroutines, so that asyncio applications
+    can query the lookup data in Redis without blocking the event loop.
+
+    The lookup data is copied into Redis with a (synchronous) :py:class:`LookupLib`
+    (see :py:meth:`LookupLib.copy_data_in_redis`).
+
+    Args:
+        redis_instance (redis.asyncio.Redis()): asyncio instance of Redis
+        redis_prefix (str): Prefix to identify the lookup data set in Redis
+        logger (logging.getLogger(__name__), optional): Python logger
+        redis_cache_size (int, optional): Number of lookups which are cached locally.
+        The cache is dropped as soon as the data set in Redis changes. 0 disables the cache.
+        redis_scripting (bool, optional): Use server-side (Lua) scripts for the lookups. When False,
+        only plain commands are issued.
+
+    Example:
+       The following code looks up a prefix in a coroutine
+
+       >>> import asyncio
+       >>> import redis.asyncio
+       >>> from pyhamtools.lookuplib import AsyncLookupLib
+       >>> async def main():
+       >>>     my_lookuplib = AsyncLookupLib(redis_instance=redis.asyncio.Redis(), redis_prefix="CLX")
+       >>>     print(await my_lookuplib.lookup_prefix("DH"))
+       >>> asyncio.run(main())
+       {
+        'adif': 230,
+        'country': u'FEDERAL REPUBLIC OF GERMANY',
+        'longitude': 10.0,
+        'cqz': 14,
+        'latitude': 51.0,
+        'continent': u'EU'
+       }
+
+    Note:
+        AsyncLookupLib is not a :py:class:`LookupLib`; it provides only the lookups. :py:class:`Callinfo`
+        requires a synchronous :py:class:`LookupLib`.
+
+    """
+    def __init__(self, redis_instance=None, redis_prefix=None, logger=None, redis_cache_size=REDIS_CACHE_SIZE, redis_scripting=True):
+        import redis.asyncio
+
+        self._logger = None
+        if logger:
+            self._logger = logger
         else:
+            self._logger = logging.getLogger(__name__)
+            self._logger.addHandler(logging.NullHandler())
+
+        self._redis = redis_instance
+        self._redis_prefix = redis_prefix
+        self._init_redis_lookups(redis_cache_size, redis_scripting)
+        self._check_redis_scripting()
+
+    async def lookup_entity(self, entity=None):
+        """Returns lookup data of an ADIF Entity (see :py:meth:`LookupLib.lookup_entity`)
+        """
+        namespace = await self._get_redis_namespace()
+        my_dict = self._redis_cache.get(("_entity_", str(entity)))
+        if my_dict is None:
+            my_dict = self._cache_redis_entity(entity, await self._redis.hgetall(namespace + "_entity_" + str(entity)))
+        if my_dict:
+            return self._strip_metadata(my_dict)
+
+        raise KeyError
+
+    async def lookup_callsign(self, callsign=None, timestamp=None):
+        """
+        Returns lookup data if an exception exists for a callsign (see :py:meth:`LookupLib.lookup_callsign`)
+        """
+        callsign = callsign.strip().upper()
+        data_dict, index = await self._get_dicts_from_redis("_call_ex_", "_call_ex_index_", self._redis_prefix, callsign)
+        return self._check_data_for_date(callsign, timestamp, data_dict, index)
+
+    async def lookup_prefix(self, prefix, timestamp=None):
+        """
+        Returns lookup data of a Prefix (see :py:meth:`LookupLib.lookup_prefix`)
+        """
+        prefix = prefix.strip().upper()
+        data_dict, index = await self._get_dicts_from_redis("_prefix_", "_prefix_index_", self._redis_prefix, prefix)
+        return self._check_data_for_date(prefix, timestamp, data_dict, index)
+
+    async def lookup_longest_prefix(self, callsign, timestamp=None):
+        """
+        Returns lookup data of the longest Prefix which matches the beginning of a callsign
+        (see :py:meth:`LookupLib.lookup_longest_prefix`)
+        """
+        callsign = callsign.strip().upper().replace(" ", "")
+
+        prefixes = self._get_bulk_prefix_candidates([callsign])
+        return self._check_longest_prefix_for_date(prefixes, timestamp, await self._get_redis_records(prefixes, "_prefix_", "_prefix_index_"))
+
+    async def is_invalid_operation(self, callsign, timestamp=None):
+        """
+        Returns True if an operations is known as invalid (see :py:meth:`LookupLib.is_invalid_operation`)
+        """
+        callsign = callsign.strip().upper()
+        data_dict, index = await self._get_dicts_from_redis("_inv_op_", "_inv_op_index_", self._redis_prefix, callsign)
+        return self._check_inv_operation_for_date(callsign, timestamp, data_dict, index)
+
+    async def lookup_zone_exception(self, callsign, timestamp=None):
+        """
+        Returns a CQ Zone if an exception exists for the given callsign
+        (see :py:meth:`LookupLib.lookup_zone_exception`)
+        """
+        callsign = callsign.strip().upper()
+        data_dict, index = await self._get_dicts_from_redis("_zone_ex_", "_zone_ex_index_", self._redis_prefix, callsign)
+        return self._check_zone_exception_for_date(callsign, timestamp, data_dict, index)
+
+    async def get_callsign(self, callsign, timestamp=None, default=None):
+        """
+        Same as :py:meth:`lookup_callsign`, but returns default when no matching callsign is found
+        """
+        try:
+            return await self.lookup_callsign(callsign, timestamp)
+        except KeyError:
+            return default
+
+    async def get_prefix(self, prefix, timestamp=None, default=None):
+        """
+        Same as :py:meth:`lookup_prefix`, but returns default when no matching Prefix is found
+        """
+        try:
+            return await self.lookup_prefix(prefix, timestamp)
+        except KeyError:
+            return default
+
+    async def get_longest_prefix(self, callsign, timestamp=None, default=None):
+        """
+        Same as :py:meth:`lookup_longest_prefix`, but returns default when no matching Prefix is found
+        """
+        try:
+            return await self.lookup_longest_prefix(callsign, timestamp)
+        except KeyError:
+            return default
+
+    async def get_invalid_operation(self, callsign, timestamp=None, default=False):
+        """
+        Same as :py:meth:`is_invalid_operation`, but returns default when no matching callsign is found
+        """
+        try:
+            return await self.is_invalid_operation(callsign, timestamp)
+        except KeyError:
+            return default
+
+    async def get_zone_exception(self, callsign, timestamp=None, default=None):
+        """
+        Same as :py:meth:`lookup_zone_exception`, but returns default when no matching callsign is found
+        """
+        try:
+            return await self.lookup_zone_exception(callsign, timestamp)
+        except KeyError:
+            return default
+
+    async def has_callsign_records(self, callsign):
+        """
+        Checks if exceptions, invalid operations or zone exceptions exist for a callsign
+        (see :py:meth:`LookupLib.has_callsign_records`)
+        """
+        callsign = callsign.strip().upper()
+        return self._check_redis_filters((await self._get_redis_state())[2], callsign)
+
+    async def resolve_callsign(self, callsign, timestamp=None, prefix=None):
+        """
+        Returns the data of a callsign in one step (see :py:meth:`LookupLib.resolve_callsign`)
+        """
+        callsign = callsign.strip().upper()
+        if prefix is None:
+            prefix = callsign
+
+        has_records = await self.has_callsign_records(callsign)
+
+        if has_records and self._redis_scripting:
+            return await self._resolve_callsign_in_redis(callsign, timestamp, prefix)
+
+        if has_records and await self.get_invalid_operation(callsign, timestamp):
+            raise KeyError
+
+        data = None
+        if has_records:
+            data = await self.get_callsign(callsign, timestamp)
+        if data is None:
+            data = await self.get_longest_prefix(prefix, timestamp)
+        if data is None:
             raise KeyError
+
+        data = dict(data)
+        if has_records:
+            cqz = await self.get_zone_exception(callsign, timestamp)
+            if cqz is not None:
+                data[const.CQZ] = cqz
+        return data
+
+    async def lookup_callsigns(self, callsigns, timestamp=None):
+        """
+        Returns the lookup data of several callsigns (see :py:meth:`LookupLib.lookup_callsigns`)
+        """
+        callsigns, timestamps = self._prepare_bulk_lookup(callsigns, timestamp)
+        bulk_dicts = await self._get_bulk_dicts_from_redis("_call_ex_", "_call_ex_index_", callsigns)
+        return await self._complete_redis_records(self._check_bulk_data_for_date(callsigns, timestamps, bulk_dicts))
+
+    async def lookup_prefixes(self, prefixes, timestamp=None):
+        """
+        Returns the lookup data of several prefixes (see :py:meth:`LookupLib.lookup_prefixes`)
+        """
+        prefixes, timestamps = self._prepare_bulk_lookup(prefixes, timestamp)
+        bulk_dicts = await self._get_bulk_dicts_from_redis("_prefix_", "_prefix_index_", prefixes)
+        return await self._complete_redis_records(self._check_bulk_data_for_date(prefixes, timestamps, bulk_dicts))
+
+    async def lookup_longest_prefixes(self, callsigns, timestamp=None):
+        """
+        Returns the lookup data of the longest matching Prefix of several callsigns
+        (see :py:meth:`LookupLib.lookup_longest_prefixes`)
+        """
+        callsigns, timestamps = self._prepare_bulk_lookup(callsigns, timestamp)
+        callsigns = [callsign.replace(" ", "") for callsign in callsigns]
+
+        prefixes = self._get_bulk_prefix_candidates(callsigns)
+        data_dicts = {}
+        for i in range(0, len(prefixes), REDIS_BULK_BATCH_SIZE):
+            batch = prefixes[i:i+REDIS_BULK_BATCH_SIZE]
+            data_dicts.update(zip(batch, await self._get_redis_records(batch, "_prefix_", "_prefix_index_")))
+        return self._resolve_bulk_longest_prefixes(callsigns, timestamps, data_dicts)
+
+    async def is_invalid_operations(self, callsigns, timestamp=None):
+        """
+        Checks for several callsigns if the operation is known as invalid
+        (see :py:meth:`LookupLib.is_invalid_operations`)
+        """
+        callsigns, timestamps = self._prepare_bulk_lookup(callsigns, timestamp)
+        bulk_dicts = await self._get_bulk_dicts_from_redis("_inv_op_", "_inv_op_index_", callsigns)
+        return [item_dicts is not None and self._find_record_for_date(callsign, timestamp, item_dicts[0], item_dicts[1]) is not None
+                for callsign, timestamp, item_dicts in zip(callsigns, timestamps, bulk_dicts)]
+
+    async def _get_dicts_from_redis(self, name, index_name, redis_prefix, item):
+        """
+        Retrieve the data of an item from redis (see LookupLib._get_dicts_from_redis)
+        """
+        if redis_prefix is None:
+            raise KeyError ("redis_prefix is missing")
+
+        if not await self._redis_filter_contains(index_name, item):
+            raise KeyError ("No Data found in Redis for "+ item)
+
+        return self._get_redis_item_dicts(item, (await self._get_redis_records([str(item)], name, index_name))[0])
+
+    async def _get_redis_records(self, items, name, index_name):
+        """
+        Retrieve the records of several items from the local cache, or from redis in a single round trip
+        """
+        namespace = await self._get_redis_namespace()
+
+        data_dicts, missing_items = self._get_cached_redis_records(items, name)
+        fetched = []
+        if missing_items:
+            fetched = await self._fetch_redis_records(namespace, missing_items, name, index_name)
+        return self._merge_redis_records(items, name, data_dicts, missing_items, fetched)
+
+    async def _fetch_redis_records(self, namespace, items, name, index_name):
+        """
+        Retrieve the records of several items from redis in a single round trip (see REDIS_LUA_GET_SCRIPT)
+        """
+        if not self._redis_scripting:
+            return await self._fetch_redis_records_with_pipelines(namespace, items, name, index_name)
+
+        self._register_redis_scripts()
+        keys, args = self._get_get_script_params(namespace, items, name, index_name)
+        return self._decode_redis_records_reply(await self._redis_get_script(keys=keys, args=args, client=self._redis))
+
+    async def _fetch_redis_records_with_pipelines(self, namespace, items, name, index_name):
+        """
+        Retrieve the records of several items from redis with plain commands
+        (see LookupLib._fetch_redis_records_with_pipelines)
+        """
+        pipe = self._redis.pipeline(transaction=False)
+        self._queue_redis_index_members(pipe, namespace, items, index_name)
+        members = self._decode_redis_index_members(await pipe.execute())
+
+        record_ids = self._get_redis_record_ids(members)
+        if not record_ids:
+            return [{} for item in items]
+
+        pipe = self._redis.pipeline(transaction=False)
+        self._queue_redis_records(pipe, namespace, name, record_ids)
+        records = self._decode_redis_records(record_ids, await pipe.execute())
+
+        adifs = self._get_incomplete_adifs(list(records.values()))
+        entity_fields = []
+        if adifs:
+            pipe = self._redis.pipeline(transaction=False)
+            self._queue_redis_entities(pipe, namespace, adifs)
+            entity_fields = await pipe.execute()
+
+        return self._assemble_fetched_redis_records(members, records, adifs, entity_fields)
+
+    async def _resolve_callsign_in_redis(self, callsign, timestamp, prefix):
+        """
+        Resolve a callsign with a single call of REDIS_LUA_RESOLVE_SCRIPT
+        """
+        namespace = await self._get_redis_namespace()
+        self._register_redis_scripts()
+        reply = await self._redis_resolve_script(keys=[], args=self._get_resolve_script_args(namespace, callsign, prefix, timestamp),
+                                                 client=self._redis)
+        return self._decode_resolve_script_reply(reply)
+
+    async def _redis_filter_contains(self, index_name, item):
+        """
+        Checks the locally cached filter of an index in Redis (see LookupLib._redis_filter_contains)
+        """
+        return self._check_redis_filter((await self._get_redis_state())[2], index_name, item)
+
+    async def _get_redis_namespace(self):
+        """
+        Returns the namespace of the current version of the data set in Redis (see LookupLib._get_redis_namespace)
+        """
+        return (await self._get_redis_state())[0]
+
+    async def _get_redis_state(self):
+        """
+        Returns the namespace, the revision and the filters of the current version of the data set in Redis
+        (see LookupLib._get_redis_state)
+        """
+        if self._redis_prefix is None:
+            raise KeyError ("redis_prefix is missing")
+
+        state = self._redis_state
+        reload = self._redis_state_expired(state)
+        if not reload and self._redis_revision_check_due():
+            reload = self._redis_revision_changed(state, await self._redis.get(self._redis_prefix + REDIS_REVISION_KEY))
+
+        if reload:
+            schema, version, revision = await self._redis.mget(self._get_redis_namespace_keys())
+            legacy = 0
+            if self._is_redis_namespace_missing(schema, version, revision):
+                legacy = await self._redis.exists(*self._get_redis_legacy_keys())
+            namespace, revision = self._check_redis_namespace(schema, version, revision, legacy)
+            state = self._publish_redis_state(namespace, revision, await self._load_redis_filters(namespace))
+        return state
+
+    async def _load_redis_filters(self, namespace):
+        """
+        Retrieve the filter sets (see REDIS_FILTER_NAMES) of a version of the data set from Redis
+        """
+        pipe = self._redis.pipeline(transaction=False)
+        self._queue_redis_filters(pipe, namespace)
+        return self._decode_redis_filters(await pipe.execute())
+
+    async def _get_bulk_dicts_from_redis(self, name, index_name, items):
+        """
+        Bulk version of _get_dicts_from_redis (see LookupLib._get_bulk_dicts_from_redis)
+        """
+        namespace, revision, filters = await self._get_redis_state()
+        unique_items = self._get_filtered_bulk_items(filters, index_name, items)
+        pipe = self._redis.pipeline(transaction=False)
+        self._queue_redis_index_members(pipe, namespace, unique_items, index_name)
+        members = self._decode_redis_index_members(await pipe.execute())
+
+        records = {}
+        record_ids = self._get_redis_record_ids(members)
+        if record_ids:
+            pipe = self._redis.pipeline(transaction=False)
+            self._queue_redis_records(pipe, namespace, name, record_ids)
+            records = self._decode_redis_records(record_ids, await pipe.execute())
+
+        return self._assemble_bulk_dicts(items, unique_items, members, records)
+
+    async def _complete_redis_records(self, records):
+        """
+        Complete records retrieved from redis with the fields of their entities (one pipeline)
+        """
+        adifs = self._get_incomplete_adifs(records)
+        if not adifs:
+            return records
+
+        namespace = await self._get_redis_namespace()
+        pipe = self._redis.pipeline(transaction=False)
+        self._queue_redis_entities(pipe, namespace, adifs)
+        return self._complete_records_with_entities(records, adifs, await pipe.execute())
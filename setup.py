@@ -19,7 +19,7 @@ setup(name='pyhamtools',
           "ephem>=4.1.3",
           "beautifulsoup4>=4.7.1",
           "lxml>=5.0.0",
-          "redis>=2.10.6",
+          "redis>=3.5.0",
       ],
       **kw
      )
@@ -76,6 +76,48 @@ def fixCountryFile(request):
     Lib = LookupLib("countryfile")
     return(Lib)
 
+cty_xml_namespaced = """<clublog date='2025-03-01T12:00:00+00:00' xmlns='https://clublog.org/cty/v1.2'>
+<entities>
+<entity><adif>230</adif><name>FEDERAL REPUBLIC OF GERMANY</name><prefix>DL</prefix><deleted>FALSE</deleted><cqz>14</cqz><cont>EU</cont><long>10.00</long><lat>51.00</lat></entity>
+<entity><adif>35</adif><name>CHRISTMAS ISLAND</name><prefix>VK9X</prefix><deleted>FALSE</deleted><cqz>29</cqz><cont>OC</cont><long>105.70</long><lat>-10.50</lat></entity>
+</entities>
+<exceptions>
+<exception record='1'><call>VK9XO</call><entity>CHRISTMAS ISLAND</entity><adif>35</adif><cqz>29</cqz><cont>OC</cont><long>105.62</long><lat>-10.48</lat><start>1962-07-06T00:00:00+00:00</start></exception>
+<exception record='2'><call>VK9XX</call><entity>CHRISTMAS ISLAND</entity><adif>35</adif><cqz>29</cqz><cont>OC</cont><long>105.54</long><lat>-10.52</lat><end>1975-09-15T23:59:59+00:00</end></exception>
+</exceptions>
+<prefixes>
+<prefix record='1'><call>DH</call><entity>FEDERAL REPUBLIC OF GERMANY</entity><adif>230</adif><cqz>14</cqz><cont>EU</cont><long>10.00</long><lat>51.00</lat></prefix>
+<prefix record='2'><call>VK9X</call><entity>CHRISTMAS ISLAND</entity><adif>35</adif><cqz>29</cqz><cont>OC</cont><long>105.70</long><lat>-10.50</lat></prefix>
+</prefixes>
+<invalid_operations>
+<invalid record='1'><call>VK0MC</call><start>1994-12-01T00:00:00+00:00</start><end>1995-01-31T23:59:59+00:00</end></invalid>
+<invalid record='2'><call>5W1CFN</call><start>2012-02-01T00:00:00+00:00</start></invalid>
+</invalid_operations>
+<zone_exceptions>
+<zone_exception record='1'><call>DP0GVN</call><zone>38</zone></zone_exception>
+<zone_exception record='2'><call>DL1KVC/P</call><zone>38</zone><start>1992-10-01T00:00:00+00:00</start><end>1993-02-28T23:59:59+00:00</end></zone_exception>
+</zone_exceptions>
+</clublog>
+"""
+
+@pytest.fixture(scope="function")
+def fix_cty_xml_namespaced_file(tmp_path):
+    """Small Clublog XML file (with namespaced header) which doesn't require a download"""
+    cty_file = tmp_path / "cty.xml"
+    cty_file.write_text(cty_xml_namespaced)
+    return str(cty_file)
+
+@pytest.fixture(scope="function")
+def fix_change_cty_xml_file(fix_cty_xml_namespaced_file):
+    """Returns a function which changes the small Clublog XML file; by default the prefix VK9X is renamed to VK9Y"""
+    def change(old="<prefix record='2'><call>VK9X</call>", new="<prefix record='2'><call>VK9Y</call>"):
+        with open(fix_cty_xml_namespaced_file) as f:
+            content = f.read()
+        assert old in content
+        with open(fix_cty_xml_namespaced_file, "w") as f:
+            f.write(content.replace(old, new))
+    return change
+
 @pytest.fixture(scope="module", params=["clublogxml", "countryfile"])
 def fix_callinfo(request, fixApiKey):
     lib = LookupLib(request.param, fixApiKey)
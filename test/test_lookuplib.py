@@ -38,3 +38,30 @@ class TestlookupLibHelper:
 
         assert type(fixClublogApi._generate_random_word(5)) is str
         assert len(fixClublogApi._generate_random_word(5)) == 5
+
+
+class TestlookupLibDownload:
+
+    class Response(object):
+        """Streamed response of requests, which records if it has been closed"""
+
+        def __init__(self, status_code, chunks):
+            self.status_code = status_code
+            self.text = ""
+            self.closed = False
+            self._chunks = chunks
+
+        def iter_content(self, chunk_size=1):
+            return iter(self._chunks)
+
+        def close(self):
+            self.closed = True
+
+    @pytest.mark.parametrize("status_code, chunks, error", [(200, [b"<clublog><entities>", b"<entity"], SyntaxError),
+                                                            (403, [], APIKeyMissingError)])
+    def test_download_is_closed_on_errors(self, monkeypatch, status_code, chunks, error):
+        response = self.Response(status_code, chunks)
+        monkeypatch.setattr("requests.get", lambda *args, **kwargs: response)
+        with pytest.raises(error):
+            LookupLib("clublogxml", apikey="foo")
+        assert response.closed
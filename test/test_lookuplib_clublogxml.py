@@ -1,9 +1,13 @@
 import pytest
 from datetime import datetime, timezone
 import os
+import gzip
+import time
 
 from pyhamtools.lookuplib import LookupLib
+from pyhamtools import Callinfo
 from pyhamtools.exceptions import APIKeyMissingError
+from pyhamtools.consts import LookupConventions as const
 
 
 #Fixtures
@@ -116,6 +120,321 @@ def fix_cty_xml_file(request):
 
 #TESTS
 #===========================================================
+class TestclublogXML_Parser:
+
+    def test_constructor_with_namespaced_file(self, fix_cty_xml_namespaced_file):
+        lib = LookupLib("clublogxml", filename=fix_cty_xml_namespaced_file)
+        assert lib.lookup_prefix("DH") == response_Prefix_DH
+        assert lib.lookup_callsign("VK9XO") == response_Exception_VK9XO_with_start_date
+        assert lib.lookup_zone_exception("dp0gvn") == 38
+        assert lib.lookup_entity(230) == response_Entity_230
+
+        # no header-stripped copy of the file is written
+        assert os.listdir(os.path.dirname(fix_cty_xml_namespaced_file)) == ["cty.xml"]
+
+    def test_constructor_with_gzip_file(self, fix_cty_xml_namespaced_file, tmp_path):
+        cty_file = tmp_path / "cty.xml.gz"
+        with open(fix_cty_xml_namespaced_file, "rb") as f:
+            cty_file.write_bytes(gzip.compress(f.read()))
+        lib = LookupLib("clublogxml", filename=str(cty_file))
+        assert lib.lookup_prefix("DH") == response_Prefix_DH
+
+    def test_load_gzip_download_without_temp_files(self, fix_cty_xml_namespaced_file, httpserver):
+        with open(fix_cty_xml_namespaced_file, "rb") as f:
+            httpserver.serve_content(gzip.compress(f.read()))
+        lib = LookupLib("clublogxml", filename=fix_cty_xml_namespaced_file)
+        lib._download = True
+        lib._lib_filename = None
+        lib._data = lib._build_derived_indexes(lib._load_clublogXML(url=httpserver.url, apikey="foo"))
+        assert lib.lookup_callsign("VK9XO") == response_Exception_VK9XO_with_start_date
+
+    def test_lookup_longest_prefix(self, fix_cty_xml_namespaced_file):
+        lib = LookupLib("clublogxml", filename=fix_cty_xml_namespaced_file)
+        assert lib.lookup_longest_prefix("DH1TW") == response_Prefix_DH
+        assert lib.lookup_longest_prefix("dh") == response_Prefix_DH
+        assert lib.lookup_longest_prefix("VK9XAB") == lib.lookup_prefix("VK9X")
+
+        with pytest.raises(KeyError):
+            lib.lookup_longest_prefix("VK9")
+
+        with pytest.raises(KeyError):
+            lib.lookup_longest_prefix("")
+
+    def test_parse_clublog_xml_indexes(self, fix_cty_xml_namespaced_file):
+        lib = LookupLib("clublogxml", filename=fix_cty_xml_namespaced_file)
+        with open(fix_cty_xml_namespaced_file, "rb") as f:
+            cty_dict = lib._parse_clublog_xml(f)
+        assert cty_dict["prefixes_index"] == {"DH": [1], "VK9X": [2]}
+        assert cty_dict["invalid_operations_index"] == {"VK0MC": [1], "5W1CFN": [2]}
+        assert cty_dict["zone_exceptions"][2][const.CQZ] == 38
+        assert sorted(cty_dict["entities"]) == [35, 230]
+
+    def test_interval_index(self, fix_cty_xml_namespaced_file):
+        lib = LookupLib("clublogxml", filename=fix_cty_xml_namespaced_file)
+        data = lib._data
+        starts, ends, record_ids = data["invalid_operations_intervals"]["VK0MC"]
+        assert record_ids == [1]
+        assert starts == [int(datetime(1994, 12, 1, tzinfo=timezone.utc).timestamp())]
+        assert data["prefixes_intervals"]["DH"] == ([float("-inf")], [float("inf")], [1])
+
+        # overlapping records are checked one by one
+        records = dict(data["invalid_operations"])
+        records[3] = {const.START: datetime(1995, 1, 1, tzinfo=timezone.utc)}
+        index = dict(data["invalid_operations_index"])
+        index["VK0MC"] = index["VK0MC"] + [3]
+        intervals = lib._build_interval_index(records, index)
+        assert "VK0MC" not in intervals
+        assert "5W1CFN" in intervals
+
+    def test_check_for_date_with_interval_index(self, fix_cty_xml_namespaced_file):
+        lib = LookupLib("clublogxml", filename=fix_cty_xml_namespaced_file)
+        data = lib._data
+        for ts in [datetime(1994, 12, 1, tzinfo=timezone.utc),
+                   datetime(1994, 12, 1, 0, 0, 1, tzinfo=timezone.utc),
+                   datetime(1995, 1, 31, 23, 59, 58, tzinfo=timezone.utc),
+                   datetime(1995, 1, 31, 23, 59, 59, tzinfo=timezone.utc),
+                   datetime(2020, 1, 1, tzinfo=timezone.utc)]:
+            linear = lib._find_record_for_date("VK0MC", ts, data["invalid_operations"], data["invalid_operations_index"])
+            bisected = lib._find_record_for_date("VK0MC", ts, data["invalid_operations"], data["invalid_operations_index"], data["invalid_operations_intervals"])
+            assert linear == bisected
+
+        assert lib.is_invalid_operation("VK0MC", datetime(1995, 1, 1, tzinfo=timezone.utc))
+        with pytest.raises(KeyError):
+            lib.is_invalid_operation("VK0MC", datetime(1995, 1, 31, 23, 59, 59, tzinfo=timezone.utc))
+        assert lib.lookup_zone_exception("DL1KVC/P", datetime(1992, 12, 1, tzinfo=timezone.utc)) == 38
+        with pytest.raises(KeyError):
+            lib.lookup_zone_exception("DL1KVC/P", datetime(1993, 3, 1, tzinfo=timezone.utc))
+
+    def test_lookup_returns_read_only_views(self, fix_cty_xml_namespaced_file):
+        lib = LookupLib("clublogxml", filename=fix_cty_xml_namespaced_file)
+        ex = lib.lookup_callsign("VK9XO")
+        assert ex == response_Exception_VK9XO_with_start_date
+        assert const.START not in ex
+        assert ex is lib.lookup_callsign("VK9XO")
+        with pytest.raises(TypeError):
+            ex[const.CQZ] = 1
+        assert const.WHITELIST not in lib.lookup_entity(230)
+
+    def test_get_all_does_not_modify_lookup_data(self, fix_cty_xml_namespaced_file, fix_change_cty_xml_file):
+        fix_change_cty_xml_file("<call>DP0GVN</call>", "<call>DH1TW</call>")
+        lib = LookupLib("clublogxml", filename=fix_cty_xml_namespaced_file)
+        cic = Callinfo(lib)
+        assert cic.get_all("DH1TW")[const.CQZ] == 38
+        assert lib.lookup_prefix("DH")[const.CQZ] == 14
+        assert cic.get_all("DH2TW")[const.CQZ] == 14
+
+    def test_records_are_compact_and_dict_compatible(self, fix_cty_xml_namespaced_file):
+        import pickle
+        lib = LookupLib("clublogxml", filename=fix_cty_xml_namespaced_file)
+        record = lib._data["call_exceptions"][1]
+        assert not hasattr(record, "__dict__")
+        assert record == dict(record)
+        assert record[const.START] == datetime(1962, 7, 6, tzinfo=timezone.utc)
+        assert const.END not in record
+        assert record.get(const.END) is None
+        assert record.copy() == dict(record)
+        with pytest.raises(KeyError):
+            record["keys"]
+        with pytest.raises(AttributeError):
+            record.cqz = 1
+        assert pickle.loads(pickle.dumps(record)) == record
+        assert lib.lookup_prefix("VK9X")[const.COUNTRY] is lib.lookup_callsign("VK9XO")[const.COUNTRY]
+
+    def test_records_are_normalized_against_entities(self, fix_cty_xml_namespaced_file):
+        lib = LookupLib("clublogxml", filename=fix_cty_xml_namespaced_file)
+        data = lib._data
+        # only the fields which differ from the entity are stored
+        assert dict(data["prefixes"][1]) == {const.ADIF: 230}
+        assert dict(data["call_exceptions"][1]) == {
+            const.ADIF: 35,
+            const.LATITUDE: -10.48,
+            const.LONGITUDE: 105.62,
+            const.START: datetime(1962, 7, 6, tzinfo=timezone.utc)
+        }
+        assert lib.lookup_prefix("DH") == response_Prefix_DH
+        assert lib.lookup_callsign("VK9XO") == response_Exception_VK9XO_with_start_date
+
+
+class TestclublogXML_Bulk:
+
+    def test_lookup_callsigns(self, fix_cty_xml_namespaced_file):
+        lib = LookupLib("clublogxml", filename=fix_cty_xml_namespaced_file)
+        assert lib.lookup_callsigns(["vk9xo ", "DH1TW", "VK9XO"]) == [response_Exception_VK9XO_with_start_date, None, response_Exception_VK9XO_with_start_date]
+        assert lib.lookup_callsigns([]) == []
+
+    def test_lookup_callsigns_with_timestamp_per_callsign(self, fix_cty_xml_namespaced_file):
+        lib = LookupLib("clublogxml", filename=fix_cty_xml_namespaced_file)
+        timestamps = [datetime(1960, 1, 1, tzinfo=timezone.utc), datetime(1970, 1, 1, tzinfo=timezone.utc)]
+        assert lib.lookup_callsigns(["VK9XO", "VK9XO"], timestamps) == [None, response_Exception_VK9XO_with_start_date]
+        with pytest.raises(ValueError):
+            lib.lookup_callsigns(["VK9XO"], timestamps)
+
+    def test_lookup_prefixes(self, fix_cty_xml_namespaced_file):
+        lib = LookupLib("clublogxml", filename=fix_cty_xml_namespaced_file)
+        assert lib.lookup_prefixes(["DH", "XX", "VK9X"]) == [response_Prefix_DH, None, lib.lookup_prefix("VK9X")]
+
+    def test_lookup_longest_prefixes(self, fix_cty_xml_namespaced_file):
+        lib = LookupLib("clublogxml", filename=fix_cty_xml_namespaced_file)
+        assert lib.lookup_longest_prefixes(["dh1tw", "QRM", "VK9XO"]) == [response_Prefix_DH, None, lib.lookup_prefix("VK9X")]
+
+    def test_is_invalid_operations(self, fix_cty_xml_namespaced_file):
+        lib = LookupLib("clublogxml", filename=fix_cty_xml_namespaced_file)
+        timestamps = [datetime(1995, 1, 1, tzinfo=timezone.utc), datetime(1996, 1, 1, tzinfo=timezone.utc), datetime(2020, 1, 1, tzinfo=timezone.utc)]
+        assert lib.is_invalid_operations(["VK0MC", "VK0MC", "5W1CFN"], timestamps) == [True, False, True]
+        assert lib.is_invalid_operations(["DH1TW"]) == [False]
+
+    def test_has_callsign_records(self, fix_cty_xml_namespaced_file):
+        lib = LookupLib("clublogxml", filename=fix_cty_xml_namespaced_file)
+        assert lib.has_callsign_records("vk9xo")
+        assert lib.has_callsign_records("5W1CFN")
+        assert lib.has_callsign_records("DL1KVC/P")
+        assert not lib.has_callsign_records("DH1TW")
+
+
+class TestclublogXML_NonRaisingGetters:
+
+    def test_get_callsign(self, fix_cty_xml_namespaced_file):
+        lib = LookupLib("clublogxml", filename=fix_cty_xml_namespaced_file)
+        assert lib.get_callsign("vk9xo") == response_Exception_VK9XO_with_start_date
+        assert lib.get_callsign("DH1TW") is None
+        assert lib.get_callsign("DH1TW", default={}) == {}
+        assert lib.get_callsign("VK9XO", datetime(1960, 1, 1, tzinfo=timezone.utc)) is None
+
+    def test_get_prefix(self, fix_cty_xml_namespaced_file):
+        lib = LookupLib("clublogxml", filename=fix_cty_xml_namespaced_file)
+        assert lib.get_prefix("DH") == response_Prefix_DH
+        assert lib.get_prefix("XX") is None
+        assert lib.get_longest_prefix("DH1TW") == response_Prefix_DH
+        assert lib.get_longest_prefix("VK9") is None
+
+    def test_get_invalid_operation_and_zone_exception(self, fix_cty_xml_namespaced_file):
+        lib = LookupLib("clublogxml", filename=fix_cty_xml_namespaced_file)
+        assert lib.get_invalid_operation("VK0MC", datetime(1995, 1, 1, tzinfo=timezone.utc)) is True
+        assert lib.get_invalid_operation("VK0MC") is False
+        assert lib.get_zone_exception("DP0GVN") == 38
+        assert lib.get_zone_exception("DH1TW") is None
+        assert lib.get_zone_exception("DH1TW", default=14) == 14
+
+    def test_callinfo_resolves_without_exceptions(self, fix_cty_xml_namespaced_file, monkeypatch):
+        lib = LookupLib("clublogxml", filename=fix_cty_xml_namespaced_file)
+        for name in ["lookup_callsign", "lookup_prefix", "lookup_longest_prefix", "is_invalid_operation", "lookup_zone_exception"]:
+            monkeypatch.setattr(lib, name, None)
+        cic = Callinfo(lib)
+        assert cic.get_all("DH1TW") == response_Prefix_DH
+        assert cic.get_all("VK9XO", datetime(1970, 1, 1, tzinfo=timezone.utc)) == response_Exception_VK9XO_with_start_date
+        assert not cic.is_valid_callsign("QRM")
+        assert not cic.is_valid_callsign("VK0MC", datetime(1995, 1, 1, tzinfo=timezone.utc))
+        with pytest.raises(KeyError):
+            cic.get_all("QRM")
+
+    def test_resolve_callsign(self, fix_cty_xml_namespaced_file):
+        lib = LookupLib("clublogxml", filename=fix_cty_xml_namespaced_file)
+        assert lib.resolve_callsign("DH1TW") == response_Prefix_DH
+        assert lib.resolve_callsign("vk9xo") == response_Exception_VK9XO_with_start_date
+        assert lib.resolve_callsign("VK9ABC", prefix="VK9X") == lib.lookup_prefix("VK9X")
+        with pytest.raises(KeyError):
+            lib.resolve_callsign("VK0MC", datetime(1995, 1, 1, tzinfo=timezone.utc))
+        with pytest.raises(KeyError):
+            lib.resolve_callsign("QRM")
+
+    def test_lookups_without_timestamp_use_current_records(self, fix_cty_xml_namespaced_file, monkeypatch):
+        lib = LookupLib("clublogxml", filename=fix_cty_xml_namespaced_file)
+        data = lib._data
+        assert data["current_records"] is None
+        assert lib.lookup_callsign("VK9XO") == response_Exception_VK9XO_with_start_date
+        assert data["current_records"] is not None
+        assert data["current_records"][1] == float("inf")
+        with pytest.raises(KeyError):
+            lib.lookup_callsign("VK9XX")
+
+        # the current records are recomputed when a record boundary is passed
+        now = datetime(1994, 11, 30, tzinfo=timezone.utc).timestamp()
+        monkeypatch.setattr("time.time", lambda: now)
+        with pytest.raises(KeyError):
+            lib.is_invalid_operation("VK0MC")
+        assert data["current_records"][1] == datetime(1994, 12, 1, tzinfo=timezone.utc).timestamp()
+        records = data["current_records"][2]
+        assert lib.get_zone_exception("DL1KVC/P") is None
+        assert data["current_records"][2] is records
+
+        now = datetime(1995, 1, 1, tzinfo=timezone.utc).timestamp()
+        assert lib.is_invalid_operation("VK0MC")
+        assert lib.is_invalid_operations(["VK0MC", "DH1TW"]) == [True, False]
+        assert data["current_records"][2] is not records
+        # only the items with records starting or ending at the passed boundaries are computed again
+        assert data["current_records"][2]["invalid_operations"] is not records["invalid_operations"]
+        assert data["current_records"][2]["call_exceptions"] is records["call_exceptions"]
+
+
+class TestclublogXML_Refresh:
+
+    def test_refresh(self, fix_cty_xml_namespaced_file, fix_change_cty_xml_file, monkeypatch):
+        lib = LookupLib("clublogxml", filename=fix_cty_xml_namespaced_file)
+        assert lib.lookup_prefix("DH")[const.CQZ] == 14
+
+        fix_change_cty_xml_file("<call>DH</call><entity>FEDERAL REPUBLIC OF GERMANY</entity><adif>230</adif><cqz>14</cqz>",
+                                "<call>DH</call><entity>FEDERAL REPUBLIC OF GERMANY</entity><adif>230</adif><cqz>15</cqz>")
+
+        builds = []
+        build_derived_indexes = lib._build_derived_indexes
+        def count(data):
+            builds.append(data)
+            return build_derived_indexes(data)
+        monkeypatch.setattr(lib, "_build_derived_indexes", count)
+
+        data = lib._data
+        assert lib.refresh()
+        assert lib.lookup_prefix("DH")[const.CQZ] == 15
+        # the derived indexes are only built for the new data set
+        assert len(builds) == 1
+        # the old data set has not been modified, it has been replaced
+        assert data is not lib._data
+        assert data["prefixes_views"][1][const.CQZ] == 14
+
+    def test_compute_data_delta(self, fix_cty_xml_namespaced_file, fix_change_cty_xml_file):
+        lib = LookupLib("clublogxml", filename=fix_cty_xml_namespaced_file)
+        old_data = lib._data
+
+        fix_change_cty_xml_file()
+
+        delta = lib._compute_data_delta(old_data, lib._load_data())
+        assert delta["prefixes"] == {"changed": {}, "removed": []}
+        assert delta["prefixes_index"] == {"changed": {"VK9Y": [2]}, "removed": ["VK9X"]}
+        assert delta["entities"] == {"changed": {}, "removed": []}
+
+        new_data = lib._apply_data_delta(old_data, delta)
+        assert new_data["prefixes_index"] == {"DH": [1], "VK9Y": [2]}
+        assert new_data["prefixes"] is old_data["prefixes"]
+        assert old_data["prefixes_index"] == {"DH": [1], "VK9X": [2]}
+
+    def test_auto_refresh(self, fix_cty_xml_namespaced_file):
+        lib = LookupLib("clublogxml", filename=fix_cty_xml_namespaced_file, refresh_interval=0.05)
+        data = lib._data
+        try:
+            for _ in range(100):
+                if lib._data is not data:
+                    break
+                time.sleep(0.05)
+            assert lib._data is not data
+            assert lib.lookup_prefix("DH") == response_Prefix_DH
+        finally:
+            lib.stop_auto_refresh()
+
+    def test_auto_refresh_keeps_data_on_error(self, fix_cty_xml_namespaced_file):
+        lib = LookupLib("clublogxml", filename=fix_cty_xml_namespaced_file)
+        os.remove(fix_cty_xml_namespaced_file)
+        with pytest.raises(IOError):
+            lib.refresh()
+        assert lib.lookup_prefix("DH") == response_Prefix_DH
+
+    def test_refresh_not_available(self):
+        lib = LookupLib("clublogapi", apikey="foo")
+        with pytest.raises(AttributeError):
+            lib.refresh()
+        with pytest.raises(AttributeError):
+            lib.start_auto_refresh(10)
+
+
 class TestclublogXML_Getters:
 
     #lookup_entity(callsign)
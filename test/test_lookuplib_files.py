@@ -0,0 +1,121 @@
+import pytest
+import os
+from datetime import datetime, timezone
+
+from pyhamtools.lookuplib import LookupLib
+from pyhamtools import Callinfo
+
+
+# lookup types which read the lookup data from a file, with the method writing the file
+# and the name of the file
+FILE_LOOKUPTYPES = {
+    "snapshot": ("save_snapshot", "clublog.snapshot"),
+    "shared": ("save_shared_data", "clublog.shared"),
+    "sqlite": ("copy_data_in_sqlite", "clublog.sqlite"),
+}
+
+
+#Fixtures
+#===========================================================
+
+@pytest.fixture(scope="function", params=sorted(FILE_LOOKUPTYPES))
+def fix_lookup_file(request, fix_cty_xml_namespaced_file, tmp_path):
+    lookuptype = request.param
+    save, name = FILE_LOOKUPTYPES[lookuptype]
+    lib = LookupLib("clublogxml", filename=fix_cty_xml_namespaced_file)
+    filename = str(tmp_path / name)
+    getattr(lib, save)(filename)
+    return lookuptype, filename
+
+
+#TESTS
+#===========================================================
+
+class TestLookupFiles:
+
+    def test_file_contains_same_data(self, fix_cty_xml_namespaced_file, fix_lookup_file):
+        lookuptype, filename = fix_lookup_file
+        xml_lib = LookupLib("clublogxml", filename=fix_cty_xml_namespaced_file)
+        lib = LookupLib(lookuptype, filename=filename)
+
+        assert lib.lookup_entity(230) == xml_lib.lookup_entity(230)
+        assert lib.lookup_prefix("DH") == xml_lib.lookup_prefix("DH")
+        assert lib.lookup_callsign("VK9XO") == xml_lib.lookup_callsign("VK9XO")
+        assert lib.lookup_longest_prefixes(["DH1TW", "QRM"]) == xml_lib.lookup_longest_prefixes(["DH1TW", "QRM"])
+        assert lib.lookup_zone_exception("DP0GVN") == 38
+
+        timestamp = datetime(year=1994, month=12, day=30, tzinfo=timezone.utc)
+        assert lib.is_invalid_operation("VK0MC", timestamp)
+        with pytest.raises(KeyError):
+            lib.is_invalid_operation("VK0MC")
+        with pytest.raises(KeyError):
+            lib.lookup_callsign("DH1TW")
+        with pytest.raises(KeyError):
+            lib.lookup_entity(999)
+
+    def test_file_contains_same_records(self, fix_cty_xml_namespaced_file, fix_lookup_file):
+        lookuptype, filename = fix_lookup_file
+        xml_lib = LookupLib("clublogxml", filename=fix_cty_xml_namespaced_file)
+        lib = LookupLib(lookuptype, filename=filename)
+
+        for name in ["entities", "call_exceptions", "prefixes", "invalid_operations", "zone_exceptions"]:
+            assert dict(lib._data[name].items()) == dict(xml_lib._data[name].items())
+
+    def test_file_keeps_derived_indexes(self, fix_cty_xml_namespaced_file, fix_lookup_file):
+        lookuptype, filename = fix_lookup_file
+        xml_lib = LookupLib("clublogxml", filename=fix_cty_xml_namespaced_file)
+        lib = LookupLib(lookuptype, filename=filename)
+
+        for name in ["prefixes_trie", "call_exceptions_intervals", "prefixes_intervals", "invalid_operations_intervals",
+                     "zone_exceptions_intervals", "boundary_items"]:
+            assert lib._data[name] == xml_lib._data[name]
+        assert list(lib._data["record_boundaries"]) == xml_lib._data["record_boundaries"]
+
+    def test_callinfo_with_file(self, fix_cty_xml_namespaced_file, fix_lookup_file):
+        lookuptype, filename = fix_lookup_file
+        xml_info = Callinfo(LookupLib("clublogxml", filename=fix_cty_xml_namespaced_file))
+        info = Callinfo(LookupLib(lookuptype, filename=filename))
+
+        timestamp = datetime(year=2010, month=6, day=1, tzinfo=timezone.utc)
+        for callsign in ["DH1TW", "DH1TW/P", "VK9XO", "VK9XX", "VK9XO/P"]:
+            assert info.get_all(callsign) == xml_info.get_all(callsign)
+            assert info.get_all(callsign, timestamp) == xml_info.get_all(callsign, timestamp)
+
+    def test_save_file_of_file(self, fix_lookup_file, tmp_path):
+        lookuptype, filename = fix_lookup_file
+        save, name = FILE_LOOKUPTYPES[lookuptype]
+        lib = LookupLib(lookuptype, filename=filename)
+        copy_filename = str(tmp_path / ("copy." + lookuptype))
+        assert getattr(lib, save)(copy_filename)
+        assert LookupLib(lookuptype, filename=copy_filename).lookup_prefix("DH") == lib.lookup_prefix("DH")
+        assert sorted(os.listdir(str(tmp_path))) == sorted([name, "copy." + lookuptype, "cty.xml"])
+
+    def test_failed_save_keeps_file(self, fix_lookup_file, tmp_path, monkeypatch):
+        lookuptype, filename = fix_lookup_file
+        save, name = FILE_LOOKUPTYPES[lookuptype]
+        lib = LookupLib(lookuptype, filename=filename)
+
+        def replace(src, dst):
+            raise OSError("disk full")
+        monkeypatch.setattr(os, "replace", replace)
+        with pytest.raises(OSError):
+            getattr(lib, save)(filename)
+        assert sorted(os.listdir(str(tmp_path))) == sorted([name, "cty.xml"])
+        assert LookupLib(lookuptype, filename=filename).lookup_prefix("DH") == lib.lookup_prefix("DH")
+
+    @pytest.mark.parametrize("lookuptype", sorted(FILE_LOOKUPTYPES))
+    def test_file_without_filename(self, lookuptype):
+        with pytest.raises(AttributeError):
+            LookupLib(lookuptype)
+
+    @pytest.mark.parametrize("lookuptype", sorted(FILE_LOOKUPTYPES))
+    def test_load_invalid_file(self, lookuptype, fix_cty_xml_namespaced_file):
+        with pytest.raises(ValueError):
+            LookupLib(lookuptype, filename=fix_cty_xml_namespaced_file)
+
+    @pytest.mark.parametrize("lookuptype", sorted(FILE_LOOKUPTYPES))
+    def test_save_file_not_available(self, lookuptype, tmp_path):
+        save, name = FILE_LOOKUPTYPES[lookuptype]
+        lib = LookupLib("clublogapi", apikey="foo")
+        with pytest.raises(AttributeError):
+            getattr(lib, save)(str(tmp_path / name))
@@ -1,6 +1,7 @@
 import pytest
 
 from datetime import datetime
+from collections.abc import Mapping
 
 #Fixtures
 #===========================================================
@@ -46,7 +47,7 @@ class Test_Getter_Setter_Api_Types_for_all_sources:
         try:
             entity = fixGeneralApi.lookup_entity(fixEntities)
 
-            assert type(entity) is dict
+            assert isinstance(entity, Mapping)
             if len(entity) > 0:
                 count = 0
                 for attr in entity:
@@ -97,7 +98,7 @@ class Test_Getter_Setter_Api_Types_for_all_sources:
     def test_lookup_callsign(self, fixGeneralApi, fixExceptions):
         try:
             ex = fixGeneralApi.lookup_callsign(fixExceptions)
-            assert type(ex) is dict
+            assert isinstance(ex, Mapping)
             count = 0
             for attr in ex:
                 if attr == "latitude":
@@ -139,7 +140,7 @@ class Test_Getter_Setter_Api_Types_for_all_sources:
 
         try:
             prefix = fixGeneralApi.lookup_prefix(fixPrefixes)
-            assert type(prefix) is dict
+            assert isinstance(prefix, Mapping)
             count = 0
             for attr in prefix:
                 if attr == "country":
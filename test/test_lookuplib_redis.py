@@ -1,14 +1,53 @@
-import pytest
+import asyncio
 import json
+import plistlib
+import time
+import pytest
 from datetime import datetime, timezone
 
 import redis
 
-from pyhamtools import LookupLib, Callinfo
+import pyhamtools.lookuplib
+from pyhamtools import LookupLib, AsyncLookupLib, Callinfo
 
 r = redis.Redis()
 
 
+def current_namespace(redis_prefix):
+    return redis_prefix + ":" + r.get(redis_prefix + "_current").decode()
+
+
+@pytest.fixture(scope="function")
+def fix_clock(monkeypatch):
+    """Returns a function which moves the clock of time.monotonic forward by the given seconds"""
+    offset = [0]
+    monotonic = time.monotonic
+    monkeypatch.setattr(time, "monotonic", lambda: monotonic() + offset[0])
+    def advance(seconds):
+        offset[0] += seconds
+    return advance
+
+
+@pytest.fixture(scope="function")
+def fix_cty_plist_file(tmp_path):
+    """A small country file (plist) of country-files.com"""
+    entry = {"CQZone": 14, "Continent": "EU", "Country": "Fed. Rep. of Germany", "ExactCallsign": False,
+             "ITUZone": 28, "Latitude": 51.0, "Longitude": -10.0}
+    exception = {"CQZone": 29, "Continent": "OC", "Country": "Christmas Island", "ExactCallsign": True,
+                 "ITUZone": 54, "Latitude": -10.48, "Longitude": -105.62}
+    cty_file = tmp_path / "cty.plist"
+    cty_file.write_bytes(plistlib.dumps({"DH": entry, "DL": entry, "VK9XO": exception}))
+    return str(cty_file)
+
+
+def run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
 response_Exception_VP8STI_with_start_and_stop_date = {
            'adif': 240,
            'country': u'SOUTH SANDWICH ISLANDS',
@@ -61,3 +100,511 @@ class TestStoreDataInRedis:
         ci = Callinfo(fix_redis)
         assert ci.get_all("VP8STI", timestamp) == response_Exception_VP8STI_with_start_and_stop_date
         assert ci.get_all("tu5pct") == response_TU5PCT
+
+    def test_refresh_updates_only_changed_records_in_redis(self, fix_cty_xml_namespaced_file, fix_change_cty_xml_file, fix_clock):
+        lib = LookupLib("clublogxml", filename=fix_cty_xml_namespaced_file)
+        lib.copy_data_in_redis("clx_delta", r)
+        redis_lib = LookupLib(lookuptype="redis", redis_prefix="clx_delta", redis_instance=r)
+        assert redis_lib.lookup_prefix("VK9X") == lib.lookup_prefix("VK9X")
+
+        fix_change_cty_xml_file()
+
+        assert lib.refresh(redis_prefix="clx_delta", redis_instance=r)
+        fix_clock(3600)
+        assert redis_lib.lookup_prefix("VK9Y") == lib.lookup_prefix("VK9Y")
+        with pytest.raises(KeyError):
+            redis_lib.lookup_prefix("VK9X")
+
+    def test_copy_switches_versions_and_collects_garbage(self, fix_cty_xml_namespaced_file, fix_change_cty_xml_file, fix_clock):
+        lib = LookupLib("clublogxml", filename=fix_cty_xml_namespaced_file)
+        lib.copy_data_in_redis("clx_ver", r)
+        assert r.get("clx_ver_current") == b"1"
+        redis_lib = LookupLib(lookuptype="redis", redis_prefix="clx_ver", redis_instance=r)
+        assert redis_lib.lookup_prefix("VK9X") == lib.lookup_prefix("VK9X")
+
+        fix_change_cty_xml_file()
+        new_lib = LookupLib("clublogxml", filename=fix_cty_xml_namespaced_file)
+        new_lib.copy_data_in_redis("clx_ver", r)
+        assert r.get("clx_ver_current") == b"2"
+
+        # the previous version is kept for readers which haven't resolved the pointer again
+        assert redis_lib.lookup_prefix("VK9X") == lib.lookup_prefix("VK9X")
+        fix_clock(3600)
+        assert redis_lib.lookup_prefix("VK9Y") == new_lib.lookup_prefix("VK9Y")
+        with pytest.raises(KeyError):
+            redis_lib.lookup_prefix("VK9X")
+
+        new_lib.copy_data_in_redis("clx_ver", r)
+        assert r.smembers("clx_ver_versions") == {b"2", b"3"}
+        assert list(r.scan_iter(match="clx_ver:1_*")) == []
+        assert len(list(r.scan_iter(match="clx_ver:2_*"))) == len(list(r.scan_iter(match="clx_ver:3_*")))
+
+    def test_copy_in_chunks_with_progress(self, fix_cty_xml_namespaced_file, monkeypatch):
+        lib = LookupLib("clublogxml", filename=fix_cty_xml_namespaced_file)
+
+        commands = []
+        pipeline_execute = redis.client.Pipeline.execute
+        def execute(pipe, *args, **kwargs):
+            commands.append([command[0][0] for command in pipe.command_stack])
+            return pipeline_execute(pipe, *args, **kwargs)
+        monkeypatch.setattr(redis.client.Pipeline, "execute", execute)
+
+        reports = []
+        def progress(name, loaded, total, elapsed):
+            reports.append((name, loaded, total))
+
+        assert lib.copy_data_in_redis("clx_chunks", r, chunk_size=2, connections=4, progress=progress)
+
+        prefixes = len(lib._data["prefixes"])
+        assert [report for report in reports if report[0] == "_prefix_"] == \
+            [("_prefix_", min(i, prefixes), prefixes) for i in range(2, prefixes + 2, 2)]
+        assert ("_inv_op_filter", 2, 2) in reports
+        assert max(len(pipeline) for pipeline in commands if pipeline[0] != "GET") <= 2
+        # one SADD per index key and per chunk of a filter
+        filtered = ["call_exceptions_index", "invalid_operations_index", "zone_exceptions_index"]
+        sadds = sum(pipeline.count("SADD") for pipeline in commands)
+        assert sadds == sum(len(lib._data[name]) for name in filtered + ["prefixes_index"]) + \
+            sum((len(lib._data[name]) + 1) // 2 for name in filtered)
+
+        redis_lib = LookupLib(lookuptype="redis", redis_prefix="clx_chunks", redis_instance=r)
+        for callsign in ["VK9XO", "DH1TW"]:
+            assert redis_lib.resolve_callsign(callsign) == lib.resolve_callsign(callsign)
+        assert redis_lib.lookup_prefix("DH") == lib.lookup_prefix("DH")
+
+    def test_normalized_records_are_completed_from_entity(self, fix_cty_xml_namespaced_file):
+        lib = LookupLib("clublogxml", filename=fix_cty_xml_namespaced_file)
+        lib.copy_data_in_redis("clx_norm", r)
+        assert r.hgetall(current_namespace("clx_norm") + "_prefix_1") == {b"adif": b"230"}
+
+        redis_lib = LookupLib(lookuptype="redis", redis_prefix="clx_norm", redis_instance=r)
+        assert redis_lib.lookup_prefix("DH") == lib.lookup_prefix("DH")
+        assert redis_lib.lookup_callsign("VK9XO") == lib.lookup_callsign("VK9XO")
+
+    def test_records_are_stored_as_typed_hashes(self, fix_cty_xml_namespaced_file):
+        lib = LookupLib("clublogxml", filename=fix_cty_xml_namespaced_file)
+        lib.copy_data_in_redis("clx_typed", r)
+        assert r.get("clx_typed_schema") == b"3"
+        assert r.hgetall(current_namespace("clx_typed") + "_inv_op_1") == {b"start": b"786240000", b"end": b"791596799"}
+        assert r.hget(current_namespace("clx_typed") + "_entity_230", "deleted") == b"0"
+
+        redis_lib = LookupLib(lookuptype="redis", redis_prefix="clx_typed", redis_instance=r)
+        timestamp = datetime(year=1994, month=12, day=30, tzinfo=timezone.utc)
+        assert redis_lib.is_invalid_operation("VK0MC", timestamp)
+        assert redis_lib.lookup_entity(230) == lib.lookup_entity(230)
+
+    def test_data_with_other_schema_fails(self, fix_cty_xml_namespaced_file):
+        lib = LookupLib("clublogxml", filename=fix_cty_xml_namespaced_file)
+        lib.copy_data_in_redis("clx_old", r)
+        r.delete("clx_old_schema")
+
+        redis_lib = LookupLib(lookuptype="redis", redis_prefix="clx_old", redis_instance=r)
+        with pytest.raises(ValueError):
+            redis_lib.lookup_prefix("DH")
+        with pytest.raises(ValueError):
+            redis_lib.lookup_entity(230)
+
+        lib.copy_data_in_redis("clx_old", r)
+        assert redis_lib.lookup_prefix("DH") == lib.lookup_prefix("DH")
+
+    def test_data_in_legacy_layout_fails(self):
+        # layout of pyhamtools 0.11: JSON records and index sets directly under the prefix, without schema key
+        for key in r.keys("clx_legacy*"):
+            r.delete(key)
+        r.set("clx_legacy_entity_230", json.dumps({"adif": "230", "country": "FEDERAL REPUBLIC OF GERMANY",
+                                                   "prefix": "DL", "cqz": "14", "cont": "EU"}))
+        r.set("clx_legacy_prefix_1", json.dumps({"adif": "230", "country": "FEDERAL REPUBLIC OF GERMANY",
+                                                 "prefix": "DH", "cqz": "14", "cont": "EU"}))
+        r.sadd("clx_legacy_prefix_index_DH", 1)
+        r.sadd("clx_legacy_prefix_index_DL", 1)
+
+        redis_lib = LookupLib(lookuptype="redis", redis_prefix="clx_legacy", redis_instance=r)
+        with pytest.raises(ValueError):
+            redis_lib.lookup_prefix("DH")
+        with pytest.raises(ValueError):
+            redis_lib.lookup_entity(230)
+        with pytest.raises(ValueError):
+            redis_lib.get_prefix("DH")
+
+        async def lookups():
+            async_lib = AsyncLookupLib(redis_instance=redis.asyncio.Redis(), redis_prefix="clx_legacy")
+            with pytest.raises(ValueError):
+                await async_lib.lookup_prefix("DH")
+        run(lookups())
+
+    def test_missing_data_set_raises_key_error(self):
+        redis_lib = LookupLib(lookuptype="redis", redis_prefix="clx_missing", redis_instance=r)
+        with pytest.raises(KeyError):
+            redis_lib.lookup_prefix("DH")
+        with pytest.raises(KeyError):
+            redis_lib.lookup_entity(230)
+        assert redis_lib.get_prefix("DH") is None
+
+        async def lookups():
+            async_lib = AsyncLookupLib(redis_instance=redis.asyncio.Redis(), redis_prefix="clx_missing")
+            with pytest.raises(KeyError):
+                await async_lib.lookup_prefix("DH")
+        run(lookups())
+
+    def test_lookups_take_a_single_round_trip(self, fix_cty_xml_namespaced_file, monkeypatch):
+        lib = LookupLib("clublogxml", filename=fix_cty_xml_namespaced_file)
+        lib.copy_data_in_redis("clx_trip", r)
+        redis_lib = LookupLib(lookuptype="redis", redis_prefix="clx_trip", redis_instance=r, redis_cache_size=0)
+        assert redis_lib.lookup_prefix("DH") == lib.lookup_prefix("DH")
+
+        commands = []
+        execute_command = r.execute_command
+        def count(*args, **kwargs):
+            commands.append(args[0])
+            return execute_command(*args, **kwargs)
+        monkeypatch.setattr(r, "execute_command", count)
+
+        assert redis_lib.lookup_callsign("VK9XO") == lib.lookup_callsign("VK9XO")
+        assert redis_lib.lookup_longest_prefix("DH1TW") == lib.lookup_longest_prefix("DH1TW")
+        with pytest.raises(KeyError):
+            redis_lib.lookup_prefix("XX")
+        assert commands == ["EVALSHA", "EVALSHA", "EVALSHA"]
+
+        del commands[:]
+        assert Callinfo(redis_lib).get_all("DH1TW") == Callinfo(lib).get_all("DH1TW")
+        assert commands == ["EVALSHA"]
+
+    def test_resolve_callsign_in_a_single_round_trip(self, fix_cty_xml_namespaced_file, monkeypatch):
+        lib = LookupLib("clublogxml", filename=fix_cty_xml_namespaced_file)
+        lib.copy_data_in_redis("clx_resolve", r)
+        redis_lib = LookupLib(lookuptype="redis", redis_prefix="clx_resolve", redis_instance=r)
+        assert redis_lib.resolve_callsign("VK9XO") == lib.resolve_callsign("VK9XO")
+
+        commands = []
+        execute_command = r.execute_command
+        def count(*args, **kwargs):
+            commands.append(args[0])
+            return execute_command(*args, **kwargs)
+        monkeypatch.setattr(r, "execute_command", count)
+
+        for timestamp in [None, datetime(1960, 1, 1, tzinfo=timezone.utc), datetime(1995, 1, 1, tzinfo=timezone.utc)]:
+            for callsign in ["VK9XO", "VK9XX", "VK0MC", "5W1CFN", "DP0GVN"]:
+                try:
+                    expected = lib.resolve_callsign(callsign, timestamp, prefix="DH1TW")
+                except KeyError:
+                    with pytest.raises(KeyError):
+                        redis_lib.resolve_callsign(callsign, timestamp, prefix="DH1TW")
+                else:
+                    assert redis_lib.resolve_callsign(callsign, timestamp, prefix="DH1TW") == expected
+        assert commands == ["EVALSHA"] * 15
+
+    def test_cache_answers_repeated_lookups(self, fix_cty_xml_namespaced_file, monkeypatch):
+        lib = LookupLib("clublogxml", filename=fix_cty_xml_namespaced_file)
+        lib.copy_data_in_redis("clx_cache", r)
+        redis_lib = LookupLib(lookuptype="redis", redis_prefix="clx_cache", redis_instance=r, redis_cache_size=2)
+        assert redis_lib.lookup_prefix("DH") == lib.lookup_prefix("DH")
+        assert redis_lib.lookup_entity(230) == lib.lookup_entity(230)
+
+        commands = []
+        execute_command = r.execute_command
+        def count(*args, **kwargs):
+            commands.append(args[0])
+            return execute_command(*args, **kwargs)
+        monkeypatch.setattr(r, "execute_command", count)
+
+        redis_lib.lookup_prefix("DH")["country"] = "foo"
+        assert redis_lib.lookup_prefix("DH") == lib.lookup_prefix("DH")
+        assert redis_lib.lookup_entity(230) == lib.lookup_entity(230)
+        assert commands == []
+
+        # the least recently used lookup is evicted
+        assert redis_lib.lookup_prefix("VK9X") == lib.lookup_prefix("VK9X")
+        assert redis_lib.lookup_prefix("DH") == lib.lookup_prefix("DH")
+        assert commands == ["EVALSHA", "EVALSHA"]
+
+    def test_cache_is_kept_when_filters_expire(self, fix_cty_xml_namespaced_file, fix_clock, monkeypatch):
+        lib = LookupLib("clublogxml", filename=fix_cty_xml_namespaced_file)
+        lib.copy_data_in_redis("clx_cache_ttl", r)
+        redis_lib = LookupLib(lookuptype="redis", redis_prefix="clx_cache_ttl", redis_instance=r)
+        assert redis_lib.lookup_prefix("DH") == lib.lookup_prefix("DH")
+
+        fix_clock(pyhamtools.lookuplib.REDIS_FILTER_TTL + 1)
+        commands = []
+        execute_command = r.execute_command
+        def count(*args, **kwargs):
+            commands.append(args[0])
+            return execute_command(*args, **kwargs)
+        monkeypatch.setattr(r, "execute_command", count)
+
+        # the filters are loaded again, but the revision hasn't changed
+        assert redis_lib.lookup_prefix("DH") == lib.lookup_prefix("DH")
+        assert "EVALSHA" not in commands
+
+    def test_cache_is_dropped_when_data_changes(self, fix_cty_xml_namespaced_file, fix_change_cty_xml_file, fix_clock):
+        lib = LookupLib("clublogxml", filename=fix_cty_xml_namespaced_file)
+        lib.copy_data_in_redis("clx_cache_change", r)
+        redis_lib = LookupLib(lookuptype="redis", redis_prefix="clx_cache_change", redis_instance=r)
+        assert redis_lib.lookup_prefix("VK9X") == lib.lookup_prefix("VK9X")
+
+        fix_change_cty_xml_file()
+        assert lib.refresh(redis_prefix="clx_cache_change", redis_instance=r)
+
+        # the revision is polled at most every REDIS_REVISION_CHECK_INTERVAL seconds
+        assert redis_lib.lookup_prefix("VK9X")
+        fix_clock(3600)
+        with pytest.raises(KeyError):
+            redis_lib.lookup_prefix("VK9X")
+        assert redis_lib.lookup_prefix("VK9Y") == lib.lookup_prefix("VK9Y")
+
+    def test_scripting_requires_a_single_node(self):
+        class RedisCluster(redis.Redis):
+            pass
+
+        with pytest.raises(AttributeError):
+            LookupLib(lookuptype="redis", redis_prefix="clx_cluster", redis_instance=RedisCluster())
+        assert LookupLib(lookuptype="redis", redis_prefix="clx_cluster", redis_instance=RedisCluster(), redis_scripting=False)
+
+    def test_lookups_without_scripting(self, fix_cty_xml_namespaced_file, fix_change_cty_xml_file, fix_clock, monkeypatch):
+        lib = LookupLib("clublogxml", filename=fix_cty_xml_namespaced_file)
+        lib.copy_data_in_redis("clx_lex", r)
+        namespace = current_namespace("clx_lex")
+        assert r.zscore(namespace + "_prefix_lex", "DH:1") == 0
+        assert r.zcard(namespace + "_prefix_lex") == sum(len(ids) for ids in lib._data["prefixes_index"].values())
+
+        commands = []
+        execute_command = r.execute_command
+        def count(*args, **kwargs):
+            commands.append(args[0])
+            return execute_command(*args, **kwargs)
+        monkeypatch.setattr(r, "execute_command", count)
+
+        redis_lib = LookupLib(lookuptype="redis", redis_prefix="clx_lex", redis_instance=r, redis_scripting=False)
+        info = Callinfo(redis_lib)
+        xml_info = Callinfo(lib)
+        timestamp = datetime(1960, 1, 1, tzinfo=timezone.utc)
+        for callsign in ["DH1TW", "VK9XO", "VK9XX", "VK9ABC", "DH1TW/P", "QRM"]:
+            assert redis_lib.get_longest_prefix(callsign) == lib.get_longest_prefix(callsign)
+            assert redis_lib.get_longest_prefix(callsign, timestamp) == lib.get_longest_prefix(callsign, timestamp)
+            assert redis_lib.get_callsign(callsign) == lib.get_callsign(callsign)
+            try:
+                expected = xml_info.get_all(callsign)
+            except KeyError:
+                with pytest.raises(KeyError):
+                    info.get_all(callsign)
+            else:
+                assert info.get_all(callsign) == expected
+        assert redis_lib.lookup_prefix("DH") == lib.lookup_prefix("DH")
+        assert not [command for command in commands if command.startswith("EVAL") or command == "SCRIPT LOAD"]
+
+        # the lexicographic index follows the refresh of the data
+        fix_change_cty_xml_file()
+        assert lib.refresh(redis_prefix="clx_lex", redis_instance=r)
+        assert r.zscore(namespace + "_prefix_lex", "VK9X:2") is None
+        assert r.zscore(namespace + "_prefix_lex", "VK9Y:2") == 0
+
+        fix_clock(3600)
+        assert redis_lib.get_longest_prefix("VK9XO") is None
+        assert redis_lib.lookup_longest_prefix("VK9YO") == lib.lookup_longest_prefix("VK9YO")
+
+    def test_bulk_lookups(self, fix_cty_xml_namespaced_file):
+        lib = LookupLib("clublogxml", filename=fix_cty_xml_namespaced_file)
+        lib.copy_data_in_redis("clx_bulk", r)
+        redis_lib = LookupLib(lookuptype="redis", redis_prefix="clx_bulk", redis_instance=r)
+
+        callsigns = ["VK9XO", "DH1TW", "VK9XX", "VK9XO"]
+        assert redis_lib.lookup_callsigns(callsigns) == lib.lookup_callsigns(callsigns)
+        prefixes = ["DH", "XX", "VK9X"]
+        assert redis_lib.lookup_prefixes(prefixes) == lib.lookup_prefixes(prefixes)
+        timestamp = datetime(1995, 1, 1, tzinfo=timezone.utc)
+        callsigns = ["VK0MC", "5W1CFN", "DH1TW"]
+        assert redis_lib.is_invalid_operations(callsigns, timestamp) == [True, False, False]
+
+    def test_bulk_longest_prefixes_in_batches(self, fix_cty_xml_namespaced_file, monkeypatch):
+        lib = LookupLib("clublogxml", filename=fix_cty_xml_namespaced_file)
+        lib.copy_data_in_redis("clx_bulk_prefix", r)
+        redis_lib = LookupLib(lookuptype="redis", redis_prefix="clx_bulk_prefix", redis_instance=r, redis_cache_size=0)
+        redis_lib.has_callsign_records("DH1TW")
+
+        commands = []
+        execute_command = r.execute_command
+        def count(*args, **kwargs):
+            commands.append(args[0])
+            return execute_command(*args, **kwargs)
+        monkeypatch.setattr(r, "execute_command", count)
+        monkeypatch.setattr(pyhamtools.lookuplib, "REDIS_BULK_BATCH_SIZE", 8)
+
+        callsigns = ["DH1TW", "DH2TW", "VK9XO", "QRM", "VK9X"]
+        timestamps = [None, None, datetime(1950, 1, 1, tzinfo=timezone.utc), None, None]
+        expected = [lib.get_longest_prefix(callsign, timestamp) for callsign, timestamp in zip(callsigns, timestamps)]
+        assert redis_lib.lookup_longest_prefixes(callsigns, timestamps) == expected
+        # 16 different beginnings of the callsigns
+        assert commands == ["EVALSHA"] * 2
+
+    def test_filters_answer_misses_without_requests(self, fix_cty_xml_namespaced_file, monkeypatch):
+        lib = LookupLib("clublogxml", filename=fix_cty_xml_namespaced_file)
+        lib.copy_data_in_redis("clx_filter", r)
+        assert r.smembers(current_namespace("clx_filter") + "_inv_op_filter") == {b"VK0MC", b"5W1CFN"}
+
+        redis_lib = LookupLib(lookuptype="redis", redis_prefix="clx_filter", redis_instance=r)
+        assert redis_lib.has_callsign_records("VK9XO")
+        assert not redis_lib.has_callsign_records("DH1TW")
+
+        # the filters are cached; misses don't reach Redis
+        def fail(*args, **kwargs):
+            raise AssertionError("unexpected request to redis")
+        monkeypatch.setattr(r, "execute_command", fail)
+        with pytest.raises(KeyError):
+            redis_lib.lookup_callsign("DH1TW")
+        with pytest.raises(KeyError):
+            redis_lib.is_invalid_operation("DH1TW")
+        with pytest.raises(KeyError):
+            redis_lib.lookup_zone_exception("DH1TW")
+
+    def test_filters_follow_refresh(self, fix_cty_xml_namespaced_file, fix_change_cty_xml_file, fix_clock):
+        lib = LookupLib("clublogxml", filename=fix_cty_xml_namespaced_file)
+        lib.copy_data_in_redis("clx_filter_refresh", r)
+        redis_lib = LookupLib(lookuptype="redis", redis_prefix="clx_filter_refresh", redis_instance=r)
+        assert redis_lib.has_callsign_records("VK0MC")
+
+        fix_change_cty_xml_file("<invalid record='1'><call>VK0MC</call>", "<invalid record='1'><call>VK0XX</call>")
+        assert lib.refresh(redis_prefix="clx_filter_refresh", redis_instance=r)
+        assert r.smembers(current_namespace("clx_filter_refresh") + "_inv_op_filter") == {b"VK0XX", b"5W1CFN"}
+
+        # the cached filters are reloaded after REDIS_FILTER_TTL
+        assert redis_lib.has_callsign_records("VK0MC")
+        fix_clock(3600)
+        assert not redis_lib.has_callsign_records("VK0MC")
+        assert redis_lib.has_callsign_records("VK0XX")
+
+    def test_data_without_filters(self, fix_cty_xml_namespaced_file):
+        lib = LookupLib("clublogxml", filename=fix_cty_xml_namespaced_file)
+        lib.copy_data_in_redis("clx_no_filter", r)
+        namespace = current_namespace("clx_no_filter")
+        r.delete(namespace + "_filters")
+        redis_lib = LookupLib(lookuptype="redis", redis_prefix="clx_no_filter", redis_instance=r)
+        assert redis_lib.has_callsign_records("DH1TW")
+        assert redis_lib.lookup_callsign("VK9XO") == lib.lookup_callsign("VK9XO")
+
+    def test_empty_filters_answer_misses_without_requests(self, fix_cty_plist_file, monkeypatch):
+        # the country files have neither invalid operations nor zone exceptions
+        lib = LookupLib("countryfile", filename=fix_cty_plist_file)
+        lib.copy_data_in_redis("cf_empty_filter", r)
+        namespace = current_namespace("cf_empty_filter")
+        assert not r.exists(namespace + "_inv_op_filter")
+        assert r.smembers(namespace + "_filters") == {b"_call_ex_index_", b"_inv_op_index_", b"_zone_ex_index_"}
+
+        redis_lib = LookupLib(lookuptype="redis", redis_prefix="cf_empty_filter", redis_instance=r)
+        assert redis_lib.has_callsign_records("VK9XO")
+        assert not redis_lib.has_callsign_records("DH1TW")
+
+        def fail(*args, **kwargs):
+            raise AssertionError("unexpected request to redis")
+        monkeypatch.setattr(r, "execute_command", fail)
+        with pytest.raises(KeyError):
+            redis_lib.is_invalid_operation("VK9XO")
+        with pytest.raises(KeyError):
+            redis_lib.lookup_zone_exception("VK9XO")
+        with pytest.raises(KeyError):
+            redis_lib.lookup_callsign("DH1TW")
+
+    def test_filter_emptied_by_refresh_is_kept(self, fix_cty_plist_file, fix_clock):
+        lib = LookupLib("countryfile", filename=fix_cty_plist_file)
+        lib.copy_data_in_redis("cf_filter_emptied", r)
+        redis_lib = LookupLib(lookuptype="redis", redis_prefix="cf_filter_emptied", redis_instance=r)
+        assert redis_lib.has_callsign_records("VK9XO")
+
+        # the only callsign exception is removed
+        with open(fix_cty_plist_file, "rb") as f:
+            cty_list = plistlib.load(f)
+        del cty_list["VK9XO"]
+        with open(fix_cty_plist_file, "wb") as f:
+            plistlib.dump(cty_list, f)
+        assert lib.refresh(redis_prefix="cf_filter_emptied", redis_instance=r)
+        assert not r.exists(current_namespace("cf_filter_emptied") + "_call_ex_filter")
+
+        fix_clock(3600)
+        assert not redis_lib.has_callsign_records("VK9XO")
+
+
+class TestAsyncLookupLib:
+
+    def test_async_lookuplib_is_no_lookuplib(self):
+        import redis.asyncio
+
+        async_lib = AsyncLookupLib(redis_instance=redis.asyncio.Redis(), redis_prefix="clx_async")
+        assert not isinstance(async_lib, LookupLib)
+        for method in ["refresh", "start_auto_refresh", "copy_data_in_redis", "save_snapshot", "save_shared_data",
+                       "copy_data_in_sqlite"]:
+            assert not hasattr(async_lib, method)
+        with pytest.raises(TypeError):
+            Callinfo(async_lib)
+
+    def test_async_lookups(self, fix_cty_xml_namespaced_file):
+        import redis.asyncio
+
+        lib = LookupLib("clublogxml", filename=fix_cty_xml_namespaced_file)
+        lib.copy_data_in_redis("clx_async", r)
+        timestamp = datetime(1995, 1, 1, tzinfo=timezone.utc)
+
+        async def lookups():
+            async_lib = AsyncLookupLib(redis_instance=redis.asyncio.Redis(), redis_prefix="clx_async")
+            assert await async_lib.lookup_entity(230) == lib.lookup_entity(230)
+            assert await async_lib.lookup_callsign("vk9xo") == lib.lookup_callsign("VK9XO")
+            assert await async_lib.lookup_prefix("DH") == lib.lookup_prefix("DH")
+            assert await async_lib.lookup_longest_prefix("DH1TW") == lib.lookup_longest_prefix("DH1TW")
+            assert await async_lib.is_invalid_operation("VK0MC", timestamp)
+            assert await async_lib.lookup_zone_exception("DP0GVN") == 38
+            with pytest.raises(KeyError):
+                await async_lib.lookup_callsign("DH1TW")
+            with pytest.raises(KeyError):
+                await async_lib.lookup_entity(999)
+            assert await async_lib.get_prefix("XX", default="foo") == "foo"
+            assert await async_lib.has_callsign_records("VK0MC")
+            assert not await async_lib.has_callsign_records("DH1TW")
+            assert await async_lib.resolve_callsign("VK9XO") == lib.resolve_callsign("VK9XO")
+            assert await async_lib.resolve_callsign("DH1TW") == lib.resolve_callsign("DH1TW")
+            with pytest.raises(KeyError):
+                await async_lib.resolve_callsign("VK0MC", timestamp)
+
+            callsigns = ["VK9XO", "DH1TW", "VK9XO"]
+            assert await async_lib.lookup_callsigns(callsigns) == lib.lookup_callsigns(callsigns)
+            assert await async_lib.lookup_prefixes(["DH", "XX"]) == lib.lookup_prefixes(["DH", "XX"])
+            assert await async_lib.is_invalid_operations(["VK0MC", "DH1TW"], timestamp) == [True, False]
+            assert await async_lib.lookup_longest_prefixes(["DH1TW", "QRM"]) == lib.lookup_longest_prefixes(["DH1TW", "QRM"])
+
+            # lookups run concurrently on the event loop
+            results = await asyncio.gather(*[async_lib.lookup_prefix(prefix) for prefix in ["DH", "VK9X", "DH"]])
+            assert results == [lib.lookup_prefix("DH"), lib.lookup_prefix("VK9X"), lib.lookup_prefix("DH")]
+
+        run(lookups())
+
+    def test_async_lookups_without_scripting(self, fix_cty_xml_namespaced_file):
+        import redis.asyncio
+
+        lib = LookupLib("clublogxml", filename=fix_cty_xml_namespaced_file)
+        lib.copy_data_in_redis("clx_async_lex", r)
+        timestamp = datetime(1995, 1, 1, tzinfo=timezone.utc)
+
+        async def lookups():
+            async_lib = AsyncLookupLib(redis_instance=redis.asyncio.Redis(), redis_prefix="clx_async_lex", redis_scripting=False)
+            assert await async_lib.lookup_longest_prefix("DH1TW") == lib.lookup_longest_prefix("DH1TW")
+            assert await async_lib.lookup_callsign("VK9XO") == lib.lookup_callsign("VK9XO")
+            assert await async_lib.resolve_callsign("VK9XO") == lib.resolve_callsign("VK9XO")
+            with pytest.raises(KeyError):
+                await async_lib.resolve_callsign("VK0MC", timestamp)
+
+        run(lookups())
+
+    def test_async_cache_is_dropped_when_data_changes(self, fix_cty_xml_namespaced_file, fix_change_cty_xml_file, fix_clock):
+        import redis.asyncio
+
+        lib = LookupLib("clublogxml", filename=fix_cty_xml_namespaced_file)
+        lib.copy_data_in_redis("clx_async_cache", r)
+
+        async def lookups():
+            async_lib = AsyncLookupLib(redis_instance=redis.asyncio.Redis(), redis_prefix="clx_async_cache")
+            assert await async_lib.lookup_prefix("VK9X")
+
+            fix_change_cty_xml_file()
+            assert lib.refresh(redis_prefix="clx_async_cache", redis_instance=r)
+
+            fix_clock(3600)
+            with pytest.raises(KeyError):
+                await async_lib.lookup_prefix("VK9X")
+            assert await async_lib.lookup_prefix("VK9Y") == lib.lookup_prefix("VK9Y")
+
+        run(lookups())
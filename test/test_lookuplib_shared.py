@@ -0,0 +1,49 @@
+import pytest
+
+from pyhamtools.lookuplib import LookupLib
+
+
+#Fixtures
+#===========================================================
+
+@pytest.fixture(scope="function")
+def fix_shared_file(fix_cty_xml_namespaced_file, tmp_path):
+    lib = LookupLib("clublogxml", filename=fix_cty_xml_namespaced_file)
+    shared_file = str(tmp_path / "clublog.shared")
+    lib.save_shared_data(shared_file)
+    return shared_file
+
+
+#TESTS
+#===========================================================
+
+# the tests shared by all lookup types reading from files are in test_lookuplib_files.py
+
+class TestSharedData:
+
+    def test_shared_records_are_decoded_on_access(self, fix_cty_xml_namespaced_file, fix_shared_file):
+        xml_lib = LookupLib("clublogxml", filename=fix_cty_xml_namespaced_file)
+        lib = LookupLib("shared", filename=fix_shared_file)
+
+        assert lib._data["prefixes"][1] is not lib._data["prefixes"][1]
+        assert lib._data["prefixes"][1] == xml_lib._data["prefixes"][1]
+
+    def test_attach_shared_data_without_decoding(self, fix_shared_file, monkeypatch):
+        def fail(*args, **kwargs):
+            raise AssertionError("unexpected decoding of a record")
+        monkeypatch.setattr(LookupLib, "_decode_shared_record", fail)
+        lib = LookupLib("shared", filename=fix_shared_file)
+
+        # the derived indexes are read from the file as well
+        for name in ["prefixes_trie", "prefixes_intervals", "record_boundaries", "boundary_items"]:
+            assert type(lib._data[name]).__name__.startswith("_Shared")
+        assert lib._data["prefixes_trie"]["V"]["K"]["9"]["X"][""] == "VK9X"
+        assert lib._data["prefixes_intervals"]["VK9X"][2] == lib._data["prefixes_index"]["VK9X"]
+        assert lib.has_callsign_records("VK9XO")
+
+    def test_attach_shared_data_with_other_version(self, fix_shared_file):
+        with open(fix_shared_file, "r+b") as f:
+            f.seek(len(b"PYHAMTOOLS-SHARED"))
+            f.write(b"\xff\xff")
+        with pytest.raises(ValueError):
+            LookupLib("shared", filename=fix_shared_file)
@@ -0,0 +1,34 @@
+import pytest
+
+from pyhamtools.lookuplib import LookupLib
+
+
+#Fixtures
+#===========================================================
+
+@pytest.fixture(scope="function")
+def fix_snapshot_file(fix_cty_xml_namespaced_file, tmp_path):
+    lib = LookupLib("clublogxml", filename=fix_cty_xml_namespaced_file)
+    snapshot_file = str(tmp_path / "clublog.snapshot")
+    lib.save_snapshot(snapshot_file)
+    return snapshot_file
+
+
+#TESTS
+#===========================================================
+
+# the tests shared by all lookup types reading from files are in test_lookuplib_files.py
+
+class TestSnapshot:
+
+    def test_snapshot_stores_plain_records(self, fix_snapshot_file):
+        # the snapshot must not depend on the (private) classes of pyhamtools
+        with open(fix_snapshot_file, "rb") as f:
+            assert b"pyhamtools" not in f.read()
+
+    def test_load_snapshot_with_other_version(self, fix_snapshot_file):
+        with open(fix_snapshot_file, "r+b") as f:
+            f.seek(len(b"PYHAMTOOLS-SNAPSHOT"))
+            f.write(b"\xff\xff")
+        with pytest.raises(ValueError):
+            LookupLib("snapshot", filename=fix_snapshot_file)
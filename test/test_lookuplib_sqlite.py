@@ -0,0 +1,46 @@
+import pytest
+import sqlite3
+
+from pyhamtools.lookuplib import LookupLib
+
+
+#Fixtures
+#===========================================================
+
+@pytest.fixture(scope="function")
+def fix_sqlite_file(fix_cty_xml_namespaced_file, tmp_path):
+    lib = LookupLib("clublogxml", filename=fix_cty_xml_namespaced_file)
+    sqlite_file = str(tmp_path / "clublog.sqlite")
+    lib.copy_data_in_sqlite(sqlite_file)
+    return sqlite_file
+
+
+#TESTS
+#===========================================================
+
+# the tests shared by all lookup types reading from files are in test_lookuplib_files.py
+
+class TestSqliteData:
+
+    def test_sqlite_tables_are_typed(self, fix_cty_xml_namespaced_file, fix_sqlite_file):
+        xml_lib = LookupLib("clublogxml", filename=fix_cty_xml_namespaced_file)
+        connection = sqlite3.connect(fix_sqlite_file)
+        try:
+            row = connection.execute('SELECT typeof(adif), typeof(latitude), typeof("end") FROM call_exceptions '
+                                     'WHERE "end" IS NOT NULL LIMIT 1').fetchone()
+            assert row == ("integer", "real", "integer")
+            assert connection.execute("SELECT COUNT(*) FROM prefixes").fetchone()[0] == len(xml_lib._data["prefixes"])
+        finally:
+            connection.close()
+
+    def test_attach_missing_sqlite_data(self, tmp_path):
+        with pytest.raises(FileNotFoundError):
+            LookupLib("sqlite", filename=str(tmp_path / "foo.sqlite"))
+
+    def test_attach_sqlite_data_with_other_version(self, fix_sqlite_file):
+        connection = sqlite3.connect(fix_sqlite_file)
+        with connection:
+            connection.execute("UPDATE metadata SET value = 99 WHERE name = 'schema_version'")
+        connection.close()
+        with pytest.raises(ValueError):
+            LookupLib("sqlite", filename=fix_sqlite_file)